@@ -9,10 +9,7 @@ Provides tools for calculating and visualizing investment returns with features
 - Interactive visualizations
 """
 
-from services.calculation_service import CalculationService
-from services.stock_service import fetch_stock_data, fetch_stock_data_batch, fetch_inflation_data
-from services.data_service import generate_data_points
-from services.cache_service import cache
+import services
 
 __version__ = '1.0.0'
 __author__ = 'Your Name'
@@ -20,13 +17,20 @@ __email__ = 'your.email@example.com'
 
 __all__ = [
     'CalculationService',
-    'fetch_stock_data',
     'fetch_stock_data_batch',
-    'fetch_inflation_data',
+    'fetch_month_end_batch',
+    'get_inflation_data',
     'generate_data_points',
     'cache'
 ]
 
+
+def __getattr__(name):
+    # Resolved through the lazy services package, so importing this package stays cheap
+    if name in __all__:
+        return getattr(services, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 # Package metadata
 PACKAGE_NAME = 'investment_calculator'
 DESCRIPTION = 'A tool for calculating and comparing investment growth across multiple stocks'
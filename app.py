@@ -1,11 +1,23 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, g, render_template, request, jsonify, stream_with_context, url_for
 import logging
-from services import cache, fetch_stock_data_batch, generate_data_points, VisualizationService, get_inflation_data
+import services
+from services.cache_service import cache
+from services.options import BOOTSTRAP, DAILY_RESOLUTION, DEFAULT_BLOCK_SIZE, DEFAULT_COUNTRY, DEFAULT_PERCENTILES, DEFAULT_REBALANCE_THRESHOLD, MONTHLY_RESOLUTION, PROJECTION_METHODS, REBALANCE_NONE, REBALANCE_SCHEDULES, RESOLUTIONS
+from services.logging_service import configure_logging, log_event
+from services.metrics_service import PROMETHEUS_MIMETYPE, REQUEST_SECONDS, count_cache, registry, server_timing_header, timed
+from services.singleflight_service import SingleFlight
+from services.job_service import FINISHED_STATES, JobQueueFull, get_job, init_job_queue, submit_job, watch_job
+from services.warmer_service import reserve_warm_cache_capacity, start_cache_warmer
+import functools
 import hashlib
 import json
+import math
 from config import get_config
-import pandas as pd
 import os
+import time
+
+STREAM_FORMATS = ('ndjson', 'sse')
+COLUMNAR_MIMETYPE = 'application/vnd.investment-calculator.columnar+json'
 
 def create_app(config_name=None):
     app = Flask(__name__)
@@ -14,44 +26,113 @@ def create_app(config_name=None):
     app.config.from_object(config)
      # Set up the correct data directory path
     app.config['DATA_DIR'] = os.path.join(app.root_path, 'services', 'data')
+    if not app.config.get('PRICE_STORE_DIR'):
+        app.config['PRICE_STORE_DIR'] = os.path.join(app.instance_path, 'price_store')
 
-    # Set up logging
-    logging.basicConfig(
-        level=app.config['LOG_LEVEL'],
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
+    # Set up logging: handlers run on a listener thread unless LOG_QUEUE_ENABLED is off
+    configure_logging(app.config['LOG_LEVEL'], app.config['LOG_QUEUE_ENABLED'], app.config['LOG_SAMPLE_RATE'])
     logger = logging.getLogger(__name__)
 
+    if app.config['CACHE_WARM_ENABLED']:
+        reserve_warm_cache_capacity(app)
     cache.init_app(app)
 
+    if app.config['PRELOAD_SERVICES']:
+        with app.app_context():
+            services.preload()
+
+    if app.config['CACHE_WARM_ENABLED']:
+        start_cache_warmer(app)
+
+    init_job_queue(app)
+
     def cache_key():
-        """Generate a cache key based on the request data."""
-        data = request.get_json()
-        data['stocks'] = sorted(data['stocks'])
-        return hashlib.md5(json.dumps(data, sort_keys=True).encode()).hexdigest()
+        """Generate a cache key based on the request data; None when the body is malformed."""
+        data = request.get_json(silent=True)
+        try:
+            key_data = {**data, 'stocks': sorted(data['stocks']),
+                        '_format': 'columnar' if wants_columnar() else 'records'}
+        except (KeyError, TypeError):
+            return None
+        return hashlib.md5(json.dumps(key_data, sort_keys=True).encode()).hexdigest()
+
+    def uncacheable():
+        """Streamed responses and bodies without a key bypass the response cache"""
+        return streaming_format() is not None or cache_key() is None
+
+    calculate_flights = SingleFlight('calculate')
+
+    def coalesced(view):
+        """
+        Identical concurrent requests (same ``cache_key``) share one run of ``view``
+        while its response is not cached yet; streamed responses and malformed
+        bodies, which the view rejects itself, are never shared.
+        """
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            key = None if streaming_format() is not None else cache_key()
+            if key is None:
+                return view(*args, **kwargs)
+            g.response_cache_miss = True
+            body, status, headers = calculate_flights.do(
+                key, lambda: freeze_response(app.make_response(view(*args, **kwargs)))
+            )
+            return Response(body, status=status, headers=headers)
+        return wrapper
+
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_timing(response):
+        """Request latency histogram, response cache result and the Server-Timing header"""
+        started = g.get('request_started')
+        if started is None or not app.config['METRICS_ENABLED']:
+            return response
+        if request.endpoint == 'calculate' and not uncacheable():
+            missed = g.get('response_cache_miss', False)
+            count_cache('response', hits=int(not missed), misses=int(missed))
+        elapsed = time.perf_counter() - started
+        REQUEST_SECONDS.observe(elapsed, endpoint=request.endpoint or 'unknown', status=str(response.status_code))
+        response.headers['Server-Timing'] = server_timing_header(elapsed)
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        """Stage, request and cache metrics of this worker in the Prometheus text format"""
+        if not app.config['METRICS_ENABLED']:
+            return jsonify({'error': 'Not found', 'details': 'Metrics are disabled'}), 404
+        return Response(registry.render(), mimetype=PROMETHEUS_MIMETYPE)
 
     @app.route('/')
     def index():
         return render_template('index.html')
 
     @app.route('/calculate', methods=['POST'])
-    @cache.cached(timeout=300, key_prefix=cache_key)
+    @cache.cached(timeout=300, key_prefix=cache_key, unless=uncacheable)
+    @coalesced
 
     
     def calculate():
         try:
             data = request.json
-            logger.info(f"Received calculation request: {data}")
+            body = data if isinstance(data, dict) else {}
+            requested = body.get('stocks')
+            log_event(logger, 'calculate.request', symbols=len(requested) if isinstance(requested, list) else 0,
+                      years=f"{body.get('startYear')}-{body.get('endYear')}")
+            logger.debug('Calculation request body: %s', data)
 
             # Validate input data
             try:
-                initial_investment = float(data['initialInvestment'])
-                start_year = int(data['startYear'])
-                end_year = int(data['endYear'])
-                stock_symbols = data['stocks']
-                addition_amount = float(data['additionAmount'])
-                addition_frequency = data['additionFrequency']
-                adjust_for_inflation = data['adjustForInflation']
+                params = parse_calculation_params(data)
+                initial_investment = params['initial']
+                start_year = params['start_year']
+                end_year = params['end_year']
+                stock_symbols = params['stocks']
+                addition_amount = params['addition_amount']
+                addition_frequency = params['addition_frequency']
+                adjust_for_inflation = params['adjust_for_inflation']
             except (KeyError, ValueError) as e:
                 logger.error(f"Invalid input parameters: {str(e)}")
                 return jsonify({
@@ -68,12 +149,15 @@ def create_app(config_name=None):
 
             try:
                 # Fetch stock data with error handling
-                logger.info(f"want to fetch stock data for symbols: {stock_symbols}")
-                stocks, invalid_symbols, data_issues = fetch_stock_data_batch(stock_symbols, start_year, end_year)
-                logger.info(f"Fetched {len(stocks)} valid stocks out of {len(stock_symbols)} requested")
+                logger.debug('Fetching stock data for symbols: %s', stock_symbols)
+                daily_prices = params['resolution'] == DAILY_RESOLUTION or params['portfolio'] is not None
+                fetch = services.fetch_stock_data_batch if daily_prices else services.fetch_month_end_batch
+                with timed('fetch'):
+                    stocks, invalid_symbols, data_issues = fetch(stock_symbols, start_year, end_year)
+                log_event(logger, 'calculate.fetched', valid=len(stocks), requested=len(stock_symbols))
 
                 if invalid_symbols:
-                    logger.warning(f"Invalid symbols found: {invalid_symbols}")
+                    logger.warning('Invalid symbols found: %s', invalid_symbols)
 
                 if not stocks:
                     return jsonify({
@@ -104,25 +188,57 @@ def create_app(config_name=None):
                 # Prepare response with warnings if needed
                 response_data = {}
                 if invalid_symbols or len(data_issues) > 0:
-                    logger.info(f"invalid or (len = {len(data_issues)}) invalid :  {invalid_symbols}")
+                    logger.debug('Data issues for %d symbols, invalid: %s', len(data_issues), invalid_symbols)
                     response_data['warnings'] = {
                         'invalidSymbols': invalid_symbols,
                         'dataIssues': data_issues,
                         'message': "Some stocks had issues with data availability"
                     }
 
+                # Opt-in streaming: one event per symbol, then the graph
+                stream_format = streaming_format()
+                if stream_format is not None and params['portfolio'] is not None:
+                    return jsonify({
+                        'error': 'Invalid input parameters',
+                        'details': 'Portfolio mode cannot be streamed'
+                    }), 400
+                if stream_format is not None:
+                    return stream_calculation(stream_format, params, stocks, response_data.get('warnings'))
+
                 # Generate data points
-                logger.info('Generating data points...')
+                logger.debug('Generating data points...')
+                columnar = wants_columnar()
                 try:
-                    results = generate_data_points(
-                        initial_investment, 
-                        start_year, 
-                        end_year, 
-                        stocks,
-                        addition_amount, 
-                        addition_frequency, 
-                        adjust_for_inflation
-                    )
+                    with timed('simulate'):
+                        if params['portfolio'] is not None:
+                            # One combined, rebalanced portfolio instead of one investment per symbol
+                            results = services.simulate_portfolio(
+                                initial_investment,
+                                start_year,
+                                end_year,
+                                stocks,
+                                params['portfolio']['weights'],
+                                params['portfolio']['rebalance'],
+                                addition_amount,
+                                addition_frequency,
+                                adjust_for_inflation,
+                                params['inflation_country'],
+                                params['portfolio']['threshold'],
+                                columnar=columnar
+                            )
+                        else:
+                            simulate = services.generate_daily_data_points if params['resolution'] == DAILY_RESOLUTION else services.generate_data_points
+                            results = simulate(
+                                initial_investment, 
+                                start_year, 
+                                end_year, 
+                                stocks,
+                                addition_amount, 
+                                addition_frequency, 
+                                adjust_for_inflation,
+                                params['inflation_country'],
+                                columnar=columnar
+                            )
                 except Exception as e:
                     logger.error(f"Error generating data points: {str(e)}")
                     return jsonify({
@@ -132,8 +248,13 @@ def create_app(config_name=None):
 
                 # Generate visualization
                 try:
-                    vis_service = VisualizationService()
-                    graph_json = vis_service.generate_graph(results)
+                    with timed('graph'):
+                        vis_service = services.VisualizationService()
+                        if columnar:
+                            # Traces point at the columns instead of repeating them
+                            graph_json = vis_service.generate_graph_spec(results, params['max_points'])
+                        else:
+                            graph_json = vis_service.generate_graph(results, params['max_points'])
                 except Exception as e:
                     logger.error(f"Error generating visualization: {str(e)}")
                     return jsonify({
@@ -147,8 +268,13 @@ def create_app(config_name=None):
                     'graph': graph_json
                 })
 
-                logger.info("Calculation completed successfully")
-                return jsonify(response_data)
+                log_event(logger, 'calculate.done', symbols=len(results), columnar=columnar)
+                with timed('serialize'):
+                    if columnar:
+                        response_data['format'] = 'columnar'
+                        # Always compact: pretty-printing puts every array element on its own line
+                        return Response(json.dumps(response_data, separators=(',', ':')), mimetype=COLUMNAR_MIMETYPE)
+                    return jsonify(response_data)
 
             except Exception as e:
                 logger.error(f"Error processing stock data: {str(e)}")
@@ -165,11 +291,391 @@ def create_app(config_name=None):
             }), 500
 
 
+    def stream_calculation(stream_format, params, stocks, warnings):
+        """Stream per-symbol results as NDJSON lines or SSE events as they are computed"""
+        def encode(event_type, payload):
+            return encode_stream_event(stream_format, event_type, payload)
+
+        def generate():
+            yield encode('meta', {'symbols': list(stocks), 'warnings': warnings})
+            results = []
+            simulate = services.generate_daily_data_points if params['resolution'] == DAILY_RESOLUTION else services.generate_data_points
+            try:
+                for symbol, stock_data in stocks.items():
+                    symbol_results = simulate(
+                        params['initial'],
+                        params['start_year'],
+                        params['end_year'],
+                        {symbol: stock_data},
+                        params['addition_amount'],
+                        params['addition_frequency'],
+                        params['adjust_for_inflation'],
+                        params['inflation_country']
+                    )
+                    for stock_result in symbol_results:
+                        results.append(stock_result)
+                        yield encode('symbol', stock_result)
+
+                if results:
+                    yield encode('graph', services.VisualizationService().generate_graph(results, params['max_points']))
+                yield encode('done', {'symbolCount': len(results)})
+            except Exception as e:
+                logger.error(f"Error while streaming calculation: {str(e)}")
+                yield encode('error', {'error': 'Calculation error', 'details': str(e)})
+
+        return stream_response(stream_format, generate())
+
+    @app.route('/calculate/batch', methods=['POST'])
+    def calculate_batch():
+        """Evaluate many /calculate parameter sets against one shared data fetch"""
+        try:
+            data = request.json or {}
+            raw_scenarios = data.get('scenarios')
+            if not isinstance(raw_scenarios, list) or not raw_scenarios:
+                return jsonify({
+                    'error': 'Invalid input parameters',
+                    'details': 'scenarios must be a non-empty list'
+                }), 400
+            if len(raw_scenarios) > app.config['MAX_BATCH_SCENARIOS']:
+                return jsonify({
+                    'error': 'Too many scenarios',
+                    'details': f"At most {app.config['MAX_BATCH_SCENARIOS']} scenarios per request"
+                }), 400
+
+            # Top-level fields are defaults for every scenario
+            defaults = {key: value for key, value in data.items() if key != 'scenarios'}
+            scenarios = []
+            try:
+                for i, raw in enumerate(raw_scenarios):
+                    params = parse_calculation_params({**defaults, **raw})
+                    params['id'] = str(raw.get('id', i))
+                    scenarios.append(params)
+            except (KeyError, ValueError, TypeError) as e:
+                logger.error(f"Invalid scenario parameters: {str(e)}")
+                return jsonify({
+                    'error': 'Invalid input parameters',
+                    'details': f"Scenario {len(scenarios)}: {str(e)}"
+                }), 400
+
+            ids = [s['id'] for s in scenarios]
+            duplicates = sorted({scenario_id for scenario_id in ids if ids.count(scenario_id) > 1})
+            if duplicates:
+                return jsonify({
+                    'error': 'Invalid input parameters',
+                    'details': f"Scenario ids must be unique, repeated: {duplicates}"
+                }), 400
+
+            daily = [s['id'] for s in scenarios if s['resolution'] == DAILY_RESOLUTION or s['portfolio'] is not None]
+            if daily:
+                return jsonify({
+                    'error': 'Invalid input parameters',
+                    'details': f"resolution=daily and portfolio mode are only supported by /calculate (scenarios {daily})"
+                }), 400
+
+            invalid_ranges = [s['id'] for s in scenarios if s['end_year'] <= s['start_year']]
+            if invalid_ranges:
+                return jsonify({
+                    'error': 'Invalid date range',
+                    'details': f"End year must be greater than start year for scenarios {invalid_ranges}"
+                }), 400
+
+            symbols = list(dict.fromkeys(symbol for s in scenarios for symbol in s['stocks']))
+            start_year = min(s['start_year'] for s in scenarios)
+            end_year = max(s['end_year'] for s in scenarios)
+            stocks, invalid_symbols, data_issues = services.fetch_month_end_batch(symbols, start_year, end_year)
+            if not stocks:
+                return jsonify({
+                    'error': f'No valid stock data for stocks {symbols}',
+                    'details': {
+                        'invalidSymbols': invalid_symbols,
+                        'message': f"No valid data found for any symbols. Please check: {', '.join(invalid_symbols)}"
+                    }
+                }), 400
+
+            results = services.evaluate_scenarios(stocks, scenarios, inflation_tables_for(scenarios))
+
+            response_data = {'results': {}}
+            if invalid_symbols or data_issues:
+                response_data['warnings'] = {
+                    'invalidSymbols': invalid_symbols,
+                    'dataIssues': data_issues,
+                    'message': "Some stocks had issues with data availability"
+                }
+            vis_service = services.VisualizationService() if data.get('includeGraph') else None
+            max_points = {s['id']: s['max_points'] for s in scenarios}
+            for scenario_id, scenario_results in results.items():
+                entry = {'data': scenario_results}
+                if vis_service is not None and scenario_results:
+                    entry['graph'] = vis_service.generate_graph(scenario_results, max_points[scenario_id])
+                response_data['results'][scenario_id] = entry
+
+            return jsonify(response_data)
+
+        except Exception as e:
+            logger.exception(f"Unexpected error in calculate batch route: {str(e)}")
+            return jsonify({
+                'error': 'Server error',
+                'details': 'An unexpected error occurred'
+            }), 500
+
+    @app.route('/calculate/sweep', methods=['POST'])
+    def calculate_sweep():
+        """Evaluate the cartesian product of start/end years, amounts and frequencies"""
+        try:
+            data = request.json or {}
+            try:
+                grid = data['grid']
+                stock_symbols = data['stocks']
+                if not isinstance(stock_symbols, list):
+                    raise ValueError('stocks must be a list of symbols')
+                axes = [
+                    (grid['startYear'], int),
+                    (grid['endYear'], int),
+                    (grid.get('additionAmount', [data.get('additionAmount', 0)]), float),
+                    (grid.get('additionFrequency', [data.get('additionFrequency', 'none')]), str)
+                ]
+                # Bound the grid before expanding any axis
+                combinations = math.prod(sweep_axis_length(value, cast) for value, cast in axes)
+                if combinations > app.config['MAX_SWEEP_COMBINATIONS']:
+                    return jsonify({
+                        'error': 'Sweep too large',
+                        'details': f"{combinations} combinations requested, at most {app.config['MAX_SWEEP_COMBINATIONS']} allowed"
+                    }), 400
+                scenarios = services.build_grid(
+                    *(parse_sweep_axis(value, cast) for value, cast in axes),
+                    float(data['initialInvestment']),
+                    bool(data.get('adjustForInflation', False)),
+                    stock_symbols,
+                    parse_inflation_country(data)
+                )
+            except (KeyError, ValueError, TypeError) as e:
+                logger.error(f"Invalid sweep parameters: {str(e)}")
+                return jsonify({
+                    'error': 'Invalid input parameters',
+                    'details': str(e)
+                }), 400
+
+            if not scenarios:
+                return jsonify({
+                    'error': 'Invalid date range',
+                    'details': 'No start/end year combination has the end year after the start year'
+                }), 400
+
+            start_year = min(s['start_year'] for s in scenarios)
+            end_year = max(s['end_year'] for s in scenarios)
+            stocks, invalid_symbols, data_issues = services.fetch_month_end_batch(stock_symbols, start_year, end_year)
+            if not stocks:
+                return jsonify({
+                    'error': f'No valid stock data for stocks {stock_symbols}',
+                    'details': {
+                        'invalidSymbols': invalid_symbols,
+                        'message': f"No valid data found for any symbols. Please check: {', '.join(invalid_symbols)}"
+                    }
+                }), 400
+
+            table = services.run_sweep(
+                stocks,
+                scenarios,
+                inflation_tables_for(scenarios),
+                max_workers=app.config['SWEEP_MAX_WORKERS']
+            )
+
+            response_data = {'count': len(scenarios), **table}
+            if invalid_symbols or data_issues:
+                response_data['warnings'] = {
+                    'invalidSymbols': invalid_symbols,
+                    'dataIssues': data_issues,
+                    'message': "Some stocks had issues with data availability"
+                }
+            return jsonify(response_data)
+
+        except Exception as e:
+            logger.exception(f"Unexpected error in calculate sweep route: {str(e)}")
+            return jsonify({
+                'error': 'Server error',
+                'details': 'An unexpected error occurred'
+            }), 500
+
+    @app.route('/calculate/projection', methods=['POST'])
+    def calculate_projection():
+        """Monte Carlo percentile bands for future growth from historical monthly returns"""
+        try:
+            data = request.json or {}
+            try:
+                stock_symbols = data['stocks']
+                if not isinstance(stock_symbols, list) or not stock_symbols:
+                    raise ValueError('stocks must be a non-empty list of symbols')
+                history_start, history_end = int(data['startYear']), int(data['endYear'])
+                if history_end <= history_start:
+                    raise ValueError('End year must be greater than start year')
+                years = int(data['years'])
+                paths = int(data.get('paths', 10000))
+                method = data.get('method', BOOTSTRAP)
+                if method not in PROJECTION_METHODS:
+                    raise ValueError(f"method must be one of {', '.join(PROJECTION_METHODS)}")
+                percentiles = [float(p) for p in data.get('percentiles', DEFAULT_PERCENTILES)]
+                if not percentiles or any(not 0 <= p <= 100 for p in percentiles):
+                    raise ValueError('percentiles must be between 0 and 100')
+                weights = parse_weights(data.get('weights'))
+                projection_params = {
+                    'initial': float(data['initialInvestment']),
+                    'years': years,
+                    'addition_amount': float(data.get('additionAmount', 0)),
+                    'addition_frequency': data.get('additionFrequency', 'none'),
+                    'paths': paths,
+                    'method': method,
+                    'block_size': int(data.get('blockSize', DEFAULT_BLOCK_SIZE)),
+                    'percentiles': sorted(set(percentiles)),
+                    'seed': int(data['seed']) if data.get('seed') is not None else None
+                }
+                inflation_country = parse_inflation_country(data)
+            except (KeyError, ValueError, TypeError) as e:
+                logger.error(f"Invalid projection parameters: {str(e)}")
+                return jsonify({
+                    'error': 'Invalid input parameters',
+                    'details': str(e)
+                }), 400
+
+            if not 0 < years <= app.config['MAX_PROJECTION_YEARS'] or not 0 < paths <= app.config['MAX_PROJECTION_PATHS']:
+                return jsonify({
+                    'error': 'Projection too large',
+                    'details': f"years must be 1-{app.config['MAX_PROJECTION_YEARS']} and paths 1-{app.config['MAX_PROJECTION_PATHS']}"
+                }), 400
+
+            stocks, invalid_symbols, data_issues = services.fetch_month_end_batch(stock_symbols, history_start, history_end)
+            if not stocks:
+                return jsonify({
+                    'error': f'No valid stock data for stocks {stock_symbols}',
+                    'details': {
+                        'invalidSymbols': invalid_symbols,
+                        'message': f"No valid data found for any symbols. Please check: {', '.join(invalid_symbols)}"
+                    }
+                }), 400
+
+            # Inflation: an explicit annual rate, else the country's average over the history window
+            inflation_rate = 0.0
+            if data.get('inflationRate') is not None:
+                inflation_rate = float(data['inflationRate'])
+            elif data.get('adjustForInflation'):
+                table = services.get_inflation_table(inflation_country)
+                if table is not None:
+                    inflation_rate = table.mean_rate(history_start, history_end)
+
+            try:
+                returns = services.historical_monthly_returns(stocks, weights, history_start, history_end)
+                projection = services.project_growth(
+                    returns,
+                    inflation_rate=inflation_rate,
+                    max_workers=app.config['PROJECTION_MAX_WORKERS'],
+                    **projection_params
+                )
+            except ValueError as e:
+                logger.error(f"Error projecting growth: {str(e)}")
+                return jsonify({
+                    'error': 'Calculation error',
+                    'details': str(e)
+                }), 400
+
+            response_data = {
+                **projection,
+                'inflationRate': inflation_rate,
+                'historyMonths': int(len(returns)),
+                'graph': services.VisualizationService().generate_projection_graph(projection)
+            }
+            if invalid_symbols or data_issues:
+                response_data['warnings'] = {
+                    'invalidSymbols': invalid_symbols,
+                    'dataIssues': data_issues,
+                    'message': "Some stocks had issues with data availability"
+                }
+            return jsonify(response_data)
+
+        except Exception as e:
+            logger.exception(f"Unexpected error in calculate projection route: {str(e)}")
+            return jsonify({
+                'error': 'Server error',
+                'details': 'An unexpected error occurred'
+            }), 500
+
+    @app.route('/calculate/rolling', methods=['POST'])
+    def calculate_rolling():
+        """Outcome of every holding period of a fixed length starting in [startYear, endYear)"""
+        try:
+            data = request.json or {}
+            try:
+                stock_symbols = data['stocks']
+                if not isinstance(stock_symbols, list) or not stock_symbols:
+                    raise ValueError('stocks must be a non-empty list of symbols')
+                start_year, end_year = int(data['startYear']), int(data['endYear'])
+                if end_year <= start_year:
+                    raise ValueError('End year must be greater than start year')
+                if data.get('holdingMonths') is not None:
+                    holding_months = int(data['holdingMonths'])
+                else:
+                    holding_months = int(data['holdingYears']) * 12
+                if holding_months <= 0:
+                    raise ValueError('The holding period must be at least one month')
+                rolling_params = {
+                    'initial': float(data['initialInvestment']),
+                    'addition_amount': float(data.get('additionAmount', 0)),
+                    'addition_frequency': data.get('additionFrequency', 'none')
+                }
+                inflation_country = parse_inflation_country(data)
+            except (KeyError, ValueError, TypeError) as e:
+                logger.error(f"Invalid rolling window parameters: {str(e)}")
+                return jsonify({
+                    'error': 'Invalid input parameters',
+                    'details': str(e)
+                }), 400
+
+            # The last window starts in December of endYear - 1 and runs holding_months from there
+            data_end_year = end_year + (holding_months + 10) // 12
+            stocks, invalid_symbols, data_issues = services.fetch_month_end_batch(stock_symbols, start_year, data_end_year)
+            if not stocks:
+                return jsonify({
+                    'error': f'No valid stock data for stocks {stock_symbols}',
+                    'details': {
+                        'invalidSymbols': invalid_symbols,
+                        'message': f"No valid data found for any symbols. Please check: {', '.join(invalid_symbols)}"
+                    }
+                }), 400
+
+            inflation_table = services.get_inflation_table(inflation_country) if data.get('adjustForInflation') else None
+            results = services.rolling_windows(stocks, start_year, end_year, holding_months,
+                                      inflation_table=inflation_table, **rolling_params)
+            if not results:
+                return jsonify({
+                    'error': 'Calculation error',
+                    'details': f"No {holding_months}-month window starting in {start_year}-{end_year - 1} has complete price data"
+                }), 400
+
+            response_data = {'holdingMonths': holding_months, 'results': results}
+            if invalid_symbols or data_issues:
+                response_data['warnings'] = {
+                    'invalidSymbols': invalid_symbols,
+                    'dataIssues': data_issues,
+                    'message': "Some stocks had issues with data availability"
+                }
+            return jsonify(response_data)
+
+        except Exception as e:
+            logger.exception(f"Unexpected error in calculate rolling route: {str(e)}")
+            return jsonify({
+                'error': 'Server error',
+                'details': 'An unexpected error occurred'
+            }), 500
+
     @app.route('/api/inflation')
     def get_inflation():
         """Get inflation data endpoint"""
         try:
-            data = get_inflation_data()
+            country = request.args.get('country', DEFAULT_COUNTRY)
+            if country not in services.get_available_countries():
+                return jsonify({
+                    'error': 'Unknown country',
+                    'details': f"No inflation data for {country}"
+                }), 404
+            data = services.get_inflation_data(country)
             if data is None:
                 return jsonify({
                     'error': 'Failed to load inflation data',
@@ -183,10 +689,76 @@ def create_app(config_name=None):
                 'details': str(e)
             }), 500
 
-    from services.stock_list_service import get_stock_list, search_stocks
+    @app.route('/jobs', methods=['POST'])
+    def create_job():
+        """Queue a long-running calculation; the body is ``{"kind": ..., "params": <endpoint request>}``"""
+        try:
+            data = request.json or {}
+            try:
+                job = submit_job(data.get('kind'), data.get('params'))
+            except ValueError as e:
+                return jsonify({
+                    'error': 'Invalid job',
+                    'details': str(e)
+                }), 400
+            except JobQueueFull as e:
+                response = jsonify({
+                    'error': 'Too many pending jobs',
+                    'details': str(e)
+                })
+                response.headers['Retry-After'] = '30'
+                return response, 503
+            response = jsonify({**job, 'statusUrl': url_for('job_status', job_id=job['id'])})
+            response.headers['Location'] = url_for('job_status', job_id=job['id'])
+            return response, 202
+        except Exception as e:
+            logger.exception(f"Error submitting job: {str(e)}")
+            return jsonify({
+                'error': 'Server error',
+                'details': 'An unexpected error occurred'
+            }), 500
+
+    @app.route('/jobs/<job_id>')
+    def job_status(job_id):
+        """Job state and, once finished, its result; ``?stream=sse|ndjson`` follows it until then"""
+        job = get_job(job_id)
+        if job is None:
+            return jsonify({
+                'error': 'Unknown job',
+                'details': f"No job {job_id}, or its result has expired"
+            }), 404
+
+        stream_format = streaming_format()
+        if stream_format is None or job['state'] in FINISHED_STATES:
+            return jsonify(job)
+
+        def generate():
+            last = job
+            for last in watch_job(job_id, app.config['JOB_POLL_INTERVAL'], app.config['JOB_STREAM_TIMEOUT']):
+                event_type = 'done' if last['state'] in FINISHED_STATES else 'status'
+                yield encode_stream_event(stream_format, event_type, last)
+            if last['state'] not in FINISHED_STATES:
+                # Its worker may have died: hand the client back to polling
+                yield encode_stream_event(stream_format, 'timeout', {
+                    'id': job_id,
+                    'state': last['state'],
+                    'details': f"Still {last['state']} after {app.config['JOB_STREAM_TIMEOUT']}s; poll the job instead"
+                })
+
+        return stream_response(stream_format, generate())
+
+    from services.stock_list_service import DEFAULT_SEARCH_LIMIT, get_stock_list, search_stocks
 
 
 
+    @app.route('/api/cache/warmer')
+    def cache_warmer_status():
+        """Progress and outcome of the cache warm-up and scheduled refreshes"""
+        warmer = app.extensions.get('cache_warmer')
+        if warmer is None:
+            return jsonify({'state': 'disabled'})
+        return jsonify(warmer.status())
+
     @app.route('/api/stocks')
     def get_stocks():
         """Get list of available stocks"""
@@ -206,7 +778,13 @@ def create_app(config_name=None):
             query = request.args.get('q', '')
             if not query:
                 return jsonify([])
-            results = search_stocks(query)
+            limit = request.args.get('limit', DEFAULT_SEARCH_LIMIT, type=int)
+            if limit <= 0:
+                return jsonify({
+                    'error': 'Invalid limit',
+                    'details': 'limit must be a positive integer'
+                }), 400
+            results = search_stocks(query, limit)
             return jsonify(results)
         except Exception as e:
             logger.error(f"Error searching stocks: {str(e)}")
@@ -232,6 +810,161 @@ def create_app(config_name=None):
 
     return app
 
+def freeze_response(response):
+    """Body, status and headers of a response, so waiting requests can rebuild it"""
+    return response.get_data(), response.status_code, list(response.headers.items())
+
+def streaming_format():
+    """Streaming mode requested via ?stream=ndjson|sse or the Accept header, else None"""
+    requested = request.args.get('stream')
+    if requested in STREAM_FORMATS:
+        return requested
+    accept = request.headers.get('Accept', '')
+    if 'application/x-ndjson' in accept:
+        return 'ndjson'
+    if 'text/event-stream' in accept:
+        return 'sse'
+    return None
+
+def encode_stream_event(stream_format, event_type, payload):
+    """One SSE event or NDJSON line"""
+    body = json.dumps(payload)
+    if stream_format == 'sse':
+        return f"event: {event_type}\ndata: {body}\n\n"
+    return json.dumps({'type': event_type, 'data': payload}) + '\n'
+
+def stream_response(stream_format, events):
+    """Unbuffered streaming response for encoded ``events``"""
+    mimetype = 'text/event-stream' if stream_format == 'sse' else 'application/x-ndjson'
+    response = Response(stream_with_context(events), mimetype=mimetype)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+def wants_columnar():
+    """Columnar results requested via ?format=columnar or the Accept header"""
+    if request.args.get('format') == 'columnar':
+        return True
+    return COLUMNAR_MIMETYPE in request.headers.get('Accept', '')
+
+def parse_calculation_params(data):
+    """Validate and convert /calculate request fields, raising KeyError/ValueError"""
+    stocks = data['stocks']
+    if not isinstance(stocks, list):
+        raise ValueError('stocks must be a list of symbols')
+    return {
+        'initial': float(data['initialInvestment']),
+        'start_year': int(data['startYear']),
+        'end_year': int(data['endYear']),
+        'stocks': stocks,
+        'addition_amount': float(data['additionAmount']),
+        'addition_frequency': data['additionFrequency'],
+        'adjust_for_inflation': data['adjustForInflation'],
+        'inflation_country': parse_inflation_country(data),
+        'max_points': parse_max_points(data),
+        'resolution': parse_resolution(data),
+        'portfolio': parse_portfolio(data, stocks)
+    }
+
+def parse_weights(weights):
+    """Optional ``{symbol: weight}`` object as floats; empty when not given"""
+    if weights is None:
+        return {}
+    if not isinstance(weights, dict):
+        raise ValueError('weights must be an object of symbol: weight')
+    try:
+        return {symbol: float(weight) for symbol, weight in weights.items()}
+    except TypeError:
+        raise ValueError('weights must be numbers')
+
+def parse_portfolio(data, stocks):
+    """
+    Optional ``{"weights": {symbol: weight}, "rebalance": schedule, "threshold": drift}``;
+    weights default to equal and the schedule to no rebalancing.
+    """
+    portfolio = data.get('portfolio')
+    if portfolio is None:
+        return None
+    if not isinstance(portfolio, dict):
+        raise ValueError('portfolio must be an object')
+    weights = parse_weights(portfolio.get('weights'))
+    unknown = [symbol for symbol in weights if symbol not in stocks]
+    if unknown:
+        raise ValueError(f"Portfolio weights given for symbols not in stocks: {unknown}")
+    if any(weight < 0 for weight in weights.values()):
+        raise ValueError('Portfolio weights must not be negative')
+    rebalance = portfolio.get('rebalance', REBALANCE_NONE)
+    if rebalance not in REBALANCE_SCHEDULES:
+        raise ValueError(f"rebalance must be one of {', '.join(REBALANCE_SCHEDULES)}")
+    threshold = float(portfolio.get('threshold', DEFAULT_REBALANCE_THRESHOLD))
+    if not 0 < threshold < 1:
+        raise ValueError('threshold must be between 0 and 1')
+    return {'weights': weights, 'rebalance': rebalance, 'threshold': threshold}
+
+def parse_resolution(data):
+    """Simulation resolution: month-end steps (default) or daily share purchases"""
+    resolution = data.get('resolution', MONTHLY_RESOLUTION)
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"resolution must be one of {', '.join(RESOLUTIONS)}")
+    return resolution
+
+def parse_max_points(data):
+    """Optional per-trace point limit for the graph (full resolution when absent)"""
+    max_points = data.get('maxPoints')
+    if max_points is None:
+        return None
+    max_points = int(max_points)
+    if max_points < 3:
+        raise ValueError('maxPoints must be at least 3')
+    return max_points
+
+def parse_inflation_country(data):
+    """Country whose inflation series adjusts the results (US by default)"""
+    country = data.get('inflationCountry', DEFAULT_COUNTRY)
+    if country not in services.get_available_countries():
+        raise ValueError(f"No inflation data for country {country}")
+    return country
+
+def inflation_tables_for(scenarios):
+    """Inflation tables for every country used by an inflation-adjusted scenario"""
+    countries = {s['inflation_country'] for s in scenarios if s['adjust_for_inflation']}
+    return {country: services.get_inflation_table(country) for country in countries}
+
+def parse_sweep_axis(value, cast):
+    """
+    Expand one sweep axis: either a list of values or a
+    ``{"start": a, "stop": b, "step": c}`` inclusive range. Check
+    ``sweep_axis_length`` against the limits first; ranges are not bounded here.
+    """
+    if isinstance(value, dict):
+        start, _, step = sweep_range(value, cast)
+        return [start + i * step for i in range(sweep_axis_length(value, cast))]
+    if not isinstance(value, list) or not value:
+        raise ValueError('sweep axes must be a non-empty list or a start/stop/step range')
+    return [cast(v) for v in value]
+
+def sweep_axis_length(value, cast):
+    """Number of values ``parse_sweep_axis`` expands ``value`` to, without expanding it"""
+    if isinstance(value, dict):
+        start, stop, step = sweep_range(value, cast)
+        span = (stop - start) / step
+        if not math.isfinite(span):
+            raise ValueError('sweep range has too many values')
+        return max(0, math.floor(span) + 1)
+    if not isinstance(value, list) or not value:
+        raise ValueError('sweep axes must be a non-empty list or a start/stop/step range')
+    return len(value)
+
+def sweep_range(value, cast):
+    """Validated ``(start, stop, step)`` of a range axis"""
+    start, stop = cast(value['start']), cast(value['stop'])
+    step = cast(value.get('step', 1))
+    if not all(math.isfinite(bound) for bound in (start, stop, step)):
+        raise ValueError('sweep ranges must be finite')
+    if step <= 0:
+        raise ValueError('step must be positive')
+    return start, stop, step
+
 if __name__ == '__main__':
     app = create_app('development')
     app.run(debug=app.config['DEBUG'])
\ No newline at end of file
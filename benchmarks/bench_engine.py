@@ -0,0 +1,77 @@
+# benchmarks/bench_engine.py
+import numpy as np
+import pytest
+from conftest import END_YEAR, SYMBOL_COUNTS, YEAR_SPANS, daily_prices
+from services import projection_service
+from services.calculation_service import CalculationService
+from services.data_service import generate_data_points
+from services.projection_service import PATH_CHUNK_SIZE
+from services.resample_service import month_end_frame
+from services.visualization_service import VisualizationService
+
+sizes = pytest.mark.parametrize('years', YEAR_SPANS)
+counts = pytest.mark.parametrize('count', SYMBOL_COUNTS)
+
+
+@pytest.fixture(scope='module')
+def prices():
+    cases = {}
+
+    def build(count, years):
+        if (count, years) not in cases:
+            cases[count, years] = daily_prices(count, years)
+        return cases[count, years]
+    return build
+
+
+@counts
+@sizes
+def bench_generate_data_points(benchmark, prices, count, years):
+    frames = {symbol: month_end_frame(series) for symbol, series in prices(count, years).items()}
+    result = benchmark(generate_data_points, 10000, END_YEAR - years, END_YEAR, frames, 500, 'monthly', False)
+    assert len(result) == count
+
+
+@counts
+@sizes
+def bench_generate_data_points_from_daily(benchmark, prices, count, years):
+    result = benchmark(generate_data_points, 10000, END_YEAR - years, END_YEAR, prices(count, years), 500, 'monthly', False)
+    assert len(result) == count
+
+
+# The legacy month-by-month engine is far slower; keep its grid small
+@pytest.mark.parametrize('count', (1, 10))
+@pytest.mark.parametrize('years', (10,))
+def bench_calculation_service(benchmark, prices, count, years):
+    service = CalculationService()
+    result = benchmark(service.calculate_investment_growth, 10000, END_YEAR - years, END_YEAR, prices(count, years),
+                       500, 'monthly', False)
+    assert len(result) > 0
+
+
+@counts
+@sizes
+@pytest.mark.parametrize('max_points', (None, 200))
+def bench_generate_graph(benchmark, prices, count, years, max_points):
+    results = generate_data_points(10000, END_YEAR - years, END_YEAR, prices(count, years), 500, 'monthly', False)
+    figure = benchmark(VisualizationService.generate_graph, results, max_points)
+    assert figure.count('"Invested Amount"') == 1
+
+
+# In-process against pooled projections on either side of PARALLEL_THRESHOLD. The pool
+# is started before measuring, as it is after a web process's first large projection.
+@pytest.mark.parametrize('paths', (5000, 10000, 40000, 100000))
+@pytest.mark.parametrize('mode', ('in-process', 'pool'))
+def bench_project_growth(benchmark, monkeypatch, paths, mode):
+    returns = np.random.default_rng(0).normal(0.007, 0.045, 360)
+    workers = projection_service.usable_cpus()
+    if mode == 'pool':
+        if workers < 2:
+            pytest.skip('the pool is only used with more than one usable CPU')
+        monkeypatch.setattr(projection_service, 'PARALLEL_THRESHOLD', 0)
+        projection_service.project_growth(returns, 10000, 1, paths=PATH_CHUNK_SIZE * 2, max_workers=workers)
+    else:
+        workers = 1
+    result = benchmark(projection_service.project_growth, returns, 10000, 30, 500, 'monthly',
+                       paths=paths, seed=1, max_workers=workers)
+    assert result['paths'] == paths
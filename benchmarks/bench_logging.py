@@ -0,0 +1,75 @@
+# benchmarks/bench_logging.py
+import logging
+import pytest
+from conftest import END_YEAR, symbols_for
+from services.logging_service import configure_logging, log_event
+
+logger = logging.getLogger('services.bench')
+
+SYMBOLS = symbols_for(50)
+REQUEST = {
+    'initialInvestment': 10000,
+    'startYear': END_YEAR - 30,
+    'endYear': END_YEAR,
+    'stocks': SYMBOLS,
+    'additionAmount': 500,
+    'additionFrequency': 'monthly',
+    'adjustForInflation': True
+}
+DATA_ISSUES = {
+    symbol: {'status': 'partial_data', 'total_points': 7560, 'valid_points': 7500, 'null_points': 60,
+             'null_percentage': 0.79, 'first_valid_date': '1994-01-03', 'last_valid_date': '2023-12-29'}
+    for symbol in SYMBOLS
+}
+
+
+def eager_request_logging():
+    """The messages one /calculate request logged before: full bodies, formatted up front"""
+    logger.info(f"Received calculation request: {REQUEST}")
+    logger.info(f"want to fetch stock data for symbols: {SYMBOLS}")
+    logger.info(f"Fetching batch stock data for symbols: {SYMBOLS}")
+    logger.info(f"Price cache hits: {len(SYMBOLS)}, misses: 0")
+    logger.info(f"Successfully fetched data for {len(SYMBOLS)} stocks")
+    logger.info(f"Data issues found: {DATA_ISSUES}")
+    logger.info(f"Invalid symbols: {[]}")
+    logger.info(f"Fetched {len(SYMBOLS)} valid stocks out of {len(SYMBOLS)} requested")
+    logger.info(f"invalid or (len = {len(DATA_ISSUES)}) invalid :  {[]}")
+    logger.info('Generating data points...')
+    logger.info(f"Starting investment growth calculation: initial=${10000}, years={END_YEAR - 30}-{END_YEAR - 1}")
+    logger.info("Investment growth calculation completed")
+    logger.info("Calculation completed successfully")
+
+
+def structured_request_logging():
+    """The same request with the hot-path events that replaced them"""
+    log_event(logger, 'calculate.request', symbols=len(SYMBOLS), years=f"{END_YEAR - 30}-{END_YEAR}")
+    logger.debug('Calculation request body: %s', REQUEST)
+    logger.debug('Fetching stock data for symbols: %s', SYMBOLS)
+    log_event(logger, 'prices.fetch', symbols=len(SYMBOLS), years=f"{END_YEAR - 30}-{END_YEAR}", hits=len(SYMBOLS), misses=0)
+    log_event(logger, 'prices.fetched', valid=len(SYMBOLS), invalid=0, issues=len(DATA_ISSUES))
+    logger.debug('Data issues found: %s', DATA_ISSUES)
+    log_event(logger, 'calculate.fetched', valid=len(SYMBOLS), requested=len(SYMBOLS))
+    logger.debug('Data issues for %d symbols, invalid: %s', len(DATA_ISSUES), [])
+    logger.debug('Generating data points...')
+    log_event(logger, 'growth.start', initial=10000, years=f"{END_YEAR - 30}-{END_YEAR - 1}", symbols=len(SYMBOLS))
+    log_event(logger, 'growth.done', symbols=len(SYMBOLS), months=360)
+    log_event(logger, 'calculate.done', symbols=len(SYMBOLS), columnar=False)
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    yield tmp_path / 'app.log'
+    configure_logging(logging.WARNING, use_queue=False, handlers=[logging.NullHandler()])
+
+
+@pytest.mark.parametrize('mode', ['before', 'after', 'after-sampled'])
+def bench_request_logging(benchmark, log_file, mode):
+    """Per-request logging cost on the request thread, writing INFO to a file"""
+    handler = logging.FileHandler(log_file)
+    if mode == 'before':
+        configure_logging(logging.INFO, use_queue=False, handlers=[handler])
+        benchmark(eager_request_logging)
+    else:
+        configure_logging(logging.INFO, use_queue=True, sample_rate=0.1 if mode == 'after-sampled' else 1.0,
+                          handlers=[handler])
+        benchmark(structured_request_logging)
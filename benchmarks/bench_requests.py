@@ -0,0 +1,58 @@
+# benchmarks/bench_requests.py
+import pytest
+from conftest import END_YEAR, SYMBOL_COUNTS, YEAR_SPANS, download_frame, symbols_for
+from services import stock_service
+from services.cache_service import cache
+from services.stock_service import fetch_stock_data_batch
+
+
+def clear_cache():
+    """Start every round cold, as the first request for a scenario would"""
+    cache.clear()
+
+
+@pytest.fixture
+def mocked_download(monkeypatch):
+    """Serve a prebuilt ``yf.download`` frame so only parsing and caching are measured"""
+    frames = {}
+
+    def use(count, years):
+        frames['frame'] = download_frame(count, years)
+    monkeypatch.setattr(stock_service, '_download', lambda symbols, start, end, provider=None: frames['frame'])
+    return use
+
+
+@pytest.mark.parametrize('count', SYMBOL_COUNTS)
+@pytest.mark.parametrize('years', YEAR_SPANS)
+def bench_fetch_parsing(benchmark, app, mocked_download, count, years):
+    mocked_download(count, years)
+    app.config['FETCH_CHUNK_SIZE'] = count
+    symbols = symbols_for(count)
+
+    result, invalid, _ = benchmark.pedantic(
+        fetch_stock_data_batch, args=(symbols, END_YEAR - years, END_YEAR),
+        setup=clear_cache, rounds=20, warmup_rounds=1
+    )
+    assert len(result) == count and not invalid
+
+
+@pytest.mark.parametrize('count', SYMBOL_COUNTS)
+@pytest.mark.parametrize('years', YEAR_SPANS)
+def bench_calculate_round_trip(benchmark, app, mocked_download, count, years):
+    """POST /calculate through the test client with cold caches: fetch, engine and figure"""
+    mocked_download(count, years)
+    app.config['FETCH_CHUNK_SIZE'] = count
+    client = app.test_client()
+    payload = {
+        'initialInvestment': 10000,
+        'startYear': END_YEAR - years,
+        'endYear': END_YEAR,
+        'stocks': symbols_for(count),
+        'additionAmount': 500,
+        'additionFrequency': 'monthly',
+        'adjustForInflation': False
+    }
+
+    response = benchmark.pedantic(client.post, args=('/calculate',), kwargs={'json': payload},
+                                  setup=clear_cache, rounds=10, warmup_rounds=1)
+    assert response.status_code == 200
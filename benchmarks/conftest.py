@@ -0,0 +1,51 @@
+# benchmarks/conftest.py
+import logging
+import os
+import sys
+from pathlib import Path
+import pytest
+import pandas as pd
+
+# Get the project root directory
+project_root = str(Path(__file__).parent.parent)
+
+# Add the project root to Python path
+sys.path.insert(0, project_root)
+
+# config.Config refuses to load without a secret key
+os.environ.setdefault('SECRET_KEY', 'benchmark-secret-key')
+
+from services.price_providers import FakePriceProvider, synthetic_prices  # noqa: E402
+
+# Sizes every hot path is measured at: (symbol count, years of history)
+SYMBOL_COUNTS = (1, 10, 50)
+YEAR_SPANS = (10, 30)
+END_YEAR = 2024
+
+
+def symbols_for(count):
+    return [f"SYM{i:03d}" for i in range(count)]
+
+
+def daily_prices(count, years):
+    """Synthetic daily closes for ``count`` symbols over the last ``years`` years"""
+    dates = pd.bdate_range(f"{END_YEAR - years}-01-01", f"{END_YEAR - 1}-12-31")
+    return {symbol: pd.Series(synthetic_prices(symbol, dates), index=dates) for symbol in symbols_for(count)}
+
+
+def download_frame(count, years):
+    """A ``yf.download``-shaped frame for ``count`` symbols, as the fake provider builds it"""
+    return FakePriceProvider().download(symbols_for(count), f"{END_YEAR - years}-01-01", f"{END_YEAR}-01-01")
+
+
+@pytest.fixture
+def app():
+    from app import create_app
+    from services.cache_service import cache
+    app = create_app('development')
+    app.config['PRICE_STORE_ENABLED'] = False
+    # Request logging would dominate the small cases
+    logging.getLogger().setLevel(logging.WARNING)
+    with app.app_context():
+        cache.clear()
+        yield app
@@ -0,0 +1,9 @@
+"""
+Celery worker entry point for ``JOB_BACKEND=celery``:
+
+    JOB_BACKEND=celery CACHE_TYPE=redis celery -A celery_worker:celery worker
+"""
+from app import create_app
+
+flask_app = create_app()
+celery = flask_app.extensions['job_backend'].celery
@@ -9,20 +9,82 @@ class Config:
     
     # Flask-Caching settings
     CACHE_TYPE = os.environ.get('CACHE_TYPE', 'simple')
+    # Entry limit of the simple/filesystem caches (raised to fit the cache warmer when enabled)
+    CACHE_THRESHOLD = int(os.environ.get('CACHE_THRESHOLD', 500))
     
     # Debug mode
     DEBUG = False
     
     # Logging
     LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    # Write logs from a listener thread, and keep this share of hot-path INFO events
+    LOG_QUEUE_ENABLED = os.environ.get('LOG_QUEUE_ENABLED', 'true').lower() == 'true'
+    LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', 1.0))
     
     # CORS settings
     CORS_ORIGINS = ['http://localhost:5000', 'http://127.0.0.1:5000']
 
-    CELERY_BROKER_URL = 'redis://localhost:6379/1'
-    CELERY_RESULT_BACKEND = 'redis://localhost:6379/2'
+    CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/1')
+    CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', 'redis://localhost:6379/2')
     CACHE_REDIS_URL = 'redis://localhost:6379/0'
 
+    # Background jobs (/jobs): 'thread' runs them in the web process, 'celery'
+    # on Celery workers (job records are kept in the cache, so use CACHE_TYPE=redis)
+    JOB_BACKEND = os.environ.get('JOB_BACKEND', 'thread')
+    JOB_MAX_WORKERS = int(os.environ.get('JOB_MAX_WORKERS', 2))
+    JOB_RESULT_TIMEOUT = int(os.environ.get('JOB_RESULT_TIMEOUT', 3600))
+    JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', 0.25))
+    # Submissions are refused (503) while this many jobs have not finished;
+    # streamed job status gives up after JOB_STREAM_TIMEOUT seconds
+    JOB_MAX_PENDING = int(os.environ.get('JOB_MAX_PENDING', 20))
+    JOB_STREAM_TIMEOUT = float(os.environ.get('JOB_STREAM_TIMEOUT', 300))
+
+    # Local on-disk price store (defaults to <instance>/price_store)
+    PRICE_STORE_ENABLED = os.environ.get('PRICE_STORE_ENABLED', 'true').lower() == 'true'
+    PRICE_STORE_DIR = os.environ.get('PRICE_STORE_DIR')
+
+    # Upstream price source ('yfinance', or 'fake' for local benchmarking) and
+    # how large symbol lists are split into concurrent downloads
+    PRICE_PROVIDER = os.environ.get('PRICE_PROVIDER', 'yfinance')
+    FAKE_PROVIDER_LATENCY = float(os.environ.get('FAKE_PROVIDER_LATENCY', 0))
+    FETCH_CHUNK_SIZE = int(os.environ.get('FETCH_CHUNK_SIZE', 25))
+    FETCH_MAX_WORKERS = int(os.environ.get('FETCH_MAX_WORKERS', 4))
+    FETCH_TIMEOUT = float(os.environ.get('FETCH_TIMEOUT', 30))
+
+    # dtype of cached price arrays; 'float32' halves cache memory
+    PRICE_DTYPE = os.environ.get('PRICE_DTYPE', 'float64')
+
+    # Compression of cached price buffers: 'none', 'zlib', 'lz4' or 'zstd'
+    # (lz4/zstd need the lz4/zstandard packages)
+    PRICE_CACHE_COMPRESSION = os.environ.get('PRICE_CACHE_COMPRESSION', 'none')
+
+    # Upper bound on scenarios accepted by /calculate/batch
+    MAX_BATCH_SCENARIOS = int(os.environ.get('MAX_BATCH_SCENARIOS', 200))
+
+    # Parameter sweeps (/calculate/sweep); workers default to the CPU count
+    MAX_SWEEP_COMBINATIONS = int(os.environ.get('MAX_SWEEP_COMBINATIONS', 50000))
+    SWEEP_MAX_WORKERS = int(os.environ.get('SWEEP_MAX_WORKERS', 0)) or None
+
+    # Prefetch prices for the whole stock list at startup, then refresh them
+    # every CACHE_WARM_INTERVAL seconds (below the 1-hour price cache lifetime)
+    # for each of the last N years in CACHE_WARM_LOOKBACK_YEARS
+    CACHE_WARM_ENABLED = os.environ.get('CACHE_WARM_ENABLED', 'false').lower() == 'true'
+    CACHE_WARM_LOOKBACK_YEARS = tuple(int(years) for years in os.environ.get('CACHE_WARM_LOOKBACK_YEARS', '5').split(','))
+    CACHE_WARM_INTERVAL = int(os.environ.get('CACHE_WARM_INTERVAL', 900))
+    CACHE_WARM_MAX_WORKERS = int(os.environ.get('CACHE_WARM_MAX_WORKERS', 2))
+
+    # Import every service module and load reference data in create_app, for
+    # gunicorn --preload (workers then share it copy-on-write); lazy otherwise
+    PRELOAD_SERVICES = os.environ.get('PRELOAD_SERVICES', 'false').lower() == 'true'
+
+    # Per-stage timings in a Server-Timing header and Prometheus metrics at /metrics
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+
+    # Monte Carlo projections (/calculate/projection)
+    MAX_PROJECTION_PATHS = int(os.environ.get('MAX_PROJECTION_PATHS', 100000))
+    MAX_PROJECTION_YEARS = int(os.environ.get('MAX_PROJECTION_YEARS', 60))
+    PROJECTION_MAX_WORKERS = int(os.environ.get('PROJECTION_MAX_WORKERS', 0)) or None
+
 class DevelopmentConfig(Config):
     DEBUG = True
     LOG_LEVEL = 'DEBUG'
@@ -0,0 +1,14 @@
+"""
+gunicorn settings, read automatically from the working directory:
+
+    gunicorn -w 4 wsgi:app
+    PRELOAD_SERVICES=true gunicorn --preload -w 4 wsgi:app
+"""
+
+
+def post_fork(server, worker):
+    """Start per-worker background threads; a preloaded master must not own them"""
+    from wsgi import app
+    warmer = app.extensions.get('cache_warmer')
+    if warmer is not None:
+        warmer.start()
@@ -1,16 +1,109 @@
 # services/__init__.py
-from .cache_service import cache
-from .stock_service import fetch_stock_data_batch
-from .data_service import generate_data_points
-from .calculation_service import CalculationService
-from .visualization_service import VisualizationService
-from.inflation_service import get_inflation_data
-
-__all__ = [
-    'cache',
-    'fetch_stock_data_batch',
-    'generate_data_points',
-    'CalculationService',
-    'VisualizationService',
-    'get_inflation_data'
-]
\ No newline at end of file
+"""
+Service layer. Names are resolved lazily (PEP 562): the submodule behind an
+export, and numpy/pandas/plotly with it, is imported on first use, so
+importing the package and building the app stays cheap. ``preload`` imports
+everything up front instead, for servers that fork workers from a warm parent.
+"""
+import gc
+import importlib
+import logging
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+# Exported name -> submodule that defines it
+_EXPORTS = {
+    'cache': 'cache_service',
+    'fetch_stock_data_batch': 'stock_service',
+    'fetch_month_end_batch': 'stock_service',
+    'generate_data_points': 'data_service',
+    'generate_daily_data_points': 'daily_service',
+    'simulate_portfolio': 'portfolio_service',
+    'evaluate_scenarios': 'scenario_service',
+    'build_grid': 'sweep_service',
+    'run_sweep': 'sweep_service',
+    'historical_monthly_returns': 'projection_service',
+    'project_growth': 'projection_service',
+    'rolling_windows': 'rolling_service',
+    'CalculationService': 'calculation_service',
+    'VisualizationService': 'visualization_service',
+    'get_inflation_data': 'inflation_service',
+    'get_inflation_table': 'inflation_service',
+    'get_available_countries': 'inflation_service'
+}
+
+# Modules a request can reach, in dependency order; what ``preload`` imports
+PRELOAD_MODULES = (
+    'inflation_service',
+    'stock_list_service',
+    'stock_service',
+    'data_service',
+    'daily_service',
+    'portfolio_service',
+    'scenario_service',
+    'sweep_service',
+    'projection_service',
+    'rolling_service',
+    'visualization_service'
+)
+
+# Submodule -> seconds its first import took (including what it pulled in)
+_import_seconds = {}
+
+__all__ = [*_EXPORTS, 'import_timings', 'preload']
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(_load(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *_EXPORTS})
+
+
+def _load(module_name):
+    """Import ``services.<module_name>``, timing it the first time"""
+    qualified = f"{__name__}.{module_name}"
+    module = sys.modules.get(qualified)
+    if module is None:
+        started = time.perf_counter()
+        module = importlib.import_module(qualified)
+        _import_seconds.setdefault(module_name, time.perf_counter() - started)
+    return module
+
+
+def import_timings():
+    """Seconds each lazily loaded submodule took to import, slowest first"""
+    return dict(sorted(_import_seconds.items(), key=lambda item: item[1], reverse=True))
+
+
+def preload():
+    """
+    Import every service module and load the data the first requests need (the
+    inflation tables, the stock search index and Plotly's default template),
+    then move it all to the permanent GC generation.
+
+    Run in a gunicorn ``--preload`` parent, workers inherit it already loaded,
+    and because the collector never walks the frozen objects their pages stay
+    shared copy-on-write instead of being touched in every worker.
+    Returns ``import_timings()``.
+    """
+    for module_name in PRELOAD_MODULES:
+        _load(module_name)
+    sys.modules[f"{__name__}.inflation_service"].get_available_countries()
+    sys.modules[f"{__name__}.stock_list_service"].get_stock_index()
+    sys.modules[f"{__name__}.visualization_service"].default_template()
+
+    gc.collect()
+    gc.freeze()
+    timings = import_timings()
+    logger.info('Preloaded services in %.3fs: %s', sum(timings.values()),
+                ', '.join(f"{name}={seconds * 1000:.0f}ms" for name, seconds in timings.items()))
+    return timings
@@ -0,0 +1,137 @@
+# services/daily_service.py
+import logging
+import numpy as np
+import pandas as pd
+from .data_service import MONTHLY_FREQUENCY, ANNUALLY_FREQUENCY, _to_columnar_records, _to_monthly_records
+from .inflation_service import DEFAULT_COUNTRY, get_inflation_table
+
+logger = logging.getLogger(__name__)
+
+
+def generate_daily_data_points(initial, start_year, end_year, stocks, addition_amount, addition_frequency,
+                               adjust_for_inflation, inflation_country=DEFAULT_COUNTRY, columnar=False):
+    """
+    Daily-resolution counterpart of ``generate_data_points``.
+
+    ``stocks`` maps symbols to daily close series. The initial amount buys shares
+    on each symbol's first trading day in the window and every contribution
+    buys on the symbol's first trading day of its period (each month after the
+    first for monthly, each January after the first year for annually). Results
+    are reported at each month's last trading day in the same shape as
+    ``generate_data_points``.
+    """
+    logger.info(f"Starting daily investment simulation: initial=${initial}, years={start_year}-{end_year-1}")
+    inflation_table = get_inflation_table(inflation_country) if adjust_for_inflation else None
+
+    days, symbols, prices = _daily_price_matrix(stocks, start_year, end_year)
+    if not symbols:
+        logger.info("Daily investment simulation completed")
+        return []
+
+    month_ends, arrays = compute_daily_growth_arrays(
+        days, prices, start_year, float(initial), float(addition_amount), addition_frequency, inflation_table
+    )
+
+    to_records = _to_columnar_records if columnar else _to_monthly_records
+    data = to_records(month_ends, symbols, arrays)
+    logger.info("Daily investment simulation completed")
+    return data
+
+
+def compute_daily_growth_arrays(days, prices, start_year, initial, addition_amount, addition_frequency,
+                                inflation_table=None):
+    """
+    Share-count simulation over a (symbols x days) price matrix, NaN where a
+    symbol did not trade.
+
+    Month boundaries are found with ``searchsorted`` on each day's month, and one
+    ``reduceat`` pass each yields every symbol's first and last trading day per
+    month. Purchases happen at the first, valuations at the last; share counts
+    and invested amounts are then cumulative sums over months. Returns
+    ``(month_ends, arrays)`` with arrays shaped like ``compute_growth_arrays``
+    output plus ``shares``.
+    """
+    day_count = len(days)
+    positions = np.arange(day_count)
+    traded = ~np.isnan(prices)
+    month_id = (days.year.to_numpy() - start_year) * 12 + days.month.to_numpy() - 1
+    months = np.unique(month_id)
+    month_start = np.searchsorted(month_id, months)
+
+    # (symbols x months) first and last trading day inside each month
+    first_day = np.minimum.reduceat(np.where(traded, positions, day_count), month_start, axis=1)
+    last_day = np.maximum.reduceat(np.where(traded, positions, -1), month_start, axis=1)
+    traded_month = last_day >= 0
+    rows = np.arange(prices.shape[0])[:, None]
+    buy_price = prices[rows, np.minimum(first_day, day_count - 1)]
+    close = prices[rows, np.maximum(last_day, 0)]
+
+    # Initial amount in each symbol's first traded month, contributions on the schedule
+    first_month = np.argmax(traded_month, axis=1)
+    contribution = np.where(traded_month & _contribution_mask(months, addition_frequency), addition_amount, 0.0)
+    contribution[np.arange(len(first_month)), first_month] += initial
+
+    # Deflator through the end of each month. Money put in during month k is
+    # deflated from the end of month k - 1, so each purchase (its cost and its
+    # shares) is scaled by 1 / deflator_before and everything by the month's deflator
+    deflator = _monthly_deflators(months, start_year, inflation_table)
+    deflator_before = np.concatenate([[1.0], deflator[:-1]])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bought = np.where(contribution > 0, contribution / buy_price, 0.0)
+    shares = np.cumsum(bought, axis=1)
+    invested = np.cumsum(contribution / deflator_before, axis=1) * deflator
+    total = np.cumsum(bought / deflator_before, axis=1) * close * deflator
+    gains = total - invested
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return_percentage = np.where(invested != 0, gains / invested * 100, 0.0)
+
+    valid = traded_month & (shares > 0) & np.isfinite(total)
+    month_ends = days[month_start].to_period('M').to_timestamp('M')
+    return month_ends, {
+        'invested': invested,
+        'total': total,
+        'gains': gains,
+        'return_percentage': return_percentage,
+        'shares': shares,
+        'valid': valid
+    }
+
+
+def _contribution_mask(months, addition_frequency):
+    """Months (counted from January of the start year) that receive a contribution"""
+    if addition_frequency == MONTHLY_FREQUENCY:
+        return months > 0
+    if addition_frequency == ANNUALLY_FREQUENCY:
+        return (months % 12 == 0) & (months > 0)
+    return np.zeros(len(months), dtype=bool)
+
+
+def _monthly_deflators(months, start_year, inflation_table):
+    """Cumulative year-end inflation factor through the end of each month"""
+    if inflation_table is None:
+        return np.ones(len(months))
+    years = start_year + months // 12
+    december = months % 12 == 11
+    steps = np.where(december & inflation_table.has_rate(years), 1 - inflation_table.rate(years), 1.0)
+    return np.cumprod(steps)
+
+
+def _daily_price_matrix(stocks, start_year, end_year):
+    """Stack daily closes inside [start_year, end_year) on the union of trading days"""
+    closes = {}
+    start, end = pd.Timestamp(year=start_year, month=1, day=1), pd.Timestamp(year=end_year, month=1, day=1)
+    for symbol, series in stocks.items():
+        # NaN closes stay in: the engine treats them as days the symbol did not trade
+        window = series.iloc[series.index.searchsorted(start):series.index.searchsorted(end)]
+        if window.count() > 0:
+            closes[symbol] = window
+    if not closes:
+        return pd.DatetimeIndex([]), [], np.empty((0, 0))
+
+    windows = list(closes.values())
+    if all(window.index.equals(windows[0].index) for window in windows[1:]):
+        # Common case: every symbol traded on the same days, no alignment needed
+        return windows[0].index, list(closes), np.vstack([window.to_numpy(dtype=np.float64) for window in windows])
+    frame = pd.concat(closes, axis=1).sort_index()
+    return frame.index, list(frame.columns), frame.to_numpy(dtype=np.float64).T
@@ -1,127 +1,218 @@
+import numpy as np
 import pandas as pd
 from typing import Dict, List
 import logging
-from .inflation_service import get_inflation_data
+from .inflation_service import DEFAULT_COUNTRY, get_inflation_table
+from .logging_service import log_event
+from .resample_service import month_end_frame
 
 logger = logging.getLogger(__name__)
 
 MONTHLY_FREQUENCY = 'monthly'
 ANNUALLY_FREQUENCY = 'annually'
 
-import pandas as pd
-import logging
+def generate_data_points(initial, start_year, end_year, stocks, addition_amount, addition_frequency, adjust_for_inflation,
+                         inflation_country=DEFAULT_COUNTRY, columnar=False):
+    """
+    Generate investment data points, removing any NaN values and ensuring clean data.
+
+    All symbols are evaluated together by ``compute_growth_arrays`` on a
+    (symbols x months) price matrix; the per-month dicts are only built at the end.
+    With ``columnar`` each symbol gets one array per field under ``columns``
+    instead of a ``monthly_data`` list of dicts.
+    """
+    log_event(logger, 'growth.start', initial=initial, years=f"{start_year}-{end_year - 1}", symbols=len(stocks))
+    inflation_table = get_inflation_table(inflation_country) if adjust_for_inflation else None
+
+    month_ends, symbols, close, anchor, start_prices = _build_price_matrix(stocks, start_year, end_year)
+    if not symbols:
+        return []
+
+    contributions = _contribution_schedule(month_ends, start_year, addition_amount, addition_frequency)
+    deflators = _inflation_factors(month_ends, inflation_table)
+    arrays = compute_growth_arrays(
+        close,
+        anchor,
+        start_prices[:, None],
+        float(initial),
+        contributions,
+        deflators,
+        grow_contributions=addition_frequency == MONTHLY_FREQUENCY
+    )
+
+    to_records = _to_columnar_records if columnar else _to_monthly_records
+    data = to_records(month_ends, symbols, arrays)
+    log_event(logger, 'growth.done', symbols=len(symbols), months=len(month_ends))
+    return data
 
-logger = logging.getLogger(__name__)
 
-def generate_data_points(initial, start_year, end_year, stocks, addition_amount, addition_frequency, adjust_for_inflation):
+def compute_growth_arrays(close, anchor, start_prices, initial, contributions, deflators, grow_contributions=True):
     """
-    Generate investment data points, removing any NaN values and ensuring clean data.
+    Vectorized growth engine over month-end prices.
+
+    ``close`` and ``anchor`` are (..., months) arrays of month-end closes and of the
+    close one month earlier (NaN where that day was not a trading day); months where
+    ``close`` is NaN are treated as absent. ``start_prices``, ``initial``,
+    ``contributions``, ``deflators`` and ``grow_contributions`` (monthly additions
+    grow with the price since the anchor day) must broadcast against ``close``.
+    Returns a dict of ``invested``, ``total``, ``gains`` and ``return_percentage``
+    arrays plus the boolean ``valid`` mask of months holding a result.
     """
-    logger.info(f"Starting investment growth calculation: initial=${initial}, years={start_year}-{end_year-1}")
-    data = []
-    inflation_data = get_inflation_data() if adjust_for_inflation else None
-    logger.info(f"inflation_data = {inflation_data}")
+    close = np.asarray(close, dtype=np.float64)
+    anchor = np.asarray(anchor, dtype=np.float64)
+    present = ~np.isnan(close)
+
+    contributions = np.where(present, contributions, 0.0)
+    deflators = np.where(present, deflators, 1.0)
+
+    # invested_t = (invested_t-1 + contribution_t) * deflator_t, solved with prefix products
+    cumulative = np.cumprod(deflators, axis=-1)
+    prior = np.concatenate([np.ones_like(cumulative[..., :1]), cumulative[..., :-1]], axis=-1)
+    invested = cumulative * (initial + np.cumsum(contributions / prior, axis=-1))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = np.where(np.asarray(grow_contributions) & ~np.isnan(anchor), close / anchor, 1.0)
+        total = (initial * (close / start_prices) + contributions * growth) * deflators
+        gains = total - invested
+        return_percentage = np.where(invested != 0, gains / invested * 100, 0.0)
+
+    valid = present & np.isfinite(total) & np.isfinite(invested)
+    return {
+        'invested': invested,
+        'total': total,
+        'gains': gains,
+        'return_percentage': return_percentage,
+        'valid': valid
+    }
+
+
+def _build_price_matrix(stocks, start_year, end_year):
+    """
+    Align every symbol's month-end closes inside [start_year, end_year) on one index.
+
+    ``stocks`` values may be daily close series or frames already produced by
+    ``month_end_frame`` at ingestion time.
+    """
+    closes = {}
+    anchors = {}
+    start_prices = []
     for symbol, stock_data in stocks.items():
-        monthly_data = []
-        current_investment = float(initial)
-        current_value = float(initial)
-        last_year_processed = None
-
-        # Remove any NaN values and resample to monthly
-        stock_data = stock_data.dropna()
-        if len(stock_data) == 0:
+        monthly = as_month_end(stock_data)
+        if len(monthly) == 0:
             continue  # Skip if no valid data after removing NaN
-            
-        monthly_stock_data = stock_data.resample('ME').last().dropna()
-        
-        # Skip if no valid monthly data
-        if len(monthly_stock_data) == 0:
+
+        years = monthly.index.year
+        window = monthly[(years >= start_year) & (years < end_year)]
+        if len(window) == 0:
             continue
-            
-        for date in monthly_stock_data.index:
-            year = int(date.year)
-            month = int(date.month)
-            
-            if year < start_year or year >= end_year:
-                continue
-
-            # Get start price, ensuring it's not NaN
-            start_price = float(stock_data.iloc[0])
-            current_price = float(monthly_stock_data.loc[date])
-            
-            # Skip if either price is invalid
-            if pd.isna(start_price) or pd.isna(current_price):
-                continue
-                
-            cumulative_return = (current_price / start_price) - 1
-            current_value = initial * (1 + cumulative_return)
-            
-            # Handle periodic investments
-            if addition_frequency == 'monthly' and (year > start_year or month > 1):
-                current_investment += addition_amount
-                if month > 1 or year > start_year:
-                    prev_date = date - pd.DateOffset(months=1)
-                    # Only calculate additional return if we have valid previous data
-                    if prev_date in stock_data.index and not pd.isna(stock_data.loc[prev_date]):
-                        addition_start_price = float(stock_data.loc[prev_date])
-                        addition_return = (current_price / addition_start_price) - 1
-                        current_value += addition_amount * (1 + addition_return)
-                    else:
-                        # If no valid previous data, just add the amount without return
-                        current_value += addition_amount
-            
-            elif addition_frequency == 'annually' and month == 1 and year > start_year:
-                current_investment += addition_amount
-                current_value += addition_amount
-
-            # Apply inflation adjustment yearly (in December)
-            if adjust_for_inflation and inflation_data and str(year) in inflation_data:
-                # Only apply inflation adjustment once per year (in December)
-                if month == 12 and year != last_year_processed:
-                    annual_inflation = float(inflation_data[str(year)])
-                    logger.info(
-                        f"Applying yearly inflation adjustment for {year}:\n"
-                        f"  Annual inflation rate: {annual_inflation:.4f} ({annual_inflation*100:.2f}%)\n"
-                        f"  Before adjustment: value=${current_value:.2f}"
-                    )
-                    
-                    # Apply annual inflation adjustment
-                    current_value *= (1 - annual_inflation)
-                    current_investment *= (1 - annual_inflation)
-                    
-                    logger.info(
-                        f"  After adjustment: current_value=${current_value:.2f}\n"
-                        f"  After adjustment: current_investment=${current_investment:.2f}\n"
-                        f"  Value decrease due to inflation: ${(current_value / (1 - annual_inflation) - current_value):.2f}"
-                    )
-                    last_year_processed = year
-            
-            gains = current_value - current_investment
-            
-            # Skip if any calculations resulted in NaN
-            if any(pd.isna(x) for x in [current_value, current_investment, gains]):
-                continue
-                
-            return_percentage = (gains / current_investment) * 100 if current_investment != 0 else 0
-            
-            monthly_data.append({
-                "year": year,
-                "month": month,
-                "date": date.strftime("%Y-%m"),
-                "invested": round(float(current_investment), 2),
-                "total": round(float(current_value), 2),
-                "gains": round(float(gains), 2),
-                "return_percentage": round(float(return_percentage), 2)
-            })
 
+        closes[symbol] = window['close']
+        anchors[symbol] = window['anchor_close']
+        # The series' first close, as fetched from the start of start_year
+        start_prices.append(float(monthly['first_close'].iloc[0]))
+
+    if not closes:
+        return pd.DatetimeIndex([]), [], np.empty((0, 0)), np.empty((0, 0)), np.empty(0)
+
+    close_frame = pd.concat(closes, axis=1).sort_index()
+    anchor_frame = pd.concat(anchors, axis=1).reindex(close_frame.index)
+    symbols = list(close_frame.columns)
+    return (
+        close_frame.index,
+        symbols,
+        close_frame.to_numpy(dtype=np.float64).T,
+        anchor_frame[symbols].to_numpy(dtype=np.float64).T,
+        np.asarray(start_prices, dtype=np.float64)
+    )
+
+
+def as_month_end(stock_data):
+    """Return month-end rows for a daily series, passing precomputed frames through"""
+    if isinstance(stock_data, pd.DataFrame):
+        return stock_data
+    return month_end_frame(stock_data)
+
+
+def _contribution_schedule(month_ends, start_year, addition_amount, addition_frequency):
+    """Amount added at each month end for the given frequency"""
+    years = month_ends.year.to_numpy()
+    months = month_ends.month.to_numpy()
+    if addition_frequency == MONTHLY_FREQUENCY:
+        mask = (years > start_year) | (months > 1)
+    elif addition_frequency == ANNUALLY_FREQUENCY:
+        mask = (months == 1) & (years > start_year)
+    else:
+        mask = np.zeros(len(month_ends), dtype=bool)
+    return np.where(mask, float(addition_amount), 0.0)
+
+
+def _inflation_factors(month_ends, inflation_table):
+    """Multiplicative inflation step applied at each month end (December only)"""
+    if inflation_table is None:
+        return np.ones(len(month_ends))
+    years = month_ends.year.to_numpy()
+    december = month_ends.month.to_numpy() == 12
+    return np.where(december & inflation_table.has_rate(years), 1 - inflation_table.rate(years), 1.0)
+
+
+def _to_monthly_records(month_ends, symbols, arrays):
+    """Build the per-symbol ``monthly_data`` dicts returned by the API"""
+    years = month_ends.year.tolist()
+    months = month_ends.month.tolist()
+    dates = month_ends.strftime("%Y-%m").tolist()
+    rounded = {
+        field: np.round(arrays[field], 2).tolist()
+        for field in ('invested', 'total', 'gains', 'return_percentage')
+    }
+
+    data = []
+    for row, symbol in enumerate(symbols):
+        monthly_data = [
+            {
+                "year": years[i],
+                "month": months[i],
+                "date": dates[i],
+                "invested": rounded['invested'][row][i],
+                "total": rounded['total'][row][i],
+                "gains": rounded['gains'][row][i],
+                "return_percentage": rounded['return_percentage'][row][i]
+            }
+            for i in np.flatnonzero(arrays['valid'][row])
+        ]
         # Only add to results if we have valid monthly data
         if monthly_data:
             data.append({
                 "symbol": symbol,
                 "monthly_data": monthly_data
             })
-    
-    logger.info("Investment growth calculation completed")
+    return data
+
+
+def _to_columnar_records(month_ends, symbols, arrays):
+    """Build per-symbol ``columns``: one array per ``monthly_data`` field"""
+    years = month_ends.year.to_numpy()
+    months = month_ends.month.to_numpy()
+    dates = month_ends.strftime("%Y-%m").to_numpy()
+    rounded = {
+        field: np.round(arrays[field], 2)
+        for field in ('invested', 'total', 'gains', 'return_percentage')
+    }
+
+    data = []
+    for row, symbol in enumerate(symbols):
+        valid = arrays['valid'][row]
+        if not valid.any():
+            continue
+        columns = {
+            "year": years[valid].tolist(),
+            "month": months[valid].tolist(),
+            "date": dates[valid].tolist()
+        }
+        columns.update({field: values[row][valid].tolist() for field, values in rounded.items()})
+        data.append({
+            "symbol": symbol,
+            "columns": columns
+        })
     return data
 
 
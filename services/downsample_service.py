@@ -0,0 +1,46 @@
+# services/downsample_service.py
+import numpy as np
+
+
+def lttb_indices(x, y, max_points):
+    """
+    Largest-Triangle-Three-Buckets point selection.
+
+    ``x`` is a (points,) array shared by every row of ``y`` (series x points).
+    Returns a (series, kept) array of increasing indices into ``x`` with
+    ``kept = min(points, max_points)``; the first and last points are always kept.
+    Each bucket is evaluated for all series at once, so a batch of traces costs
+    one pass over the buckets.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.atleast_2d(np.asarray(y, dtype=np.float64))
+    series, points = y.shape
+    if max_points >= points or points <= 2:
+        return np.broadcast_to(np.arange(points), (series, points)).copy()
+    if max_points < 3:
+        raise ValueError('max_points must be at least 3')
+
+    buckets = max_points - 2
+    # Interior points [1, points - 1) split into equal-width buckets
+    edges = 1 + np.arange(buckets + 1) * (points - 2) // buckets
+    sizes = np.diff(edges)
+
+    # Average of each following bucket; the last bucket looks ahead to the final point
+    mean_x = np.append(np.add.reduceat(x[1:points - 1], edges[:-1] - 1) / sizes, x[-1])
+    mean_y = np.hstack([np.add.reduceat(y[:, 1:points - 1], edges[:-1] - 1, axis=1) / sizes, y[:, -1:]])
+
+    rows = np.arange(series)
+    selected = np.empty((series, max_points), dtype=np.int64)
+    selected[:, 0] = 0
+    selected[:, -1] = points - 1
+    previous = np.zeros(series, dtype=np.int64)
+    for b in range(buckets):
+        start, stop = edges[b], edges[b + 1]
+        a_x = x[previous][:, None]
+        a_y = y[rows, previous][:, None]
+        c_x = mean_x[b + 1]
+        c_y = mean_y[:, b + 1][:, None]
+        area = np.abs((a_x - c_x) * (y[:, start:stop] - a_y) - (a_x - x[start:stop]) * (c_y - a_y))
+        previous = start + np.argmax(area, axis=1)
+        selected[:, b + 1] = previous
+    return selected
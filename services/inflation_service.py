@@ -1,15 +1,131 @@
 # services/inflation_service.py
 import json
+import logging
 import os
-from flask import current_app
+import threading
+import numpy as np
+from flask import current_app, has_app_context
+from .options import DEFAULT_COUNTRY
 
-def get_inflation_data():
-    """Get historical inflation data"""
+logger = logging.getLogger(__name__)
+
+_tables = {}
+_loaded = {'path': None, 'mtime': None}
+_load_lock = threading.Lock()
+
+
+class InflationTable:
+    """
+    Annual inflation rates held in a year-indexed array.
+
+    ``cumulative`` holds the running product of ``(1 - rate)`` through each year,
+    the same year-end step ``generate_data_points`` applies in December, so the
+    real-terms factor between any two years is a ratio of two entries.
+    """
+
+    def __init__(self, rates_by_year):
+        years = sorted(int(year) for year in rates_by_year)
+        self.first_year = years[0] if years else 0
+        self.last_year = years[-1] if years else -1
+        size = self.last_year - self.first_year + 1
+        self.rates = np.zeros(max(size, 0))
+        self.known = np.zeros(max(size, 0), dtype=bool)
+        for year, rate in rates_by_year.items():
+            self.rates[int(year) - self.first_year] = float(rate)
+            self.known[int(year) - self.first_year] = True
+        self.cumulative = np.cumprod(1 - self.rates)
+
+    def _positions(self, years):
+        return np.asarray(years, dtype=np.int64) - self.first_year
+
+    def has_rate(self, years):
+        """Boolean mask of years with a published rate"""
+        positions = self._positions(years)
+        inside = (positions >= 0) & (positions < len(self.rates))
+        return inside & self.known[np.clip(positions, 0, max(len(self.rates) - 1, 0))]
+
+    def rate(self, years):
+        """Rate for each year, 0 where no rate is published"""
+        positions = self._positions(years)
+        return np.where(self.has_rate(years), self.rates[np.clip(positions, 0, max(len(self.rates) - 1, 0))], 0.0)
+
+    def mean_rate(self, first_year, end_year):
+        """Average published rate over ``first_year`` up to (not including) ``end_year``, 0 if none"""
+        years = np.arange(first_year, end_year)
+        known = self.has_rate(years)
+        return float(self.rate(years[known]).mean()) if known.any() else 0.0
+
+    def cumulative_deflator(self, years):
+        """Product of ``(1 - rate)`` over every year up to and including ``years``"""
+        positions = self._positions(years)
+        if len(self.cumulative) == 0:
+            return np.ones(np.shape(positions))
+        return np.where(
+            positions < 0,
+            1.0,
+            self.cumulative[np.clip(positions, 0, len(self.cumulative) - 1)]
+        )
+
+    def deflator(self, from_year, to_years):
+        """Factor taking money at the end of ``from_year`` to real terms at the end of ``to_years``"""
+        return self.cumulative_deflator(to_years) / self.cumulative_deflator(from_year)
+
+    def to_real(self, values, years, base_year):
+        """Convert nominal ``values`` observed at the end of ``years`` into ``base_year`` money"""
+        return np.asarray(values, dtype=np.float64) * self.deflator(base_year, years)
+
+    def to_dict(self):
+        """``{"year": rate}`` mapping as stored in the data file"""
+        return {
+            str(self.first_year + i): float(rate)
+            for i, rate in enumerate(self.rates) if self.known[i]
+        }
+
+
+def _data_path():
+    if has_app_context():
+        return os.path.join(current_app.config['DATA_DIR'], 'inflation_data.json')
+    return os.path.join(os.path.dirname(__file__), 'data', 'inflation_data.json')
+
+
+def _load_tables():
+    """
+    Parse the data file into per-country tables, reloading when it changes.
+    A reload builds a new dict and swaps it in, so readers never see it half-filled.
+    """
+    global _tables
+    path = _data_path()
+    mtime = os.stat(path).st_mtime_ns
+    if _loaded['path'] == path and _loaded['mtime'] == mtime:
+        return _tables
+    with _load_lock:
+        if _loaded['path'] != path or _loaded['mtime'] != mtime:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            _tables = {country: InflationTable(rates) for country, rates in data.items()}
+            _loaded.update(path=path, mtime=mtime)
+            logger.info(f"Loaded inflation data for {len(_tables)} countries from {path}")
+    return _tables
+
+
+def get_inflation_table(country=DEFAULT_COUNTRY):
+    """Year-indexed inflation table for ``country``, or None if unavailable"""
     try:
-        file_path = os.path.join(current_app.config['DATA_DIR'], 'inflation_data.json')
-        with open(file_path, 'r') as f:
-            data = json.load(f)
-            return data['US']  # Or allow country selection in the future
+        return _load_tables().get(country)
     except Exception as e:
-        current_app.logger.error(f"Error loading inflation data: {str(e)}")
-        return None
\ No newline at end of file
+        logger.error(f"Error loading inflation data: {str(e)}")
+        return None
+
+
+def get_available_countries():
+    try:
+        return sorted(_load_tables())
+    except Exception as e:
+        logger.error(f"Error loading inflation data: {str(e)}")
+        return []
+
+
+def get_inflation_data(country=DEFAULT_COUNTRY):
+    """Get historical inflation data"""
+    table = get_inflation_table(country)
+    return table.to_dict() if table is not None else None
@@ -0,0 +1,208 @@
+# services/job_service.py
+import datetime
+import json
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from .cache_service import cache
+from .logging_service import log_event
+
+logger = logging.getLogger(__name__)
+
+# Job kind -> endpoint it runs, with the same request body
+JOB_ENDPOINTS = {
+    'calculate': '/calculate',
+    'batch': '/calculate/batch',
+    'sweep': '/calculate/sweep',
+    'projection': '/calculate/projection',
+    'rolling': '/calculate/rolling'
+}
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+FINISHED_STATES = (SUCCEEDED, FAILED)
+
+JOB_BACKENDS = ('thread', 'celery')
+RUN_JOB_TASK = 'investment_calculator.run_job'
+
+# Shared counter of Celery jobs sent but not finished
+PENDING_JOBS_KEY = 'jobs:pending'
+
+
+class JobQueueFull(RuntimeError):
+    """Raised by ``submit_job`` when ``JOB_MAX_PENDING`` jobs are already waiting or running"""
+
+
+class ThreadJobBackend:
+    """Runs jobs on a bounded thread pool inside the web process (development and tests)"""
+
+    def __init__(self, app, max_workers=2):
+        self.app = app
+        self.max_workers = max(1, max_workers)
+        self._executor = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def pending(self):
+        """Jobs submitted here that have not finished"""
+        return self._pending
+
+    def submit(self, job_id, kind, payload):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='job')
+            self._pending += 1
+        future = self._executor.submit(run_job, self.app, job_id, kind, payload)
+        future.add_done_callback(self._finished)
+
+    def _finished(self, future):
+        with self._lock:
+            self._pending -= 1
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+
+
+class CeleryJobBackend:
+    """
+    Sends jobs to Celery workers through ``CELERY_BROKER_URL``. Job status lives
+    in the app cache, so web and worker processes must share it (``CACHE_TYPE=redis``).
+    """
+
+    def __init__(self, app):
+        from celery import Celery
+        self.app = app
+        self.celery = Celery(app.import_name, broker=app.config['CELERY_BROKER_URL'],
+                             backend=app.config['CELERY_RESULT_BACKEND'])
+        # Outcomes are stored with the job record, not in the result backend
+        self.celery.conf.task_ignore_result = True
+
+        @self.celery.task(name=RUN_JOB_TASK)
+        def run(job_id, kind, payload):
+            try:
+                run_job(app, job_id, kind, payload)
+            finally:
+                with app.app_context():
+                    cache.cache.dec(PENDING_JOBS_KEY)
+
+        self._task = run
+
+    def pending(self):
+        """Jobs sent by any web process that no worker has finished, counted in the shared cache"""
+        return max(0, cache.get(PENDING_JOBS_KEY) or 0)
+
+    def submit(self, job_id, kind, payload):
+        cache.cache.inc(PENDING_JOBS_KEY)
+        try:
+            self._task.delay(job_id, kind, payload)
+        except Exception:
+            cache.cache.dec(PENDING_JOBS_KEY)
+            raise
+
+
+def init_job_queue(app):
+    """Create the job backend selected by ``JOB_BACKEND``; Celery is only imported when chosen"""
+    backend_name = app.config['JOB_BACKEND']
+    if backend_name not in JOB_BACKENDS:
+        raise ValueError(f"JOB_BACKEND must be one of {', '.join(JOB_BACKENDS)}")
+    if backend_name == 'celery':
+        backend = CeleryJobBackend(app)
+    else:
+        backend = ThreadJobBackend(app, app.config['JOB_MAX_WORKERS'])
+    app.extensions['job_backend'] = backend
+    return backend
+
+
+def submit_job(kind, payload):
+    """
+    Queue ``payload`` for the ``kind`` endpoint and return the new job's record.
+    Raises ``JobQueueFull`` once ``JOB_MAX_PENDING`` jobs have not finished.
+    """
+    if kind not in JOB_ENDPOINTS:
+        raise ValueError(f"job kind must be one of {', '.join(JOB_ENDPOINTS)}")
+    if not isinstance(payload, dict):
+        raise ValueError('job payload must be a JSON object')
+    backend = current_app.extensions['job_backend']
+    limit = current_app.config['JOB_MAX_PENDING']
+    if backend.pending() >= limit:
+        raise JobQueueFull(f"{limit} jobs are already pending, try again later")
+    job = {
+        'id': uuid.uuid4().hex,
+        'kind': kind,
+        'state': QUEUED,
+        'submittedAt': _now(),
+        'startedAt': None,
+        'finishedAt': None
+    }
+    _save(job)
+    backend.submit(job['id'], kind, payload)
+    log_event(logger, 'job.submitted', id=job['id'], kind=kind)
+    return job
+
+
+def get_job(job_id):
+    """The job's record, with ``status`` and ``result`` once finished; None if unknown or expired"""
+    return cache.get(_job_key(job_id))
+
+
+def watch_job(job_id, poll_interval=0.25, timeout=None):
+    """Yield the job's record whenever its state changes, until it finishes, vanishes or ``timeout`` passes"""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    last_state = None
+    while True:
+        job = get_job(job_id)
+        if job is None:
+            return
+        if job['state'] != last_state:
+            last_state = job['state']
+            yield job
+        if job['state'] in FINISHED_STATES or (deadline is not None and time.monotonic() >= deadline):
+            return
+        time.sleep(poll_interval)
+
+
+def run_job(app, job_id, kind, payload):
+    """
+    Execute a job: dispatch its endpoint with ``payload`` as if it had been
+    posted, so it gets the same validation, caching and errors, and store the
+    response with the job. Runs on a backend's worker, never a request thread.
+    """
+    with app.app_context():
+        job = get_job(job_id) or {'id': job_id, 'kind': kind, 'submittedAt': None}
+        job.update(state=RUNNING, startedAt=_now())
+        _save(job)
+        started = time.perf_counter()
+        try:
+            with app.test_request_context(JOB_ENDPOINTS[kind], method='POST', json=payload,
+                                          headers={'Accept': 'application/json'}):
+                response = app.full_dispatch_request()
+            status = response.status_code
+            body = json.loads(response.get_data())
+        except Exception as e:
+            logger.exception(f"Job {job_id} failed")
+            status, body = 500, {'error': 'Server error', 'details': str(e)}
+
+        job.update(state=SUCCEEDED if status < 400 else FAILED, status=status, finishedAt=_now())
+        job['result' if status < 400 else 'error'] = body
+        _save(job)
+        log_event(logger, 'job.finished', id=job_id, kind=kind, state=job['state'], status=status,
+                  ms=round((time.perf_counter() - started) * 1000, 1))
+        return job
+
+
+def _save(job):
+    cache.set(_job_key(job['id']), job, timeout=current_app.config.get('JOB_RESULT_TIMEOUT', 3600))
+
+
+def _job_key(job_id):
+    return f"jobs:{job_id}"
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds')
@@ -0,0 +1,136 @@
+# services/logging_service.py
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import threading
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_lock = threading.Lock()
+_listener = None
+_installed = []
+_sample_rate = 1.0
+
+
+# ``extra`` marking records whose arguments are safe to format later
+_DEFERRED = {'deferred_format': True}
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue ``log_event`` records unformatted, so the listener thread renders
+    them and a request only pays for creating the record. Other records may
+    carry live objects as arguments and are formatted on the calling thread,
+    as the stock ``QueueHandler`` does.
+    """
+
+    def prepare(self, record):
+        if getattr(record, 'deferred_format', False):
+            return record
+        return super().prepare(record)
+
+
+def configure_logging(level, use_queue=True, sample_rate=1.0, handlers=None):
+    """
+    Install the app's log handlers on the root logger (the stream handler by
+    default, unless the root logger already has handlers, as under gunicorn).
+    With ``use_queue`` they sit behind a ``DeferredQueueHandler``
+    drained by a ``QueueListener`` thread, so request threads never block on
+    log I/O. ``sample_rate`` is the share of ``log_event`` hot-path events kept.
+    Calling it again replaces what an earlier call installed.
+    """
+    global _listener, _sample_rate
+    root = logging.getLogger()
+    with _lock:
+        _stop()
+        root.setLevel(level)
+        _sample_rate = float(sample_rate)
+        if handlers is None:
+            if root.handlers:
+                # Configured elsewhere already; adding ours would log every line twice
+                return
+            handlers = [logging.StreamHandler()]
+        for handler in handlers:
+            if handler.formatter is None:
+                handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+        if use_queue:
+            records = queue.SimpleQueue()
+            _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+            _listener.start()
+            _installed[:] = [DeferredQueueHandler(records)]
+        else:
+            _installed[:] = handlers
+        for handler in _installed:
+            root.addHandler(handler)
+
+
+def log_event(logger, event, level=logging.INFO, sample_rate=None, **fields):
+    """
+    Structured hot-path log line: ``event key=value ...``.
+
+    Nothing is formatted unless the level is enabled and the event survives
+    sampling, and even then the fields are only rendered by the handler, possibly
+    on another thread: pass scalars, not objects that may still change.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    rate = _sample_rate if sample_rate is None else sample_rate
+    if rate < 1.0 and random.random() >= rate:
+        return
+    logger.log(level, '%s %s', event, _Fields(fields), extra=_DEFERRED)
+
+
+class _Fields:
+    """Lazily rendered ``key=value`` pairs"""
+    __slots__ = ('fields',)
+
+    def __init__(self, fields):
+        self.fields = fields
+
+    def __str__(self):
+        return ' '.join(f"{key}={value}" for key, value in self.fields.items())
+
+
+def _stop():
+    """Remove installed handlers and flush the listener; caller holds ``_lock``"""
+    global _listener
+    root = logging.getLogger()
+    for handler in _installed:
+        root.removeHandler(handler)
+    _installed.clear()
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _restart_after_fork():
+    """
+    Threads do not survive fork: give a child (a gunicorn worker forked from a
+    preloading parent, a process pool worker) its own queue and listener, or
+    its records would pile up in a queue nobody drains.
+    """
+    global _lock, _listener
+    _lock = threading.Lock()
+    if _listener is None:
+        return
+    root = logging.getLogger()
+    for handler in _installed:
+        root.removeHandler(handler)
+    records = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(records, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+    _installed[:] = [DeferredQueueHandler(records)]
+    root.addHandler(_installed[0])
+
+
+os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+@atexit.register
+def _flush_on_exit():
+    with _lock:
+        _stop()
@@ -0,0 +1,24 @@
+# services/options.py
+"""Request option values shared by the routes and the engines; no heavy imports"""
+
+DEFAULT_COUNTRY = 'US'
+
+DAILY_RESOLUTION = 'daily'
+MONTHLY_RESOLUTION = 'monthly'
+RESOLUTIONS = (MONTHLY_RESOLUTION, DAILY_RESOLUTION)
+
+BOOTSTRAP = 'bootstrap'
+PARAMETRIC = 'parametric'
+PROJECTION_METHODS = (BOOTSTRAP, PARAMETRIC)
+
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+DEFAULT_BLOCK_SIZE = 12
+
+REBALANCE_NONE = 'none'
+REBALANCE_THRESHOLD = 'threshold'
+# Calendar schedules: rebalance on the first trading day of every n-th month
+REBALANCE_MONTHS = {'monthly': 1, 'quarterly': 3, 'annually': 12}
+REBALANCE_SCHEDULES = (REBALANCE_NONE, *REBALANCE_MONTHS, REBALANCE_THRESHOLD)
+
+# Largest allowed drift of any holding's weight before a threshold rebalance
+DEFAULT_REBALANCE_THRESHOLD = 0.05
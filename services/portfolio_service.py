@@ -0,0 +1,172 @@
+# services/portfolio_service.py
+import logging
+import numpy as np
+import pandas as pd
+from .daily_service import _contribution_mask, _daily_price_matrix, _monthly_deflators
+from .data_service import _to_columnar_records, _to_monthly_records
+from .inflation_service import DEFAULT_COUNTRY, get_inflation_table
+from .options import DEFAULT_REBALANCE_THRESHOLD, REBALANCE_MONTHS, REBALANCE_NONE, REBALANCE_SCHEDULES, REBALANCE_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+PORTFOLIO_SYMBOL = 'Portfolio'
+
+# Days of weight drift checked at once after a threshold rebalance; the window
+# doubles while no breach turns up
+THRESHOLD_SCAN_DAYS = 32
+
+
+def simulate_portfolio(initial, start_year, end_year, stocks, weights=None, rebalance=REBALANCE_NONE,
+                       addition_amount=0, addition_frequency='none', adjust_for_inflation=False,
+                       inflation_country=DEFAULT_COUNTRY, threshold=DEFAULT_REBALANCE_THRESHOLD, columnar=False):
+    """
+    Simulate one portfolio holding ``stocks`` (daily close series) at target ``weights``.
+
+    The portfolio is bought on the first day every holding has a price;
+    contributions are split by the target weights on the first trading day of
+    their period, and holdings are reset to the targets on the ``rebalance``
+    schedule (or, for ``threshold``, whenever a weight drifts more than
+    ``threshold`` from its target). Weights default to equal and are
+    renormalized over the symbols that have data.
+
+    Returns a one-element ``generate_data_points``-shaped list for the combined
+    portfolio, with the normalized ``weights`` and the number of ``rebalances``.
+    """
+    logger.info(f"Starting portfolio simulation: {len(stocks)} holdings, rebalance={rebalance}")
+    if rebalance not in REBALANCE_SCHEDULES:
+        raise ValueError(f"Unknown rebalance schedule: {rebalance}")
+    inflation_table = get_inflation_table(inflation_country) if adjust_for_inflation else None
+
+    days, symbols, prices = _daily_price_matrix(stocks, start_year, end_year)
+    if not symbols:
+        return []
+    target = _target_weights(symbols, weights)
+    held = target > 0
+    symbols, target, prices = [s for s, h in zip(symbols, held) if h], target[held], prices[held]
+
+    # Value holdings at their last close; the portfolio opens once every holding has traded
+    prices = pd.DataFrame(prices.T).ffill().to_numpy().T
+    priced = ~np.isnan(prices).any(axis=0)
+    if not priced.any():
+        logger.info("No day on which every holding has a price")
+        return []
+    first_day = int(np.argmax(priced))
+    days, prices = days[first_day:], prices[:, first_day:]
+
+    month_ends, arrays, rebalances = compute_portfolio_arrays(
+        days, prices, target, start_year, float(initial), float(addition_amount), addition_frequency,
+        rebalance, threshold, inflation_table
+    )
+
+    to_records = _to_columnar_records if columnar else _to_monthly_records
+    data = to_records(month_ends, [PORTFOLIO_SYMBOL], {field: values[None, :] for field, values in arrays.items()})
+    for entry in data:
+        entry['weights'] = dict(zip(symbols, np.round(target, 6).tolist()))
+        entry['rebalances'] = rebalances
+    logger.info(f"Portfolio simulation completed with {rebalances} rebalances")
+    return data
+
+
+def compute_portfolio_arrays(days, prices, target, start_year, initial, addition_amount, addition_frequency,
+                             rebalance, threshold, inflation_table=None):
+    """
+    Holdings simulation over a (holdings x days) price matrix with no gaps.
+
+    Share counts only change on event days (contributions, scheduled rebalances,
+    threshold breaches). Each stretch between events is one share vector, so the
+    loop runs once per event and every step is a vector operation over all
+    holdings. Threshold breaches inside a stretch are found with drift
+    matrices over windows that start at ``THRESHOLD_SCAN_DAYS`` after each
+    breach and double while none is found, so the work stays linear in the
+    number of days however often the threshold is crossed. Returns ``(month_ends, arrays, rebalance_count)`` with
+    (months,) arrays of ``invested``, ``total``, ``gains``,
+    ``return_percentage`` and ``valid``.
+    """
+    day_count = prices.shape[1]
+    month_id = (days.year.to_numpy() - start_year) * 12 + days.month.to_numpy() - 1
+    months = np.unique(month_id)
+    month_start = np.searchsorted(month_id, months)
+    month_end = np.append(month_start[1:], day_count) - 1
+
+    # Contributions are deflated from the end of the previous month (see
+    # daily_service.compute_daily_growth_arrays) and values re-inflated per month
+    deflator = _monthly_deflators(months, start_year, inflation_table)
+    deflator_before = np.concatenate([[1.0], deflator[:-1]])
+
+    contribution = np.zeros(day_count)
+    contributes = _contribution_mask(months, addition_frequency) & (month_start > 0)
+    contribution[month_start[contributes]] = addition_amount / deflator_before[contributes]
+    contribution[0] += initial
+
+    scheduled = np.zeros(day_count, dtype=bool)
+    if rebalance in REBALANCE_MONTHS:
+        scheduled[month_start[(months % REBALANCE_MONTHS[rebalance] == 0) & (month_start > 0)]] = True
+    events = np.union1d([0], np.flatnonzero(scheduled | (contribution != 0)))
+
+    segment_starts = []
+    segment_shares = []
+    shares = np.zeros(len(target))
+    rebalances = 0
+    boundaries = np.append(events, day_count)
+    for event, next_event in zip(boundaries[:-1], boundaries[1:]):
+        price = prices[:, event]
+        if scheduled[event] and shares.any():
+            shares = target * (shares @ price) / price
+            rebalances += 1
+        shares = shares + target * contribution[event] / price
+        segment_starts.append(event)
+        segment_shares.append(shares)
+
+        if rebalance != REBALANCE_THRESHOLD:
+            continue
+        start = event
+        window = THRESHOLD_SCAN_DAYS
+        while start < next_event:
+            # Weight drift of every holding over the next window of the stretch
+            stop = min(start + window, next_event)
+            holdings = shares[:, None] * prices[:, start:stop]
+            drift = np.abs(holdings / holdings.sum(axis=0) - target[:, None]).max(axis=0)
+            breaches = np.flatnonzero(drift > threshold)
+            if len(breaches) == 0:
+                start = stop
+                window *= 2
+                continue
+            day = start + breaches[0]
+            shares = target * (shares @ prices[:, day]) / prices[:, day]
+            rebalances += 1
+            segment_starts.append(day)
+            segment_shares.append(shares)
+            start = day + 1
+            window = THRESHOLD_SCAN_DAYS
+
+    # Sample the share vector in force on each month's last day
+    segment_shares = np.array(segment_shares)
+    active = np.searchsorted(segment_starts, month_end, side='right') - 1
+    nominal = np.einsum('ms,sm->m', segment_shares[active], prices[:, month_end])
+
+    invested = np.cumsum(contribution)[month_end] * deflator
+    total = nominal * deflator
+    gains = total - invested
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return_percentage = np.where(invested != 0, gains / invested * 100, 0.0)
+
+    month_ends = days[month_start].to_period('M').to_timestamp('M')
+    return month_ends, {
+        'invested': invested,
+        'total': total,
+        'gains': gains,
+        'return_percentage': return_percentage,
+        'valid': np.isfinite(total) & (invested != 0)
+    }, rebalances
+
+
+def _target_weights(symbols, weights):
+    """Target weight per symbol, equal when ``weights`` is empty, summing to 1"""
+    if not weights:
+        return np.full(len(symbols), 1 / len(symbols))
+    target = np.array([float(weights.get(symbol, 0)) for symbol in symbols])
+    if (target < 0).any():
+        raise ValueError('Portfolio weights must not be negative')
+    if target.sum() <= 0:
+        raise ValueError('No portfolio weight is assigned to a symbol with data')
+    return target / target.sum()
@@ -0,0 +1,159 @@
+# services/price_codec.py
+import functools
+import json
+import logging
+import pickle
+import struct
+import time
+import zlib
+import numpy as np
+import pandas as pd
+from flask import current_app, has_app_context
+
+logger = logging.getLogger(__name__)
+
+# Header: magic, version, kind, dtype, compression, rows, metadata length
+MAGIC = b'PXC1'
+HEADER = struct.Struct('<4sBBBBII')
+VERSION = 1
+
+KIND_EMPTY, KIND_SERIES, KIND_FRAME = 0, 1, 2
+DTYPES = (np.dtype('<f8'), np.dtype('<f4'))
+COMPRESSIONS = ('none', 'zlib', 'lz4', 'zstd')
+
+NS_PER_DAY = 86400 * 10 ** 9
+
+
+def encode_price_entry(entry, compression=None):
+    """
+    Encode a cached ``(prices, issue)`` entry as bytes.
+
+    ``prices`` is a daily or year-end close Series, a month-end frame or None.
+    The payload is the int64 epoch-day index followed by the raw float64/float32
+    values (one contiguous block per column); ``issue`` and the labels travel in
+    a small JSON header. ``compression`` is one of ``COMPRESSIONS`` (the
+    ``PRICE_CACHE_COMPRESSION`` setting by default); lz4 and zstd need their
+    packages and fall back to no compression when missing.
+    """
+    prices, issue = entry
+    meta = {'issue': issue}
+    if prices is None:
+        kind, dtype, rows, payload = KIND_EMPTY, DTYPES[0], 0, b''
+    else:
+        index = pd.DatetimeIndex(prices.index)
+        days = index.normalize().values.astype('datetime64[D]').astype('<i8')
+        if isinstance(prices, pd.DataFrame):
+            kind, columns = KIND_FRAME, [str(column) for column in prices.columns]
+            values = prices.to_numpy().T
+            meta['columns'] = columns
+        else:
+            kind, values = KIND_SERIES, prices.to_numpy()[None, :]
+            meta['name'] = prices.name
+        dtype = np.dtype('<f4') if values.dtype == np.float32 else np.dtype('<f8')
+        rows = len(index)
+        payload = days.tobytes() + np.ascontiguousarray(values, dtype=dtype).tobytes()
+
+    compression = _available(compression or _configured_compression())
+    payload = _compress(payload, compression)
+    metadata = json.dumps(meta, separators=(',', ':')).encode()
+    # Pad the metadata so the payload starts 8-byte aligned
+    metadata += b' ' * (-(HEADER.size + len(metadata)) % 8)
+    header = HEADER.pack(MAGIC, VERSION, kind, DTYPES.index(dtype), COMPRESSIONS.index(compression),
+                         rows, len(metadata))
+    return header + metadata + payload
+
+
+def decode_price_entry(blob):
+    """
+    Decode bytes from ``encode_price_entry`` back into ``(prices, issue)``.
+
+    Uncompressed values are read-only NumPy views of ``blob`` (no copy); only
+    the day index is converted to ``datetime64[ns]``. Index frequencies are not
+    kept, as for downloaded prices.
+    """
+    magic, version, kind, dtype_code, compression_code, rows, meta_length = HEADER.unpack_from(blob)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('Not an encoded price entry')
+    offset = HEADER.size
+    meta = json.loads(bytes(blob[offset:offset + meta_length]))
+    if kind == KIND_EMPTY:
+        return None, meta['issue']
+
+    payload = _decompress(memoryview(blob)[offset + meta_length:], COMPRESSIONS[compression_code])
+    dtype = DTYPES[dtype_code]
+    days = np.frombuffer(payload, dtype='<i8', count=rows)
+    index = pd.DatetimeIndex((days * NS_PER_DAY).view('datetime64[ns]'))
+    width = len(meta['columns']) if kind == KIND_FRAME else 1
+    values = np.frombuffer(payload, dtype=dtype, count=width * rows, offset=rows * 8).reshape(width, rows)
+
+    if kind == KIND_FRAME:
+        prices = pd.DataFrame(values.T, index=index, columns=meta['columns'], copy=False)
+    else:
+        prices = pd.Series(values[0], index=index, name=meta.get('name'), copy=False)
+    return prices, meta['issue']
+
+
+def codec_stats(entry, compression=None, repeat=20):
+    """Encoded size and load time of ``entry`` against plain pickle, for benchmarks"""
+    pickled = pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+    encoded = encode_price_entry(entry, compression)
+
+    def best(load, blob):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            load(blob)
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    return {
+        'pickle_bytes': len(pickled),
+        'codec_bytes': len(encoded),
+        'pickle_load_seconds': best(pickle.loads, pickled),
+        'codec_load_seconds': best(decode_price_entry, encoded)
+    }
+
+
+def _configured_compression():
+    if has_app_context():
+        return current_app.config.get('PRICE_CACHE_COMPRESSION', 'none')
+    return 'none'
+
+
+@functools.lru_cache(maxsize=None)
+def _available(compression):
+    """``compression`` if it can be used here, else 'none' (warns once)"""
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown price cache compression: {compression}")
+    module = {'lz4': 'lz4.frame', 'zstd': 'zstandard'}.get(compression)
+    if module is not None:
+        try:
+            __import__(module)
+        except ImportError:
+            logger.warning(f"{module} is not installed, caching prices uncompressed")
+            return 'none'
+    return compression
+
+
+def _compress(payload, compression):
+    if compression == 'zlib':
+        return zlib.compress(payload, 1)
+    if compression == 'lz4':
+        import lz4.frame
+        return lz4.frame.compress(payload)
+    if compression == 'zstd':
+        import zstandard
+        return zstandard.ZstdCompressor(level=3).compress(payload)
+    return payload
+
+
+def _decompress(payload, compression):
+    if compression == 'zlib':
+        return zlib.decompress(payload)
+    if compression == 'lz4':
+        import lz4.frame
+        return lz4.frame.decompress(payload)
+    if compression == 'zstd':
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(payload)
+    return payload
@@ -0,0 +1,146 @@
+# services/price_providers.py
+import logging
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from flask import current_app, has_app_context
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+class YFinanceProvider:
+    """
+    Daily bars from Yahoo Finance.
+
+    ``yf.download`` collects its results in module-level state, so concurrent
+    calls (request chunks, the cache warmer) would mix each other's tickers.
+    Each ticker is fetched through its own ``yf.Ticker`` instead, on up to
+    ``threads`` threads per call, and the frames are assembled here in the
+    ticker-grouped layout ``yf.download`` returns.
+    """
+    name = 'yfinance'
+    threads = 8
+
+    def download(self, symbols, start_date, end_date):
+        with ThreadPoolExecutor(max_workers=max(1, min(self.threads, len(symbols)))) as executor:
+            histories = dict(zip(symbols, executor.map(
+                lambda symbol: self._history(symbol, start_date, end_date), symbols
+            )))
+        frames = {symbol: frame[FIELDS] for symbol, frame in histories.items() if not frame.empty}
+        if not frames:
+            return pd.DataFrame(columns=pd.MultiIndex.from_product([[], FIELDS]))
+        return pd.concat(frames, axis=1)
+
+    def _history(self, symbol, start_date, end_date):
+        import yfinance as yf
+        frame = yf.Ticker(symbol).history(
+            start=str(start_date),
+            end=str(end_date),
+            interval="1d",
+            auto_adjust=True,
+            raise_errors=False
+        )
+        if frame.empty or not set(FIELDS).issubset(frame.columns):
+            return pd.DataFrame()
+        # yf.download drops the exchange time zone from daily bars too
+        frame.index = pd.DatetimeIndex(frame.index).tz_localize(None)
+        return frame
+
+
+class FakePriceProvider:
+    """
+    Local stand-in for Yahoo Finance used by tests and benchmarks.
+
+    Returns ticker-grouped frames shaped like ``yf.download`` output with
+    deterministic random-walk prices per symbol, after sleeping ``latency``
+    seconds per call. Symbols in ``invalid_symbols`` come back all-NaN.
+    """
+    name = 'fake'
+
+    def __init__(self, latency=0.0, invalid_symbols=(), seed=0):
+        self.latency = latency
+        self.invalid_symbols = set(invalid_symbols)
+        self.seed = seed
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def download(self, symbols, start_date, end_date):
+        with self._lock:
+            self.calls.append(list(symbols))
+        if self.latency:
+            time.sleep(self.latency)
+
+        dates = pd.bdate_range(start_date, end_date, inclusive='left')
+        frames = {}
+        for symbol in symbols:
+            close = synthetic_prices(symbol, dates, seed=self.seed)
+            if symbol in self.invalid_symbols:
+                close[:] = np.nan
+            frames[symbol] = pd.DataFrame({
+                'Open': close,
+                'High': close * 1.01,
+                'Low': close * 0.99,
+                'Close': close,
+                'Volume': np.full(len(dates), 1_000_000.0)
+            }, index=dates)[FIELDS]
+        return pd.concat(frames, axis=1)
+
+
+def synthetic_prices(symbol, dates, seed=0, drift=0.0003, volatility=0.015):
+    """
+    Deterministic geometric random walk for ``symbol`` over ``dates``.
+
+    The walk is anchored at 2000-01-03 so overlapping date ranges of the same
+    symbol return identical prices.
+    """
+    origin = pd.Timestamp('2000-01-03')
+    if len(dates) == 0:
+        return np.empty(0)
+    offsets = np.asarray((pd.DatetimeIndex(dates) - origin).days)
+    span = int(offsets.max()) + 1 if offsets.max() >= 0 else 1
+    rng = np.random.default_rng([zlib.crc32(symbol.encode()), seed])
+    walk = np.cumprod(1 + rng.normal(drift, volatility, max(span, 1)))
+    # Dates before the origin fall back to the first walk value
+    return 100 * walk[np.clip(offsets, 0, len(walk) - 1)]
+
+
+PROVIDERS = {
+    YFinanceProvider.name: YFinanceProvider,
+    FakePriceProvider.name: FakePriceProvider
+}
+
+_provider = None
+_override = None
+_provider_lock = threading.Lock()
+
+
+def get_price_provider():
+    """Provider named by the ``PRICE_PROVIDER`` config (Yahoo Finance by default)"""
+    global _provider
+    if _override is not None:
+        return _override
+    name = 'yfinance'
+    options = {}
+    if has_app_context():
+        name = current_app.config.get('PRICE_PROVIDER', name)
+        if name == FakePriceProvider.name:
+            options['latency'] = current_app.config.get('FAKE_PROVIDER_LATENCY', 0.0)
+    with _provider_lock:
+        if _provider is None or _provider.name != name:
+            if name not in PROVIDERS:
+                raise ValueError(f"Unknown price provider: {name}")
+            logger.info(f"Using price provider: {name}")
+            _provider = PROVIDERS[name](**options)
+        return _provider
+
+
+def set_price_provider(provider):
+    """Install a provider instance ahead of the configured one; None restores it"""
+    global _override
+    with _provider_lock:
+        _override = provider
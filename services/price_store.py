@@ -0,0 +1,213 @@
+# services/price_store.py
+import glob
+import json
+import logging
+import os
+import re
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+from flask import current_app, has_app_context
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialized within the process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# One record per trading day: epoch day and adjusted close
+RECORD_DTYPE = np.dtype([('day', '<i8'), ('close', '<f8')])
+
+# Relative difference at which a re-fetched stored bar counts as a new adjustment basis
+ADJUSTMENT_TOLERANCE = 1e-6
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def _to_day(value):
+    """Convert a date-like value to an epoch day number"""
+    return int(np.datetime64(pd.Timestamp(value).date(), 'D').astype(np.int64))
+
+
+def _from_day(day):
+    """Convert an epoch day number back to a date"""
+    return date(1970, 1, 1) + timedelta(days=int(day))
+
+
+class PriceStore:
+    """
+    Local per-symbol store of daily adjusted closes.
+
+    Each symbol is kept as one ``.npy`` record array (memory-mapped on read) plus a
+    small JSON file with the contiguous date range that has been fetched so far,
+    so only the uncovered parts of a request ever go upstream. The JSON file names
+    the data file it describes and is replaced last, so a write commits atomically;
+    writers of a symbol hold a lock file, so gunicorn workers can share a store.
+
+    Adjusted closes are rescaled upstream after every split and dividend. Ranges
+    are therefore fetched with one stored bar of overlap, and when that bar comes
+    back different the stored history is dropped instead of being mixed in.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _base(self, symbol):
+        return os.path.join(self.root, re.sub(r'[^A-Za-z0-9._-]', '_', symbol))
+
+    def _meta(self, symbol):
+        try:
+            with open(self._base(symbol) + '.json', 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def coverage(self, symbol):
+        """Return the covered ``[start, end)`` date range for a symbol, or None"""
+        meta = self._meta(symbol)
+        try:
+            return date.fromisoformat(meta['start']), date.fromisoformat(meta['end'])
+        except (TypeError, ValueError, KeyError):
+            return None
+
+    def missing_ranges(self, symbol, start, end, overlap=False):
+        """
+        Date ranges of ``[start, end)`` that still have to be fetched. With
+        ``overlap`` a range next to stored data also takes in the stored bar it
+        touches, so ``write`` can check the adjustment basis.
+        """
+        start, end = pd.Timestamp(start).date(), pd.Timestamp(end).date()
+        end = min(end, date.today())
+        if start >= end:
+            return []
+        covered = self.coverage(symbol)
+        if covered is None:
+            return [(start, end)]
+        days = self._load(symbol)['day'] if overlap else None
+        ranges = []
+        if start < covered[0]:
+            first = _from_day(days[0]) + timedelta(days=1) if days is not None and len(days) else covered[0]
+            ranges.append((start, max(covered[0], first)))
+        if end > covered[1]:
+            last = _from_day(days[-1]) if days is not None and len(days) else covered[1]
+            ranges.append((min(covered[1], last), end))
+        return ranges
+
+    def _load(self, symbol, mmap=True):
+        # A concurrent write may remove the data file between reading its name and opening it
+        for _ in range(3):
+            meta = self._meta(symbol)
+            if meta is None:
+                break
+            data_path = os.path.join(self.root, meta['data']) if 'data' in meta else self._base(symbol) + '.npy'
+            try:
+                return np.load(data_path, mmap_mode='r' if mmap else None)
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError):
+                break
+        return np.empty(0, dtype=RECORD_DTYPE)
+
+    def read(self, symbol, start, end):
+        """Slice ``[start, end)`` out of the store as a date-indexed Series"""
+        records = self._load(symbol)
+        if len(records) == 0:
+            return pd.Series(dtype=np.float64)
+        days = records['day']
+        lo = np.searchsorted(days, _to_day(start), side='left')
+        hi = np.searchsorted(days, _to_day(end), side='left')
+        window = np.array(records[lo:hi])
+        return pd.Series(
+            window['close'],
+            index=pd.to_datetime(window['day'], unit='D'),
+            name=symbol
+        )
+
+    def write(self, symbol, series, start, end):
+        """
+        Merge freshly fetched closes for ``[start, end)`` into the store. Returns
+        False when they overlap stored closes on another adjustment basis: the
+        stored history is dropped and only ``[start, end)`` remains covered.
+        """
+        start, end = pd.Timestamp(start).date(), min(pd.Timestamp(end).date(), date.today())
+        series = series.dropna()
+        incoming = np.empty(len(series), dtype=RECORD_DTYPE)
+        incoming['day'] = pd.DatetimeIndex(series.index).normalize().values.astype('datetime64[D]').astype(np.int64)
+        incoming['close'] = series.to_numpy(dtype=np.float64)
+
+        with self._locked(symbol):
+            existing = self._load(symbol, mmap=False)
+            covered = self.coverage(symbol)
+            overlap = np.isin(existing['day'], incoming['day'])
+            same_basis = np.allclose(
+                existing['close'][overlap],
+                incoming['close'][np.isin(incoming['day'], existing['day'])],
+                rtol=ADJUSTMENT_TOLERANCE, atol=0
+            )
+            if not same_basis:
+                logger.info(f"Prices of {symbol} were re-adjusted upstream, dropping its stored history")
+                covered = None
+            elif len(existing):
+                # Fresh values win over stored ones for overlapping days
+                incoming = np.concatenate([existing[~overlap], incoming])
+            incoming = incoming[np.argsort(incoming['day'], kind='stable')]
+
+            if covered is not None:
+                start, end = min(start, covered[0]), max(end, covered[1])
+            self._commit(symbol, incoming, start, end)
+        logger.debug(f"Stored {len(incoming)} rows for {symbol} covering {start} - {end}")
+        return same_basis
+
+    @contextmanager
+    def _locked(self, symbol):
+        """Hold the symbol's lock against other threads and, through its lock file, other processes"""
+        with self._lock, open(self._base(symbol) + '.lock', 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def _commit(self, symbol, records, start, end):
+        """Write a new data file, switch the metadata to it, then remove older data files"""
+        base = self._base(symbol)
+        data_name = f"{os.path.basename(base)}@{uuid.uuid4().hex[:12]}.npy"
+        self._atomic_write(os.path.join(self.root, data_name), lambda f: np.save(f, records))
+        self._atomic_write(base + '.json', lambda f: f.write(json.dumps({
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'rows': int(len(records)),
+            'data': data_name
+        }).encode()))
+        # Superseded versions, files left by a crash before the switch and the legacy layout
+        for path in [*glob.glob(glob.escape(base) + '@*.npy'), base + '.npy']:
+            if os.path.basename(path) != data_name:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _atomic_write(self, path, writer):
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            writer(f)
+        os.replace(tmp_path, path)
+
+
+def get_price_store():
+    """Return the app's price store, or None when it is disabled or outside an app"""
+    if not has_app_context() or not current_app.config.get('PRICE_STORE_ENABLED'):
+        return None
+    root = current_app.config.get('PRICE_STORE_DIR')
+    if not root:
+        return None
+    with _stores_lock:
+        if root not in _stores:
+            _stores[root] = PriceStore(root)
+        return _stores[root]
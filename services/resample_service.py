@@ -0,0 +1,39 @@
+# services/resample_service.py
+import numpy as np
+import pandas as pd
+
+MONTH_END_COLUMNS = ['close', 'first_close', 'anchor_close']
+
+
+def month_end_frame(stock_data, dtype=np.float64):
+    """
+    Collapse a daily close series to one row per calendar month.
+
+    Columns:
+    - ``close``: last close of the month, indexed by the month-end date
+    - ``first_close``: first close of the month (start price for a window opening that month)
+    - ``anchor_close``: close exactly one calendar month before the month end, NaN when
+      that day did not trade (used to grow monthly contributions)
+    """
+    stock_data = stock_data.dropna()
+    if len(stock_data) == 0:
+        return pd.DataFrame(columns=MONTH_END_COLUMNS, index=pd.DatetimeIndex([]), dtype=dtype)
+
+    monthly = stock_data.resample('ME')
+    close = monthly.last()
+    first_close = monthly.first()
+    keep = close.notna()
+    close, first_close = close[keep], first_close[keep]
+
+    anchor_close = stock_data.reindex(close.index - pd.DateOffset(months=1))
+    frame = pd.DataFrame({
+        'close': close.to_numpy(),
+        'first_close': first_close.to_numpy(),
+        'anchor_close': anchor_close.to_numpy()
+    }, index=close.index)
+    return frame.astype(dtype)
+
+
+def year_end_series(stock_data, dtype=np.float64):
+    """Last close of every calendar year, indexed by the year-end date"""
+    return stock_data.dropna().resample('YE').last().dropna().astype(dtype)
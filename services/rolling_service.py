@@ -0,0 +1,165 @@
+# services/rolling_service.py
+import logging
+import numpy as np
+import pandas as pd
+from .daily_service import _monthly_deflators
+from .data_service import MONTHLY_FREQUENCY, ANNUALLY_FREQUENCY, as_month_end
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PERCENTILES = (5, 25, 50, 75, 95)
+
+# Bisection steps for the money-weighted (IRR) return of DCA windows
+IRR_ITERATIONS = 80
+
+
+def rolling_windows(stocks, start_year, end_year, holding_months, initial, addition_amount=0,
+                    addition_frequency='none', inflation_table=None):
+    """
+    Outcome of every holding period of ``holding_months`` starting in a month of
+    [start_year, end_year), per symbol.
+
+    Each window buys ``initial`` at the first close of its start month, adds
+    ``addition_amount`` at the first close of every later month (monthly) or
+    of every twelfth month (annually), and is valued at the last close of its
+    final month. With prefix sums of ``1 / first_close`` every window is O(1),
+    so a symbol costs O(months) however many windows there are.
+
+    With an ``inflation_table`` the final and invested amounts are deflated
+    like ``generate_data_points`` does (December steps); the annualized return
+    (CAGR, or IRR when contributing) is always that of the nominal cash flows.
+
+    Returns one dict per symbol with per-window columns and a summary.
+    """
+    logger.info(f"Rolling {holding_months}-month windows starting {start_year}-{end_year - 1} over {len(stocks)} symbols")
+    results = []
+    for symbol, data in stocks.items():
+        frame = as_month_end(data)
+        if len(frame) == 0:
+            continue
+        windows = _symbol_windows(frame, start_year, end_year, holding_months, float(initial),
+                                  float(addition_amount), addition_frequency, inflation_table)
+        if windows is not None:
+            results.append({'symbol': symbol, **windows})
+    return results
+
+
+def _symbol_windows(frame, start_year, end_year, holding_months, initial, addition_amount, addition_frequency,
+                    inflation_table):
+    # Regular monthly grid from January of start_year so month k is k months in
+    months = pd.period_range(f"{start_year}-01", frame.index[-1].to_period('M'), freq='M')
+    periods = frame.index.to_period('M')
+    first = frame['first_close'].set_axis(periods).reindex(months).to_numpy(dtype=np.float64)
+    close = frame['close'].set_axis(periods).reindex(months).to_numpy(dtype=np.float64)
+
+    offsets = np.arange(len(months))
+    deflator = _monthly_deflators(offsets, start_year, inflation_table)
+    deflator_before = np.concatenate([[1.0], deflator[:-1]])
+    buy = first * deflator_before      # real cost basis of a unit bought at the start of month k
+    value = close * deflator           # real value of a unit at the end of month k
+
+    starts = np.arange((end_year - start_year) * 12)
+    ends = starts + holding_months - 1
+    starts, ends = starts[ends < len(months)], ends[ends < len(months)]
+    if len(starts) == 0:
+        return None
+
+    step = 12 if addition_frequency == ANNUALLY_FREQUENCY else 1
+    contributing = addition_frequency in (MONTHLY_FREQUENCY, ANNUALLY_FREQUENCY) and addition_amount != 0
+    contributions = (holding_months - 1) // step if contributing else 0
+
+    # Strided prefix sums: prefix[k] = x[k] + x[k - step] + x[k - 2 * step] + ...
+    last = starts + contributions * step   # last contribution month of each window
+
+    def strided_range(values):
+        # Sum over the contribution months start + step, ..., last of each window
+        prefix = _strided_cumsum(values, step)
+        return prefix[last] - prefix[starts]
+
+    missing = np.isnan(first)
+    complete = ~missing[starts] & ~np.isnan(close[ends]) & (strided_range(missing.astype(np.int64)) == 0)
+    first = np.where(missing, np.inf, first)
+
+    # Nominal flows, then the same flows in real terms
+    nominal_final = close[ends] * (initial / first[starts] + addition_amount * strided_range(1 / first))
+    nominal_invested = np.full(len(starts), initial + addition_amount * contributions)
+    final = value[ends] * (initial / buy[starts] + addition_amount * strided_range(1 / np.where(missing, np.inf, buy)))
+    invested = deflator[ends] * (initial / deflator_before[starts] + addition_amount * strided_range(1 / deflator_before))
+
+    keep = complete & (nominal_invested > 0)
+    starts, ends = starts[keep], ends[keep]
+    final, invested = final[keep], invested[keep]
+    nominal_final, nominal_invested = nominal_final[keep], nominal_invested[keep]
+    if len(starts) == 0:
+        return None
+
+    # Annualized return of the nominal cash flows: CAGR for a lump sum, IRR with contributions
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        if contributions:
+            annualized = _money_weighted_return(initial, addition_amount, step, contributions,
+                                                holding_months, nominal_final)
+        else:
+            annualized = (nominal_final / nominal_invested) ** (12 / holding_months) - 1
+
+    start_labels = months[starts].strftime('%Y-%m')
+    order = np.argsort(final / invested, kind='stable')
+    return {
+        'windows': {
+            'start': start_labels.tolist(),
+            'end': months[ends].strftime('%Y-%m').tolist(),
+            'invested': np.round(invested, 2).tolist(),
+            'final': np.round(final, 2).tolist(),
+            'annualized_return': np.round(annualized * 100, 2).tolist()
+        },
+        'summary': {
+            'count': int(len(starts)),
+            'worst': _window_summary(order[0], start_labels, final, invested, annualized),
+            'best': _window_summary(order[-1], start_labels, final, invested, annualized),
+            'annualized_return_percentiles': {
+                f"{p:g}": round(float(value) * 100, 2)
+                for p, value in zip(SUMMARY_PERCENTILES, np.percentile(annualized, SUMMARY_PERCENTILES))
+            },
+            'loss_probability': round(float(np.mean(final < invested)), 4)
+        }
+    }
+
+
+def _strided_cumsum(values, step):
+    """``out[k] = values[k] + values[k - step] + ...`` in one pass per residue"""
+    padded = np.concatenate([np.zeros(step, dtype=values.dtype), values])
+    columns = len(padded) // step + 1
+    grid = np.zeros(columns * step, dtype=values.dtype)
+    grid[:len(padded)] = padded
+    out = np.cumsum(grid.reshape(columns, step), axis=0).reshape(-1)[:len(padded)]
+    return out[step:]
+
+
+def _money_weighted_return(initial, amount, step, contributions, holding_months, final):
+    """
+    Annualized IRR of each DCA window, by bisection on the monthly rate over all
+    windows at once; the contribution annuity has a closed form, so every step
+    is O(1) per window.
+    """
+    def npv(rate):
+        discount = 1 / (1 + rate)
+        stride = discount ** step
+        annuity = stride * (1 - stride ** contributions) / (1 - stride)
+        return final * discount ** holding_months - (initial + amount * annuity)
+
+    low = np.full(len(final), -0.99)
+    high = np.full(len(final), 1.0)
+    for _ in range(IRR_ITERATIONS):
+        middle = (low + high) / 2
+        positive = npv(middle) > 0
+        low = np.where(positive, middle, low)
+        high = np.where(positive, high, middle)
+    return (1 + (low + high) / 2) ** 12 - 1
+
+
+def _window_summary(index, start_labels, final, invested, annualized):
+    return {
+        'start': start_labels[index],
+        'final': round(float(final[index]), 2),
+        'invested': round(float(invested[index]), 2),
+        'annualized_return': round(float(annualized[index]) * 100, 2)
+    }
@@ -0,0 +1,167 @@
+# services/scenario_service.py
+import logging
+import numpy as np
+import pandas as pd
+from .data_service import (
+    MONTHLY_FREQUENCY,
+    ANNUALLY_FREQUENCY,
+    compute_growth_arrays,
+    as_month_end,
+    _inflation_factors,
+    _to_monthly_records
+)
+from .inflation_service import DEFAULT_COUNTRY
+
+logger = logging.getLogger(__name__)
+
+# Scenario x symbol x month cells per vectorized evaluation (16 MB per float64 array)
+MAX_CHUNK_CELLS = 2_000_000
+
+
+def evaluate_scenarios(stocks, scenarios, inflation_tables=None):
+    """
+    Evaluate many parameter sets against one set of month-end prices.
+
+    ``stocks`` maps symbols to month-end frames (or daily series) covering every
+    scenario's range. Each scenario is a dict with ``id``, ``initial``,
+    ``start_year``, ``end_year``, ``addition_amount``, ``addition_frequency``,
+    ``adjust_for_inflation``, ``stocks`` and optionally ``inflation_country``;
+    ``inflation_tables`` maps countries to ``InflationTable``s. Scenarios run through
+    ``compute_growth_arrays`` as (scenarios x symbols x months) computations of at
+    most ``MAX_CHUNK_CELLS`` cells each.
+
+    Returns a dict of scenario id -> ``generate_data_points``-shaped results.
+    """
+    logger.info(f"Evaluating {len(scenarios)} scenarios over {len(stocks)} symbols")
+    if not scenarios:
+        return {}
+
+    aligned = align_month_end(stocks)
+    month_ends, symbols = aligned[0], aligned[1]
+    if not symbols:
+        return {scenario['id']: [] for scenario in scenarios}
+
+    chunk_size = max(1, MAX_CHUNK_CELLS // (len(symbols) * len(month_ends)))
+    results = {}
+    for i in range(0, len(scenarios), chunk_size):
+        chunk = scenarios[i:i + chunk_size]
+        arrays = scenario_growth_arrays(aligned, chunk, inflation_tables)
+        for k, scenario in enumerate(chunk):
+            results[scenario['id']] = _to_monthly_records(
+                month_ends,
+                symbols,
+                {field: values[k] for field, values in arrays.items()}
+            )
+    logger.info("Scenario evaluation completed")
+    return results
+
+
+def scenario_growth_arrays(aligned, scenarios, inflation_tables=None):
+    """
+    Raw ``compute_growth_arrays`` output of shape (scenarios, symbols, months)
+    for prices already stacked by ``align_month_end``.
+    """
+    month_ends, symbols, close, anchor, first_close = aligned
+    params = _scenario_arrays(scenarios, symbols, month_ends, inflation_tables)
+    years = month_ends.year.to_numpy()
+
+    # (K, S, M): prices only inside each scenario's window and stock selection
+    in_window = (years >= params['start_year'][:, None]) & (years < params['end_year'][:, None])
+    selected = params['selected'][:, :, None] & in_window[:, None, :]
+    scenario_close = np.where(selected, close, np.nan)
+
+    # Start price: first close of the first trading month on or after January of start_year
+    after_start = ~np.isnan(close) & (years >= params['start_year'][:, None, None])
+    first_index = np.argmax(after_start, axis=-1)
+    start_prices = np.where(
+        after_start.any(axis=-1),
+        np.take_along_axis(np.broadcast_to(first_close, after_start.shape), first_index[..., None], axis=-1)[..., 0],
+        np.nan
+    )
+
+    return compute_growth_arrays(
+        scenario_close,
+        anchor,
+        start_prices[..., None],
+        params['initial'][:, None, None],
+        params['contributions'][:, None, :],
+        params['deflators'][:, None, :],
+        grow_contributions=params['grow'][:, None, None]
+    )
+
+
+def align_month_end(stocks):
+    """
+    Stack every symbol's month-end columns on the union of month ends.
+
+    Returns ``(month_ends, symbols, close, anchor_close, first_close)`` with one
+    (symbols x months) array per column.
+    """
+    frames = {symbol: as_month_end(data) for symbol, data in stocks.items()}
+    frames = {symbol: frame for symbol, frame in frames.items() if len(frame) > 0}
+    if not frames:
+        empty = np.empty((0, 0))
+        return pd.DatetimeIndex([]), [], empty, empty, empty
+
+    month_ends = frames[next(iter(frames))].index
+    for frame in frames.values():
+        month_ends = month_ends.union(frame.index)
+
+    symbols = list(frames)
+
+    def stack(column):
+        return np.vstack([
+            frames[symbol][column].reindex(month_ends).to_numpy(dtype=np.float64)
+            for symbol in symbols
+        ])
+
+    return month_ends, symbols, stack('close'), stack('anchor_close'), stack('first_close')
+
+
+def _scenario_arrays(scenarios, symbols, month_ends, inflation_tables):
+    """Per-scenario parameter vectors and (scenario x month) schedules"""
+    years = month_ends.year.to_numpy()
+    months = month_ends.month.to_numpy()
+
+    start_year = np.array([s['start_year'] for s in scenarios])
+    end_year = np.array([s['end_year'] for s in scenarios])
+    amount = np.array([float(s['addition_amount']) for s in scenarios])
+    frequency = np.array([s['addition_frequency'] for s in scenarios])
+    adjust = np.array([bool(s['adjust_for_inflation']) for s in scenarios])
+
+    after_first_month = (years > start_year[:, None]) | (months > 1)
+    new_year = (months == 1) & (years > start_year[:, None])
+    contributes = np.where(
+        (frequency == MONTHLY_FREQUENCY)[:, None],
+        after_first_month,
+        (frequency == ANNUALLY_FREQUENCY)[:, None] & new_year
+    )
+
+    # One December deflator row per country, shared by its scenarios
+    inflation_tables = inflation_tables or {}
+    country_factors = {}
+    deflators = np.ones((len(scenarios), len(month_ends)))
+    for k, scenario in enumerate(scenarios):
+        if not adjust[k]:
+            continue
+        country = scenario.get('inflation_country', DEFAULT_COUNTRY)
+        if country not in country_factors:
+            country_factors[country] = _inflation_factors(month_ends, inflation_tables.get(country))
+        deflators[k] = country_factors[country]
+
+    symbol_index = {symbol: i for i, symbol in enumerate(symbols)}
+    selected = np.zeros((len(scenarios), len(symbols)), dtype=bool)
+    for k, scenario in enumerate(scenarios):
+        for symbol in scenario['stocks']:
+            if symbol in symbol_index:
+                selected[k, symbol_index[symbol]] = True
+
+    return {
+        'initial': np.array([float(s['initial']) for s in scenarios]),
+        'start_year': start_year,
+        'end_year': end_year,
+        'contributions': np.where(contributes, amount[:, None], 0.0),
+        'deflators': deflators,
+        'grow': frequency == MONTHLY_FREQUENCY,
+        'selected': selected
+    }
@@ -0,0 +1,135 @@
+# services/singleflight_service.py
+import logging
+import threading
+import time
+from .cache_service import cache
+
+logger = logging.getLogger(__name__)
+
+# How long a worker may hold a shared flight before others stop waiting for it
+FLIGHT_TIMEOUT = 60
+POLL_INTERVAL = 0.05
+
+
+class _Call:
+    """One in-flight computation that other threads can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent computations of the same keys onto one caller.
+
+    Within a process the first thread to ask for a key computes it and every
+    other thread asking meanwhile waits for that result. Across workers the
+    owner also takes a lock in the shared cache (``cache.add``), and workers
+    that lose the race poll for the result instead of computing it again:
+    either through ``lookup`` (when the computation fills a cache of its own)
+    or through a short-lived copy of the result the owner publishes.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, compute, lookup=None):
+        """Result of ``compute()`` for ``key``, shared with concurrent callers"""
+        return self.do_many([key], lambda keys: {key: compute()}, lookup)[key]
+
+    def do_many(self, keys, compute, lookup=None):
+        """
+        Results for ``keys`` as a dict. ``compute(owned_keys)`` is called at most
+        once, with only the keys no other caller is already computing, and must
+        return a dict for them. ``lookup(keys)`` returns whatever results are
+        already available elsewhere (missing keys left out).
+        """
+        owned, joined = {}, {}
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                call = self._calls.get(key)
+                if call is None:
+                    owned[key] = self._calls[key] = _Call()
+                else:
+                    joined[key] = call
+        if joined:
+            logger.info(f"Joining {len(joined)} in-flight {self.name} computations")
+
+        results = {}
+        try:
+            if owned:
+                results.update(self._compute_shared(list(owned), compute, lookup))
+        except Exception as e:
+            for call in owned.values():
+                call.error = e
+            raise
+        finally:
+            with self._lock:
+                for key, call in owned.items():
+                    call.value = results.get(key)
+                    del self._calls[key]
+                    call.done.set()
+
+        for key, call in joined.items():
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            results[key] = call.value
+        return results
+
+    def _compute_shared(self, keys, compute, lookup):
+        """Compute ``keys`` under shared-cache locks, waiting on other workers' locks"""
+        locked = [key for key in keys if cache.add(self._lock_key(key), 1, timeout=FLIGHT_TIMEOUT)]
+        elsewhere = [key for key in keys if key not in set(locked)]
+        results = {}
+        try:
+            if locked:
+                results.update(compute(locked))
+                if lookup is None:
+                    cache.set_many({self._result_key(key): results.get(key) for key in locked},
+                                   timeout=FLIGHT_TIMEOUT)
+        finally:
+            if locked:
+                cache.delete_many(*[self._lock_key(key) for key in locked])
+
+        if elsewhere:
+            logger.info(f"Waiting on {len(elsewhere)} {self.name} computations in other workers")
+            results.update(self._wait_elsewhere(elsewhere, lookup))
+            leftover = [key for key in elsewhere if key not in results]
+            if leftover:
+                results.update(compute(leftover))
+        return results
+
+    def _wait_elsewhere(self, keys, lookup):
+        """Poll for results of flights owned by other workers until they land or the locks go"""
+        results = {}
+        pending = list(keys)
+        deadline = time.monotonic() + FLIGHT_TIMEOUT
+        while pending and time.monotonic() < deadline:
+            results.update(self._lookup(pending, lookup))
+            pending = [key for key in pending if key not in results]
+            if not pending:
+                break
+            held = cache.get_many(*[self._lock_key(key) for key in pending])
+            if not any(held):
+                # Owners finished or gave up; pick up anything published on the way out
+                results.update(self._lookup(pending, lookup))
+                break
+            time.sleep(POLL_INTERVAL)
+        return results
+
+    def _lookup(self, keys, lookup):
+        if lookup is not None:
+            return lookup(keys)
+        values = cache.get_many(*[self._result_key(key) for key in keys])
+        return {key: value for key, value in zip(keys, values) if value is not None}
+
+    def _lock_key(self, key):
+        return f"singleflight:{self.name}:lock:{key}"
+
+    def _result_key(self, key):
+        return f"singleflight:{self.name}:result:{key}"
@@ -1,26 +1,155 @@
+import bisect
 import json
+import logging
 import os
-from flask import current_app
+import re
+import threading
+from flask import current_app, has_app_context
 
-def load_stock_data():
-    """Load stock data from JSON file"""
+logger = logging.getLogger(__name__)
+
+DEFAULT_SEARCH_LIMIT = 50
+
+# Substring matches use trigram postings; shorter queries scan the (short) names directly
+GRAM_SIZE = 3
+
+_index = {'path': None, 'mtime': None, 'value': None}
+_index_lock = threading.Lock()
+
+
+class StockIndex:
+    """
+    In-memory search index over the stock universe.
+
+    - a prefix trie on lower-cased symbols
+    - a sorted word list for name word-prefix lookups
+    - trigram postings over symbol and name for substring matches, with a
+      linear scan for one- and two-character queries
+
+    Results are ranked: exact symbol, symbol prefix, name word prefix,
+    then any other substring match; ties keep file order.
+    """
+
+    def __init__(self, stocks):
+        self.stocks = stocks
+        self._symbols = [stock['symbol'].lower() for stock in stocks]
+        self._names = [stock['name'].lower() for stock in stocks]
+
+        self._trie = {}
+        for i, symbol in enumerate(self._symbols):
+            node = self._trie
+            for char in symbol:
+                node = node.setdefault(char, {})
+            node.setdefault(None, []).append(i)
+
+        self._words = sorted(
+            (word, i)
+            for i, name in enumerate(self._names)
+            for word in set(re.findall(r'\w+', name))
+        )
+
+        self._grams = {}
+        for i, (symbol, name) in enumerate(zip(self._symbols, self._names)):
+            text = f"{symbol}\n{name}"
+            for gram in {text[j:j + GRAM_SIZE] for j in range(len(text) - GRAM_SIZE + 1)}:
+                self._grams.setdefault(gram, []).append(i)
+
+    def _symbol_prefix(self, query):
+        node = self._trie
+        for char in query:
+            node = node.get(char)
+            if node is None:
+                return []
+        matches = []
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            for key, child in node.items():
+                if key is None:
+                    matches.extend(child)
+                else:
+                    stack.append(child)
+        return matches
+
+    def _name_word_prefix(self, query):
+        start = bisect.bisect_left(self._words, (query, -1))
+        matches = []
+        for word, i in self._words[start:]:
+            if not word.startswith(query):
+                break
+            matches.append(i)
+        return matches
+
+    def _substring(self, query):
+        """Lazily yield substring matches in file order"""
+        if len(query) < GRAM_SIZE:
+            candidates = range(len(self.stocks))
+        else:
+            grams = [query[j:j + GRAM_SIZE] for j in range(len(query) - GRAM_SIZE + 1)]
+            candidates = min((self._grams.get(gram, []) for gram in grams), key=len)
+        for i in candidates:
+            if query in self._symbols[i] or query in self._names[i]:
+                yield i
+
+    def search(self, query, limit=DEFAULT_SEARCH_LIMIT):
+        query = query.strip().lower()
+        if not query:
+            return []
+
+        prefix = self._symbol_prefix(query)
+        tiers = [
+            sorted(i for i in prefix if self._symbols[i] == query),
+            sorted(i for i in prefix if self._symbols[i] != query),
+            sorted(set(self._name_word_prefix(query))),
+            self._substring(query)
+        ]
+
+        # Fill tier by tier and stop as soon as the limit is reached
+        seen = set()
+        ordered = []
+        for tier in tiers:
+            for i in tier:
+                if i in seen:
+                    continue
+                seen.add(i)
+                ordered.append(i)
+                if limit is not None and len(ordered) >= limit:
+                    return [self.stocks[i] for i in ordered]
+        return [self.stocks[i] for i in ordered]
+
+
+def _data_path():
+    if has_app_context():
+        return os.path.join(current_app.config['DATA_DIR'], 'stock_list.json')
+    return os.path.join(os.path.dirname(__file__), 'data', 'stock_list.json')
+
+
+def get_stock_index():
+    """Return the search index, rebuilding it when the stock list file changes"""
+    path = _data_path()
     try:
-        file_path = os.path.join(current_app.config['DATA_DIR'], 'stock_list.json')
-        with open(file_path, 'r') as f:
-            data = json.load(f)
-            return data['stocks']
+        mtime = os.stat(path).st_mtime_ns
+        if _index['path'] == path and _index['mtime'] == mtime:
+            return _index['value']
+        with _index_lock:
+            if _index['path'] != path or _index['mtime'] != mtime:
+                with open(path, 'r') as f:
+                    stocks = json.load(f)['stocks']
+                _index.update(path=path, mtime=mtime, value=StockIndex(stocks))
+                logger.info(f"Built stock search index for {len(stocks)} symbols")
+            return _index['value']
     except Exception as e:
-        current_app.logger.error(f"Error loading stock data: {str(e)}")
-        return []
+        logger.error(f"Error loading stock data: {str(e)}")
+        return StockIndex([])
+
+
+def load_stock_data():
+    """Load stock data from JSON file"""
+    return get_stock_index().stocks
 
 def get_stock_list():
     return load_stock_data()
 
-def search_stocks(query):
-    """Search stocks by symbol or name"""
-    stocks = load_stock_data()
-    query = query.lower()
-    return [
-        stock for stock in stocks
-        if query in stock['symbol'].lower() or query in stock['name'].lower()
-    ]
\ No newline at end of file
+def search_stocks(query, limit=DEFAULT_SEARCH_LIMIT):
+    """Search stocks by symbol or name, best matches first"""
+    return get_stock_index().search(query, limit)
@@ -1,118 +1,450 @@
-import yfinance as yf
-import pandas as pd
-from .cache_service import cache
-import logging
-
-import yfinance as yf
+import numpy as np
 import pandas as pd
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from flask import current_app, has_app_context
 from .cache_service import cache
+from .logging_service import log_event
+from .metrics_service import count_cache
+from .price_codec import decode_price_entry, encode_price_entry
+from .price_providers import get_price_provider
+from .price_store import get_price_store
+from .resample_service import month_end_frame, year_end_series
+from .singleflight_service import SingleFlight
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
-@cache.memoize(timeout=3600)  # Cache for 1 hour
+# Per-symbol cache lifetimes; misses on unknown tickers are kept for a shorter time
+PRICE_CACHE_TIMEOUT = 3600  # Cache for 1 hour
+INVALID_CACHE_TIMEOUT = 300
+
+# Concurrent requests missing the same (symbol, range) share one download
+_price_flights = SingleFlight('prices')
+
+
 def fetch_stock_data_batch(symbols, start_year, end_year):
     """
     Fetch historical data for multiple stock symbols, handling NaN values appropriately.
+
+    Every (symbol, range) pair is cached on its own, so overlapping portfolios share
+    entries and only the symbols that actually miss go into one batched download.
+    Symbols another request is already downloading are waited for, not fetched again.
+    """
+    symbols = list(dict.fromkeys(symbols))
+
+    keys = [_cache_key(symbol, start_year, end_year) for symbol in symbols]
+    entries = dict(zip(symbols, _cache_get_many(keys)))
+    missing = [symbol for symbol in symbols if entries.get(symbol) is None]
+    log_event(logger, 'prices.fetch', symbols=len(symbols), years=f"{start_year}-{end_year}",
+              hits=len(symbols) - len(missing), misses=len(missing))
+    count_cache('prices', hits=len(symbols) - len(missing), misses=len(missing))
+
+    if missing:
+        symbol_of = {_cache_key(symbol, start_year, end_year): symbol for symbol in missing}
+
+        def download(owned_keys):
+            fetched = _fetch_and_cache([symbol_of[key] for key in owned_keys], start_year, end_year)
+            return {key: fetched[symbol_of[key]] for key in owned_keys}
+
+        def cached(waited_keys):
+            return {key: entry for key, entry in zip(waited_keys, _cache_get_many(waited_keys)) if entry is not None}
+
+        flown = _price_flights.do_many(list(symbol_of), download, lookup=cached)
+        entries.update({symbol_of[key]: entry for key, entry in flown.items()})
+
+    result = {}
+    invalid_symbols = []
+    data_issues = {}
+    for symbol in symbols:
+        series, issue = entries[symbol]
+        if series is not None:
+            result[symbol] = series
+        else:
+            invalid_symbols.append(symbol)
+        if issue is not None:
+            data_issues[symbol] = issue
+
+    log_event(logger, 'prices.fetched', valid=len(result), invalid=len(invalid_symbols), issues=len(data_issues))
+    logger.debug('Data issues found: %s', data_issues)
+
+    return result, invalid_symbols, data_issues
+
+
+def fetch_month_end_batch(symbols, start_year, end_year):
+    """
+    Month-end price frames (see ``resample_service.month_end_frame``) for ``symbols``.
+
+    Same ``(result, invalid_symbols, data_issues)`` contract as ``fetch_stock_data_batch``.
+    """
+    return _fetch_resampled_batch(symbols, start_year, end_year, 'ME')
+
+
+def fetch_year_end_batch(symbols, start_year, end_year):
+    """Year-end close series for ``symbols``"""
+    return _fetch_resampled_batch(symbols, start_year, end_year, 'YE')
+
+
+def _fetch_resampled_batch(symbols, start_year, end_year, resolution):
+    """
+    Serve a resampled resolution from the cache, materializing both month-end and
+    year-end series from the daily data the first time a symbol is requested.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    keys = [_cache_key(symbol, start_year, end_year, resolution) for symbol in symbols]
+    entries = dict(zip(symbols, _cache_get_many(keys)))
+    missing = [symbol for symbol in symbols if entries.get(symbol) is None]
+    count_cache('resampled', hits=len(symbols) - len(missing), misses=len(missing))
+
+    if missing:
+        daily, _, daily_issues = fetch_stock_data_batch(missing, start_year, end_year)
+        dtype = _price_dtype()
+        materialized = {}
+        for symbol in missing:
+            series = daily.get(symbol)
+            issue = daily_issues.get(symbol)
+            if series is None:
+                entries[symbol] = (None, issue)
+                continue
+            frames = _resampled_entries(series, issue, dtype)
+            entries[symbol] = frames[resolution]
+            for name, entry in frames.items():
+                materialized[_cache_key(symbol, start_year, end_year, name)] = entry
+        if materialized:
+            _cache_set_many(materialized, timeout=PRICE_CACHE_TIMEOUT)
+
+    result = {}
+    invalid_symbols = []
+    data_issues = {}
+    for symbol in symbols:
+        frame, issue = entries[symbol]
+        if frame is not None and len(frame) > 0:
+            result[symbol] = frame
+        else:
+            invalid_symbols.append(symbol)
+        if issue is not None:
+            data_issues[symbol] = issue
+    return result, invalid_symbols, data_issues
+
+
+def refresh_prices(symbols, start_year, end_year):
+    """
+    Download ``symbols`` again and overwrite their cached daily, month-end and
+    year-end entries for the range, restarting their lifetimes. With the price
+    store enabled only bars newer than it holds go upstream.
+
+    Returns the symbols that came back without prices.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    entries = _fetch_and_cache(symbols, start_year, end_year)
+    dtype = _price_dtype()
+    materialized = {}
+    for symbol, (series, issue) in entries.items():
+        if series is None:
+            continue
+        for name, entry in _resampled_entries(series, issue, dtype).items():
+            materialized[_cache_key(symbol, start_year, end_year, name)] = entry
+    if materialized:
+        _cache_set_many(materialized, timeout=PRICE_CACHE_TIMEOUT)
+    return [symbol for symbol in symbols if entries[symbol][0] is None]
+
+
+def _resampled_entries(series, issue, dtype):
+    """Month-end and year-end cache entries derived from a daily close series"""
+    return {
+        'ME': (month_end_frame(series, dtype=dtype), issue),
+        'YE': (year_end_series(series, dtype=dtype), issue)
+    }
+
+
+def _cache_key(symbol, start_year, end_year, resolution='D'):
+    if resolution == 'D':
+        return f"prices:{symbol}:{start_year}:{end_year}"
+    return f"prices:{resolution}:{symbol}:{start_year}:{end_year}"
+
+
+def _cache_get_many(keys):
+    """Cached ``(prices, issue)`` entries for ``keys``, None where missing"""
+    if not keys:
+        return []
+    return [decode_price_entry(blob) if blob is not None else None for blob in cache.get_many(*keys)]
+
+
+def _cache_set_many(entries, timeout):
+    """Store ``(prices, issue)`` entries with the price codec instead of pickling pandas objects"""
+    cache.set_many({key: encode_price_entry(entry) for key, entry in entries.items()}, timeout=timeout)
+
+
+def _price_dtype():
+    """Storage dtype for cached prices (``PRICE_DTYPE`` config, float64 by default)"""
+    if has_app_context():
+        return np.dtype(current_app.config.get('PRICE_DTYPE', 'float64'))
+    return np.dtype('float64')
+
+
+def _fetch_and_cache(symbols, start_year, end_year):
+    """Fetch symbols that missed the cache and store one entry per symbol"""
+    try:
+        result, invalid_symbols, data_issues = _fetch_uncached(symbols, start_year, end_year)
+    except Exception as e:
+        logger.error(f"Error fetching batch stock data: {str(e)}")
+        return {symbol: (None, None) for symbol in symbols}
+
+    valid_entries = {}
+    invalid_entries = {}
+    entries = {}
+    for symbol in symbols:
+        series = result.get(symbol)
+        if series is not None:
+            series = series.astype(_price_dtype())
+        entry = (series, data_issues.get(symbol))
+        entries[symbol] = entry
+        key = _cache_key(symbol, start_year, end_year)
+        if entry[0] is not None:
+            valid_entries[key] = entry
+        elif entry[1] is None or entry[1].get('status') != 'error':
+            invalid_entries[key] = entry
+
+    if valid_entries:
+        _cache_set_many(valid_entries, timeout=PRICE_CACHE_TIMEOUT)
+    if invalid_entries:
+        _cache_set_many(invalid_entries, timeout=INVALID_CACHE_TIMEOUT)
+    return entries
+
+
+def _fetch_uncached(symbols, start_year, end_year):
+    """
+    Download ``symbols`` from upstream. When the local price store is enabled only
+    the date ranges it does not cover yet are downloaded; everything is then
+    sliced out of the store.
     """
-    logger.info(f"Fetching batch stock data for symbols: {symbols}")
-    
     start_date = f"{start_year}-01-01"
     end_date = f"{end_year}-12-31"
-    
-    try:
-        symbols_str = " ".join(symbols)
-        data = yf.download(
-            tickers=symbols_str,
-            start=start_date,
-            end=end_date,
-            interval="1d",
-            group_by='ticker',
-            auto_adjust=True
-        )
-        
+
+    store = get_price_store()
+    if store is None:
+        return _download_and_parse(symbols, start_date, end_date)
+    return _fetch_through_store(store, symbols, start_date, end_date)
+
+
+def _download(symbols, start_date, end_date, provider=None):
+    """Download daily bars for ``symbols`` from the configured price provider"""
+    provider = provider or get_price_provider()
+    return provider.download(symbols, start_date, end_date)
+
+
+def _download_and_parse(symbols, start_date, end_date):
+    """
+    Download ``symbols`` in chunks of ``FETCH_CHUNK_SIZE`` on up to
+    ``FETCH_MAX_WORKERS`` threads and merge the parsed chunks into one
+    ``(result, invalid_symbols, data_issues)`` triple. Each chunk gets
+    ``FETCH_TIMEOUT`` seconds from when a worker picks it up; a failing or
+    timed-out chunk only invalidates its own symbols.
+    """
+    chunk_size, max_workers, timeout = _fetch_settings()
+    provider = get_price_provider()
+    chunks = [symbols[i:i + chunk_size] for i in range(0, len(symbols), chunk_size)]
+    started_at = {}
+
+    def fetch_chunk(index):
+        started_at[index] = time.monotonic()
+        chunk = chunks[index]
+        data = _download(chunk, start_date, end_date, provider)
         logger.debug(f"Downloaded data length: {len(data)}")
-        
-        result = {}
-        invalid_symbols = []
-        data_issues = {}
-        
-        # Handle single stock case
-        if len(symbols) == 1:
-            symbol = symbols[0]
-            if isinstance(data, pd.DataFrame) and not data['Close'].isnull().all():
-                close_data = data['Close'].dropna()  # Remove NaN values
-                if len(close_data) > 0:  # Only include if we have valid data
-                    result[symbol] = close_data
-                    result[symbol].index = pd.to_datetime(result[symbol].index.date)
-                    logger.debug(f"Processed single stock data for {symbol}")
-                else:
+        return _parse_download(data, chunk)
+
+    if len(chunks) == 1:
+        return fetch_chunk(0)
+
+    result = {}
+    invalid_symbols = []
+    data_issues = {}
+    workers = min(max_workers, len(chunks))
+    executor = ThreadPoolExecutor(max_workers=workers)
+    futures = {executor.submit(fetch_chunk, index): index for index in range(len(chunks))}
+    pending = set(futures)
+    abandoned = set()
+    try:
+        while pending:
+            deadlines = [started_at[futures[f]] + timeout for f in pending if futures[f] in started_at]
+            wait_for = max(0.0, min(deadlines) - time.monotonic()) if deadlines else timeout
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                chunk = chunks[futures[future]]
+                try:
+                    chunk_result, chunk_invalid, chunk_issues = future.result()
+                except Exception as e:
+                    logger.error(f"Error fetching chunk {chunk}: {str(e)}")
+                    chunk_result, chunk_invalid = {}, list(chunk)
+                    chunk_issues = {symbol: {'status': 'error', 'error': str(e)} for symbol in chunk}
+                result.update(chunk_result)
+                invalid_symbols.extend(chunk_invalid)
+                data_issues.update(chunk_issues)
+
+            now = time.monotonic()
+            expired = {f for f in pending if futures[f] in started_at and now >= started_at[futures[f]] + timeout}
+            abandoned = {f for f in abandoned if not f.done()} | expired
+            if len(abandoned) >= workers:
+                # Every worker is stuck on a timed-out chunk: the queued ones would never start
+                expired |= pending
+            for future in expired:
+                future.cancel()
+                for symbol in chunks[futures[future]]:
                     invalid_symbols.append(symbol)
-                    data_issues[symbol] = {
-                        'status': 'no_data',
-                        'error': 'No valid data points found'
-                    }
+                    data_issues[symbol] = {'status': 'error', 'error': f'Download timed out after {timeout}s'}
+            if expired:
+                logger.error(f"{len(expired)} download chunks timed out after {timeout}s")
+            pending -= expired
+    finally:
+        executor.shutdown(wait=False)
+
+    # Keep the caller's symbol order
+    order = {symbol: i for i, symbol in enumerate(symbols)}
+    result = {symbol: result[symbol] for symbol in sorted(result, key=order.get)}
+    invalid_symbols.sort(key=order.get)
+    return result, invalid_symbols, data_issues
+
+
+def _fetch_settings():
+    """Chunk size, worker count and per-chunk timeout for upstream downloads"""
+    if has_app_context():
+        config = current_app.config
+        return (
+            max(1, config.get('FETCH_CHUNK_SIZE', 25)),
+            max(1, config.get('FETCH_MAX_WORKERS', 4)),
+            config.get('FETCH_TIMEOUT', 30)
+        )
+    return 25, 4, 30
+
+
+def _fetch_through_store(store, symbols, start_date, end_date):
+    """
+    Fetch only uncovered ranges into the price store, then read the request from it.
+    A symbol whose stored prices turn out to be re-adjusted upstream is fetched again.
+    """
+    fetch_issues = {}
+    outdated = list(symbols)
+    for _ in range(2):
+        # Symbols missing the same ranges can share one download
+        pending = {}
+        for symbol in outdated:
+            for missing in store.missing_ranges(symbol, start_date, end_date, overlap=True):
+                pending.setdefault(missing, []).append(symbol)
+
+        outdated = []
+        for (range_start, range_end), group in pending.items():
+            logger.info(f"Fetching {range_start} - {range_end} for {group}")
+            fetched, _, issues = _download_and_parse(group, range_start, range_end)
+            for symbol in group:
+                series = fetched.get(symbol)
+                if series is not None:
+                    if not store.write(symbol, series, range_start, range_end):
+                        outdated.append(symbol)
+                elif issues.get(symbol, {}).get('status') != 'error' and store.coverage(symbol) is not None:
+                    # Nothing traded in the range (a weekend top-up, days before the listing):
+                    # mark it covered so it is not downloaded again
+                    store.write(symbol, pd.Series(dtype=np.float64, index=pd.DatetimeIndex([])), range_start, range_end)
+            for symbol, issue in issues.items():
+                fetch_issues.setdefault(symbol, []).append(issue)
+        if not outdated:
+            break
+
+    result = {}
+    invalid_symbols = []
+    data_issues = {}
+    for symbol in symbols:
+        series = store.read(symbol, start_date, end_date)
+        if len(series) > 0:
+            result[symbol] = series
+            # Empty ranges around valid data are not worth a warning, gaps in returned data are
+            partial = [issue for issue in fetch_issues.get(symbol, []) if issue.get('status') == 'partial_data']
+            if partial:
+                data_issues[symbol] = partial[0]
+        else:
+            invalid_symbols.append(symbol)
+            data_issues[symbol] = fetch_issues.get(symbol, [{
+                'status': 'no_data',
+                'error': 'No valid data points found'
+            }])[-1]
+    return result, invalid_symbols, data_issues
+
+
+def _parse_download(data, symbols):
+    """Split a ``yf.download`` frame into per-symbol close series"""
+    result = {}
+    invalid_symbols = []
+    data_issues = {}
+
+    # Handle single stock case
+    if len(symbols) == 1:
+        symbol = symbols[0]
+        if isinstance(data.columns, pd.MultiIndex) and symbol in data.columns.levels[0]:
+            data = data[symbol]
+        if isinstance(data, pd.DataFrame) and 'Close' in data and not data['Close'].isnull().all():
+            close_data = data['Close'].dropna()  # Remove NaN values
+            if len(close_data) > 0:  # Only include if we have valid data
+                result[symbol] = close_data
+                result[symbol].index = pd.to_datetime(result[symbol].index.date)
+                logger.debug(f"Processed single stock data for {symbol}")
             else:
                 invalid_symbols.append(symbol)
                 data_issues[symbol] = {
                     'status': 'no_data',
-                    'error': 'Invalid or missing data'
+                    'error': 'No valid data points found'
                 }
-            
-        # Handle multiple stocks case
         else:
-            for symbol in symbols:
-                try:
-                    if symbol in data.columns.levels[0]:
-                        stock_data = data[symbol]['Close'].dropna()  # Remove NaN values
-                        
-                        # Calculate data quality metrics
-                        total_original = len(data[symbol]['Close'])
-                        valid_points = len(stock_data)
-                        null_points = total_original - valid_points
-                        
-                        if valid_points > 0:  # If we have any valid points
-                            result[symbol] = stock_data
-                            result[symbol].index = pd.to_datetime(result[symbol].index.date)
-                            
-                            # Record data quality information
-                            if null_points > 0:
-                                data_issues[symbol] = {
-                                    'total_points': int(total_original),
-                                    'valid_points': int(valid_points),
-                                    'null_points': int(null_points),
-                                    'null_percentage': float((null_points/total_original) * 100),
-                                    'first_valid_date': stock_data.index[0].strftime('%Y-%m-%d'),
-                                    'last_valid_date': stock_data.index[-1].strftime('%Y-%m-%d'),
-                                    'status': 'partial_data'
-                                }
-                        else:
-                            invalid_symbols.append(symbol)
+            invalid_symbols.append(symbol)
+            data_issues[symbol] = {
+                'status': 'no_data',
+                'error': 'Invalid or missing data'
+            }
+
+    # Handle multiple stocks case
+    else:
+        for symbol in symbols:
+            try:
+                if symbol in data.columns.levels[0]:
+                    stock_data = data[symbol]['Close'].dropna()  # Remove NaN values
+
+                    # Calculate data quality metrics
+                    total_original = len(data[symbol]['Close'])
+                    valid_points = len(stock_data)
+                    null_points = total_original - valid_points
+
+                    if valid_points > 0:  # If we have any valid points
+                        result[symbol] = stock_data
+                        result[symbol].index = pd.to_datetime(result[symbol].index.date)
+
+                        # Record data quality information
+                        if null_points > 0:
                             data_issues[symbol] = {
                                 'total_points': int(total_original),
-                                'valid_points': 0,
-                                'null_points': int(total_original),
-                                'status': 'no_valid_data'
+                                'valid_points': int(valid_points),
+                                'null_points': int(null_points),
+                                'null_percentage': float((null_points/total_original) * 100),
+                                'first_valid_date': stock_data.index[0].strftime('%Y-%m-%d'),
+                                'last_valid_date': stock_data.index[-1].strftime('%Y-%m-%d'),
+                                'status': 'partial_data'
                             }
                     else:
                         invalid_symbols.append(symbol)
                         data_issues[symbol] = {
-                            'status': 'no_data',
-                            'error': 'Symbol not found in data'
+                            'total_points': int(total_original),
+                            'valid_points': 0,
+                            'null_points': int(total_original),
+                            'status': 'no_valid_data'
                         }
-                except Exception as e:
+                else:
                     invalid_symbols.append(symbol)
                     data_issues[symbol] = {
-                        'status': 'error',
-                        'error': str(e)
+                        'status': 'no_data',
+                        'error': 'Symbol not found in data'
                     }
+            except Exception as e:
+                invalid_symbols.append(symbol)
+                data_issues[symbol] = {
+                    'status': 'error',
+                    'error': str(e)
+                }
 
-        logger.info(f"Successfully fetched data for {len(result)} stocks")
-        logger.info(f"Data issues found: {data_issues}")
-        logger.info(f"Invalid symbols: {invalid_symbols}")
-        
-        return result, invalid_symbols, data_issues
-        
-    except Exception as e:
-        logger.error(f"Error fetching batch stock data: {str(e)}")
-        return {}, symbols, {}
+    return result, invalid_symbols, data_issues
@@ -0,0 +1,123 @@
+# services/sweep_service.py
+import itertools
+import logging
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from .inflation_service import DEFAULT_COUNTRY
+from .scenario_service import align_month_end, scenario_growth_arrays
+
+logger = logging.getLogger(__name__)
+
+SWEEP_COLUMNS = [
+    'start_year', 'end_year', 'addition_amount', 'addition_frequency', 'symbol',
+    'invested', 'total', 'gains', 'return_percentage'
+]
+
+# Grids smaller than this are evaluated in-process; a pool is not worth its start-up
+PARALLEL_THRESHOLD = 2000
+
+# Scenarios per vectorized evaluation, bounding the (scenarios x symbols x months) arrays
+MAX_CHUNK_SIZE = 256
+
+# Per-worker copy of the aligned prices, installed once by _init_worker
+_worker_state = {}
+
+
+def build_grid(start_years, end_years, addition_amounts, addition_frequencies,
+               initial, adjust_for_inflation, stocks, inflation_country=DEFAULT_COUNTRY):
+    """Cartesian product of the sweep axes as scenario dicts, skipping empty ranges"""
+    scenarios = []
+    for start_year, end_year, amount, frequency in itertools.product(
+            start_years, end_years, addition_amounts, addition_frequencies):
+        if end_year <= start_year:
+            continue
+        scenarios.append({
+            'id': len(scenarios),
+            'initial': initial,
+            'start_year': int(start_year),
+            'end_year': int(end_year),
+            'addition_amount': float(amount),
+            'addition_frequency': frequency,
+            'adjust_for_inflation': adjust_for_inflation,
+            'inflation_country': inflation_country,
+            'stocks': stocks
+        })
+    return scenarios
+
+
+def run_sweep(stocks, scenarios, inflation_tables=None, max_workers=None, chunk_size=None):
+    """
+    Evaluate every scenario of a sweep and return the final month of each
+    (scenario, symbol) pair as a compact ``{'columns': [...], 'rows': [...]}`` table.
+
+    Large grids are split into chunks and run on a ``ProcessPoolExecutor``; the
+    aligned price arrays reach each worker once through the pool initializer
+    instead of being pickled with every task.
+    """
+    aligned = align_month_end(stocks)
+    if not scenarios or not aligned[1]:
+        return {'columns': SWEEP_COLUMNS, 'rows': []}
+
+    max_workers = max_workers or os.cpu_count() or 1
+    chunk_size = chunk_size or min(MAX_CHUNK_SIZE, math.ceil(len(scenarios) / (max_workers * 4)))
+    chunks = [scenarios[i:i + chunk_size] for i in range(0, len(scenarios), chunk_size)]
+
+    rows = []
+    if max_workers <= 1 or len(scenarios) < PARALLEL_THRESHOLD:
+        logger.info(f"Running sweep of {len(scenarios)} scenarios in-process")
+        for chunk in chunks:
+            rows.extend(_summarize(aligned, chunk, inflation_tables))
+        return {'columns': SWEEP_COLUMNS, 'rows': rows}
+
+    logger.info(f"Running sweep of {len(scenarios)} scenarios in {len(chunks)} chunks on {max_workers} workers")
+    with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=(aligned, inflation_tables)) as executor:
+        for chunk_rows in executor.map(_evaluate_chunk, chunks):
+            rows.extend(chunk_rows)
+    return {'columns': SWEEP_COLUMNS, 'rows': rows}
+
+
+def _init_worker(aligned, inflation_tables):
+    _worker_state['aligned'] = aligned
+    _worker_state['inflation_tables'] = inflation_tables
+
+
+def _evaluate_chunk(scenarios):
+    return _summarize(_worker_state['aligned'], scenarios, _worker_state['inflation_tables'])
+
+
+def _summarize(aligned, scenarios, inflation_tables):
+    """Final-month rows for every (scenario, symbol) pair that produced data"""
+    symbols = aligned[1]
+    arrays = scenario_growth_arrays(aligned, scenarios, inflation_tables)
+    valid = arrays['valid']
+    months = valid.shape[-1]
+
+    # Index of the last valid month per (scenario, symbol)
+    last = months - 1 - np.argmax(valid[..., ::-1], axis=-1)
+    has_data = valid.any(axis=-1)
+
+    finals = {
+        field: np.round(np.take_along_axis(arrays[field], last[..., None], axis=-1)[..., 0], 2)
+        for field in ('invested', 'total', 'gains', 'return_percentage')
+    }
+
+    rows = []
+    for k, s in zip(*np.nonzero(has_data)):
+        scenario = scenarios[k]
+        rows.append([
+            scenario['start_year'],
+            scenario['end_year'],
+            scenario['addition_amount'],
+            scenario['addition_frequency'],
+            symbols[s],
+            float(finals['invested'][k, s]),
+            float(finals['total'][k, s]),
+            float(finals['gains'][k, s]),
+            float(finals['return_percentage'][k, s])
+        ])
+    return rows
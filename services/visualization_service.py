@@ -1,88 +1,261 @@
 # services/visualization_service.py
-import plotly
-import plotly.graph_objs as go
 import json
 import logging
+from functools import lru_cache
+import numpy as np
+from .downsample_service import lttb_indices
 
 logger = logging.getLogger(__name__)
 
+COLORS = ['blue', 'red', 'green', 'purple', 'orange']
+
+TOTAL_HOVER = '%{x}<br>Value: $%{y:,.2f}<extra></extra>'
+INVESTED_HOVER = '%{x}<br>Invested: $%{y:,.2f}<extra></extra>'
+
 
 class VisualizationService:
+    """
+    Builds the investment growth figure as plain Plotly JSON.
+
+    Traces and layout are written directly as dicts in the shape
+    ``go.Figure(...).to_plotly_json()`` produces, skipping Plotly's per-property
+    validation; only the default template comes from Plotly, once per process.
+    """
+
     @staticmethod
-    def generate_graph(results):
+    def generate_graph(results, max_points=None):
+        """
+        Figure JSON for ``monthly_data`` results. With ``max_points`` each trace is
+        downsampled to at most that many points by LTTB; symbols whose invested
+        amounts are identical share a single 'Invested Amount' trace.
+        """
         logger.info("Generating investment growth graph")
         traces = []
-        colors = ['blue', 'red', 'green', 'purple', 'orange']
+        seen_invested = set()
+
+        for i, series in enumerate(_series(results, max_points)):
+            color = COLORS[i % len(COLORS)]
+            traces.append(_scatter(
+                f"{series['symbol']} Total", {'color': color}, TOTAL_HOVER,
+                x=series['total_x'], y=series['total']
+            ))
+            if series['invested_key'] in seen_invested:
+                continue
+            seen_invested.add(series['invested_key'])
+            traces.append(_scatter(
+                'Invested Amount', {'color': 'gray', 'dash': 'dash'}, INVESTED_HOVER,
+                x=series['invested_x'], y=series['invested']
+            ))
+            logger.debug(f"Added traces for {series['symbol']}")
+
+        logger.info("Graph generation completed")
+        return json.dumps({'data': traces, 'layout': _layout()})
 
+    @staticmethod
+    def generate_graph_spec(results, max_points=None):
+        """
+        Figure for columnar results whose traces reference data columns instead
+        of carrying them: each trace's ``source`` names the symbol and the
+        ``columns`` used for x and y, and the client fills them in before plotting.
+        With ``max_points`` a longer trace's ``source`` also lists the ``rows``
+        LTTB keeps, and only those rows are plotted.
+        """
+        logger.info("Generating columnar investment growth graph")
+        lines = [
+            (stock_data['columns']['date'], stock_data['columns'][field])
+            for stock_data in results for field in ('total', 'invested')
+        ]
+        kept = iter(_lttb_rows(lines, max_points))
+        traces = []
+        seen_invested = set()
         for i, stock_data in enumerate(results):
             symbol = stock_data['symbol']
-            color = colors[i % len(colors)]
-            
-            monthly_data = stock_data['monthly_data']
-            x_values = [point['date'] for point in monthly_data]
-            y_values = [point['total'] for point in monthly_data]
-            
-            # Create the main line trace with markers
-            trace_total = go.Scatter(
-                x=x_values,
-                y=y_values,
-                mode='lines+markers',  # Removed text to avoid crowding with monthly points
-                name=f'{symbol} Total',
-                line=dict(color=color),
-                hovertemplate='%{x}<br>Value: $%{y:,.2f}<extra></extra>'
-            )
-            
-            # Create trace for invested amount
-            invested_values = [point['invested'] for point in monthly_data]
-            trace_invested = go.Scatter(
-                x=x_values,
-                y=invested_values,
-                mode='lines+markers',
-                name='Invested Amount',
-                line=dict(color='gray', dash='dash'),
-                hovertemplate='%{x}<br>Invested: $%{y:,.2f}<extra></extra>'
-            )
-            
-            traces.extend([trace_total, trace_invested])
-            logger.debug(f"Added traces for {symbol}")
-
-        # Get min and max dates from the data
-        all_dates = [point['date'] for stock in results for point in stock['monthly_data']]
-        min_date = min(all_dates) if all_dates else None
-        max_date = max(all_dates) if all_dates else None
-
-        layout = go.Layout(
-            title='Investment Growth Comparison',
-            xaxis={
-                'title': 'Date',
-                'tickformat': '%Y-%m',  # Show as YYYY-MM
-                'tickangle': -45,  # Angle the dates for better readability
-                'nticks': 12,  # Show approximately monthly ticks
-            },
-            yaxis={
-                'title': 'Value ($)',
-                'tickformat': '$,.0f',
-                'rangemode': 'tozero'  # Start y-axis from 0
-            },
-            hovermode='x unified',
-            showlegend=True,
-            legend={
-                'orientation': 'h',
-                'yanchor': 'bottom',
-                'y': 1.02,
-                'xanchor': 'right',
-                'x': 1
-            },
-            margin=dict(t=100, b=80),  # Increased bottom margin for angled labels
-            plot_bgcolor='white',
-            paper_bgcolor='white',
-        )
-
-        fig = go.Figure(data=traces, layout=layout)
-        
-        # Add gridlines
-        fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor='#f0f0f0')
-        fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='#f0f0f0')
-        
-        logger.info("Graph generation completed")
-        return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
\ No newline at end of file
+            total_rows, invested_rows = next(kept), next(kept)
+            traces.append(_scatter(
+                f'{symbol} Total', {'color': COLORS[i % len(COLORS)]}, TOTAL_HOVER,
+                source=_source(symbol, 'total', total_rows)
+            ))
+            columns = stock_data['columns']
+            key = (tuple(columns['date']), tuple(columns['invested']))
+            if key in seen_invested:
+                continue
+            seen_invested.add(key)
+            traces.append(_scatter(
+                'Invested Amount', {'color': 'gray', 'dash': 'dash'}, INVESTED_HOVER,
+                source=_source(symbol, 'invested', invested_rows)
+            ))
+        return {'data': traces, 'layout': _layout()}
+
+    @staticmethod
+    def generate_projection_graph(projection):
+        """Fan chart of a ``project_growth`` result: percentile bands over months ahead"""
+        logger.info("Generating projection graph")
+        layout = _layout()
+        layout['title'] = {'text': 'Projected Growth'}
+        layout['xaxis'] = {**layout['xaxis'], 'title': {'text': 'Months ahead'}}
+        del layout['xaxis']['tickformat']
+        return json.dumps({'data': _band_traces(projection['months'], projection), 'layout': layout})
+
+
+def _band_traces(months, projection):
+    """Shaded outer/inner percentile bands plus the median and invested lines"""
+    bands = sorted(projection['percentiles'].items(), key=lambda item: float(item[0]))
+    traces = []
+    for k in range(len(bands) // 2):
+        (low_name, low), (high_name, high) = bands[k], bands[-1 - k]
+        opacity = 0.15 + 0.15 * k
+        traces.append({
+            'hoverinfo': 'skip',
+            'line': {'width': 0},
+            'mode': 'lines',
+            'name': f'P{low_name}',
+            'showlegend': False,
+            'x': months,
+            'y': low,
+            'type': 'scatter'
+        })
+        traces.append({
+            'fill': 'tonexty',
+            'fillcolor': f'rgba(0, 0, 255, {opacity:.2f})',
+            'hovertemplate': f'%{{x}} months<br>P{low_name}-P{high_name} upper: $%{{y:,.2f}}<extra></extra>',
+            'line': {'width': 0},
+            'mode': 'lines',
+            'name': f'P{low_name}-P{high_name}',
+            'x': months,
+            'y': high,
+            'type': 'scatter'
+        })
+    if len(bands) % 2:
+        median_name, median = bands[len(bands) // 2]
+        traces.append({
+            'hovertemplate': f'%{{x}} months<br>P{median_name}: $%{{y:,.2f}}<extra></extra>',
+            'line': {'color': 'blue'},
+            'mode': 'lines',
+            'name': f'P{median_name}',
+            'x': months,
+            'y': median,
+            'type': 'scatter'
+        })
+    traces.append({
+        'hovertemplate': INVESTED_HOVER,
+        'line': {'color': 'gray', 'dash': 'dash'},
+        'mode': 'lines',
+        'name': 'Invested Amount',
+        'x': months,
+        'y': projection['invested'],
+        'type': 'scatter'
+    })
+    return traces
+
+
+def _series(results, max_points):
+    """
+    Per-symbol x/y lists for the total and invested traces, downsampled when
+    ``max_points`` is set.
+    """
+    series = []
+    lines = []
+    for stock_data in results:
+        monthly_data = stock_data['monthly_data']
+        dates = [point['date'] for point in monthly_data]
+        total = [point['total'] for point in monthly_data]
+        invested = [point['invested'] for point in monthly_data]
+        series.append({
+            'symbol': stock_data['symbol'],
+            'total_x': dates,
+            'total': total,
+            'invested_x': dates,
+            'invested': invested,
+            # Identity of the full-resolution invested line, for collapsing duplicates
+            'invested_key': (tuple(dates), tuple(invested))
+        })
+        lines += [(dates, total), (dates, invested)]
+
+    kept = iter(_lttb_rows(lines, max_points))
+    for entry in series:
+        for field in ('total', 'invested'):
+            rows = next(kept)
+            if rows is not None:
+                entry[f'{field}_x'] = [entry[f'{field}_x'][j] for j in rows]
+                entry[field] = [entry[field][j] for j in rows]
+    return series
+
+
+def _lttb_rows(lines, max_points):
+    """
+    Row indices LTTB keeps for each ``(dates, values)`` line longer than
+    ``max_points``, None for lines kept whole. Lines sharing the same dates are
+    downsampled together in one ``lttb_indices`` call.
+    """
+    kept = [None] * len(lines)
+    if max_points is None:
+        return kept
+    groups = {}
+    for i, (dates, _) in enumerate(lines):
+        if len(dates) > max_points:
+            groups.setdefault(tuple(dates), []).append(i)
+
+    for dates, members in groups.items():
+        # 'YYYY-MM' to a month count so gaps between months keep their width
+        x = np.array([int(date[:4]) * 12 + int(date[5:7]) for date in dates], dtype=np.float64)
+        y = np.array([lines[i][1] for i in members], dtype=np.float64)
+        for i, rows in zip(members, lttb_indices(x, y, max_points)):
+            kept[i] = [int(j) for j in rows]
+    return kept
+
+
+def _source(symbol, field, rows):
+    source = {'symbol': symbol, 'x': 'date', 'y': field}
+    if rows is not None:
+        source['rows'] = rows
+    return source
+
+
+def _scatter(name, line, hovertemplate, **values):
+    return {
+        'hovertemplate': hovertemplate,
+        'line': line,
+        'mode': 'lines+markers',
+        'name': name,
+        **values,
+        'type': 'scatter'
+    }
+
+
+def _layout():
+    return {
+        'hovermode': 'x unified',
+        'legend': {'orientation': 'h', 'x': 1, 'xanchor': 'right', 'y': 1.02, 'yanchor': 'bottom'},
+        'margin': {'b': 80, 't': 100},  # Increased bottom margin for angled labels
+        'paper_bgcolor': 'white',
+        'plot_bgcolor': 'white',
+        'showlegend': True,
+        'title': {'text': 'Investment Growth Comparison'},
+        'xaxis': {
+            'nticks': 12,  # Show approximately monthly ticks
+            'tickangle': -45,  # Angle the dates for better readability
+            'tickformat': '%Y-%m',  # Show as YYYY-MM
+            'title': {'text': 'Date'},
+            'showgrid': True,
+            'gridwidth': 1,
+            'gridcolor': '#f0f0f0'
+        },
+        'yaxis': {
+            'rangemode': 'tozero',  # Start y-axis from 0
+            'tickformat': '$,.0f',
+            'title': {'text': 'Value ($)'},
+            'showgrid': True,
+            'gridwidth': 1,
+            'gridcolor': '#f0f0f0'
+        },
+        'template': default_template()
+    }
+
+
+@lru_cache(maxsize=1)
+def default_template():
+    """Plotly's default template as JSON-ready dicts; the only Plotly import, done once"""
+    import plotly
+    import plotly.io as pio
+    template = pio.templates[pio.templates.default]
+    return json.loads(json.dumps(template.to_plotly_json(), cls=plotly.utils.PlotlyJSONEncoder))
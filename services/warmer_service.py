@@ -0,0 +1,212 @@
+# services/warmer_service.py
+import datetime
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .cache_service import cache
+from .logging_service import log_event
+from .metrics_service import registry
+
+logger = logging.getLogger(__name__)
+
+WARM = 'warm'
+REFRESH = 'refresh'
+
+# Entries the warmer writes per symbol and range: daily, month-end and year-end prices
+ENTRIES_PER_SYMBOL = 3
+
+# Size-capped backends that evict entries once CACHE_THRESHOLD is reached
+BOUNDED_CACHE_TYPES = ('simple', 'SimpleCache', 'filesystem', 'FileSystemCache')
+
+# Workers sharing a cache take turns: one of them runs each scheduled refresh
+REFRESH_LOCK_KEY = 'warmer:refresh'
+
+WARMED_SYMBOLS = registry.counter(
+    'investment_calculator_warmer_symbols_total', 'Symbols processed by the cache warmer', ('phase', 'result')
+)
+
+
+class CacheWarmer:
+    """
+    Keeps the price cache warm for the whole stock universe.
+
+    A ``warm`` run fills whatever is not cached yet for each lookback range
+    (the last ``n`` years up to the current one); every ``interval`` seconds a
+    ``refresh`` run downloads the recent bars again and rewrites the entries,
+    so they are replaced before ``PRICE_CACHE_TIMEOUT`` expires them. Symbols
+    go upstream in ``FETCH_CHUNK_SIZE`` chunks on at most ``max_workers``
+    threads, leaving the rest of the download capacity to requests.
+    """
+
+    def __init__(self, app, lookback_years=(5,), interval=900, max_workers=2):
+        self.app = app
+        self.lookback_years = tuple(lookback_years)
+        self.interval = interval
+        self.max_workers = max(1, max_workers)
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._status = {
+            'state': 'idle',
+            'phase': None,
+            'runs': 0,
+            'symbolsTotal': 0,
+            'symbolsDone': 0,
+            'failedSymbols': [],
+            'startedAt': None,
+            'finishedAt': None,
+            'durationSeconds': None,
+            'nextRunAt': None,
+            'lastError': None
+        }
+
+    def ranges(self, today=None):
+        """``(start_year, end_year)`` pairs kept warm"""
+        year = (today or datetime.date.today()).year
+        return [(year - years, year) for years in self.lookback_years]
+
+    def status(self):
+        with self._lock:
+            status = {**self._status, 'failedSymbols': list(self._status['failedSymbols'])}
+        status['running'] = self._thread is not None and self._thread.is_alive()
+        status['intervalSeconds'] = self.interval
+        status['ranges'] = [list(years) for years in self.ranges()]
+        return status
+
+    def start(self):
+        """Run the warm-up and then the refresh schedule on a background thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._schedule, name='cache-warmer', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run(self, phase=WARM):
+        """Process the whole universe once; returns the symbols left without prices"""
+        with self.app.app_context():
+            from .stock_list_service import load_stock_data
+            symbols = list(dict.fromkeys(stock['symbol'] for stock in load_stock_data()))
+            chunk_size = max(1, self.app.config.get('FETCH_CHUNK_SIZE', 25))
+
+        ranges = self.ranges()
+        jobs = [
+            (symbols[i:i + chunk_size], start_year, end_year)
+            for start_year, end_year in ranges
+            for i in range(0, len(symbols), chunk_size)
+        ]
+        started = time.perf_counter()
+        self._update(state='running', phase=phase, symbolsTotal=len(symbols) * len(ranges), symbolsDone=0,
+                     failedSymbols=[], startedAt=_now(), finishedAt=None, lastError=None)
+
+        failed = set()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='cache-warmer') as executor:
+            futures = {executor.submit(self._warm_chunk, phase, *job): job for job in jobs}
+            for future in as_completed(futures):
+                chunk = futures[future][0]
+                try:
+                    invalid = future.result()
+                except Exception as e:
+                    logger.error(f"Cache warmer failed on {len(chunk)} symbols: {str(e)}")
+                    invalid = chunk
+                    self._update(lastError=str(e))
+                failed.update(invalid)
+                WARMED_SYMBOLS.inc(len(chunk) - len(invalid), phase=phase, result='ok')
+                WARMED_SYMBOLS.inc(len(invalid), phase=phase, result='failed')
+                with self._lock:
+                    self._status['symbolsDone'] += len(chunk)
+                    done = self._status['symbolsDone']
+                log_event(logger, 'warmer.progress', phase=phase, done=done, total=len(symbols) * len(ranges))
+                if self._stop.is_set():
+                    for pending in futures:
+                        pending.cancel()
+                    break
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._status.update(state='idle', failedSymbols=sorted(failed), finishedAt=_now(),
+                                durationSeconds=round(elapsed, 3))
+            self._status['runs'] += 1
+        logger.info(f"Cache {phase} of {len(symbols)} symbols over {len(ranges)} ranges took {elapsed:.1f}s "
+                    f"({len(failed)} without prices)")
+        return sorted(failed)
+
+    def _warm_chunk(self, phase, symbols, start_year, end_year):
+        """Cache daily, month-end and year-end prices for ``symbols``; returns the invalid ones"""
+        with self.app.app_context():
+            from . import stock_service
+            if phase == WARM:
+                _, invalid_symbols, _ = stock_service.fetch_month_end_batch(symbols, start_year, end_year)
+                return invalid_symbols
+            return stock_service.refresh_prices(symbols, start_year, end_year)
+
+    def _schedule(self):
+        try:
+            self.run(WARM)
+            while not self._stop.is_set():
+                self._update(nextRunAt=_now(self.interval))
+                if self._stop.wait(self.interval):
+                    break
+                # A shared cache only needs one refresh per interval
+                with self.app.app_context():
+                    claimed = cache.add(REFRESH_LOCK_KEY, os.getpid(), timeout=max(1, int(self.interval * 0.9)))
+                if claimed:
+                    self.run(REFRESH)
+        except Exception as e:
+            logger.exception("Cache warmer stopped")
+            self._update(state='failed', lastError=str(e))
+
+    def _update(self, **fields):
+        with self._lock:
+            self._status.update(fields)
+
+
+def start_cache_warmer(app):
+    """
+    Create the app's ``CacheWarmer`` from its config and start it. Under
+    ``PRELOAD_SERVICES`` the app is built in gunicorn's master, which never
+    serves requests; the ``post_fork`` hook in ``gunicorn.conf.py`` starts the
+    warmer in each worker instead.
+    """
+    config = app.config
+    warmer = CacheWarmer(
+        app,
+        lookback_years=config['CACHE_WARM_LOOKBACK_YEARS'],
+        interval=config['CACHE_WARM_INTERVAL'],
+        max_workers=config['CACHE_WARM_MAX_WORKERS']
+    )
+    app.extensions['cache_warmer'] = warmer
+    if not config.get('PRELOAD_SERVICES'):
+        warmer.start()
+    return warmer
+
+
+def reserve_warm_cache_capacity(app):
+    """
+    Raise ``CACHE_THRESHOLD`` of a size-capped cache by the number of warmed
+    entries, so the configured threshold stays available to everything else
+    (responses, flight locks, jobs). Otherwise the backend starts evicting
+    warmed entries, and everything else, right away. Call before
+    ``cache.init_app``; returns the threshold in effect.
+    """
+    threshold = app.config.get('CACHE_THRESHOLD', 500)
+    if app.config.get('CACHE_TYPE') not in BOUNDED_CACHE_TYPES:
+        return threshold
+    with app.app_context():
+        from .stock_list_service import load_stock_data
+        symbols = len({stock['symbol'] for stock in load_stock_data()})
+    warmed = symbols * len(app.config['CACHE_WARM_LOOKBACK_YEARS']) * ENTRIES_PER_SYMBOL
+    logger.info(f"Raising CACHE_THRESHOLD from {threshold} to {threshold + warmed} for {warmed} warmed entries")
+    app.config['CACHE_THRESHOLD'] = threshold + warmed
+    return threshold + warmed
+
+
+def _now(offset_seconds=0):
+    moment = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=offset_seconds)
+    return moment.isoformat(timespec='seconds')
@@ -2,9 +2,38 @@
 import os
 import sys
 from pathlib import Path
+import pytest
+import numpy as np
+import pandas as pd
 
 # Get the project root directory
 project_root = str(Path(__file__).parent.parent)
 
 # Add the project root to Python path
-sys.path.insert(0, project_root)
\ No newline at end of file
+sys.path.insert(0, project_root)
+
+# config.Config refuses to load without a secret key
+os.environ.setdefault('SECRET_KEY', 'test-secret-key')
+
+
+def fake_download(calls):
+    """Stand-in for yf.download returning a ticker-grouped frame of closes"""
+    def download(symbols, start_date, end_date, provider=None):
+        calls.append(list(symbols))
+        dates = pd.bdate_range(start_date, end_date)
+        columns = pd.MultiIndex.from_product([symbols, ['Close']])
+        known = [symbol != 'BOGUS' for symbol in symbols]
+        # Prices depend on the date alone, so overlapping downloads agree
+        growth = 1.0004 ** np.asarray((dates - pd.Timestamp('2000-01-03')).days, dtype=float)[:, None]
+        values = np.where(known, 100.0, np.nan) * growth
+        return pd.DataFrame(values, index=dates, columns=columns)
+    return download
+
+
+@pytest.fixture
+def download_calls(monkeypatch):
+    """Record symbol batches sent upstream instead of calling Yahoo Finance"""
+    from services import stock_service
+    calls = []
+    monkeypatch.setattr(stock_service, '_download', fake_download(calls))
+    return calls
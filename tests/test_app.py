@@ -0,0 +1,219 @@
+# tests/test_app.py
+
+import json
+import threading
+import time
+import pytest
+from app import create_app
+from services.cache_service import cache
+
+REQUEST = {
+    'initialInvestment': 1000,
+    'startYear': 2015,
+    'endYear': 2020,
+    'stocks': ['AAPL', 'MSFT'],
+    'additionAmount': 100,
+    'additionFrequency': 'monthly',
+    'adjustForInflation': False
+}
+
+
+@pytest.fixture
+def client(download_calls):
+    app = create_app('development')
+    app.config['PRICE_STORE_ENABLED'] = False
+    with app.app_context():
+        cache.clear()
+    return app.test_client()
+
+
+def test_calculate(client):
+    response = client.post('/calculate', json=REQUEST)
+    assert response.status_code == 200
+    assert [stock['symbol'] for stock in response.json['data']] == ['AAPL', 'MSFT']
+    assert 'graph' in response.json
+
+
+def test_calculate_columnar(client):
+    buffered = client.post('/calculate', json=REQUEST)
+    records = buffered.json
+    response = client.post('/calculate?format=columnar', json=REQUEST)
+
+    assert response.status_code == 200
+    assert response.json['format'] == 'columnar'
+    for stock, expected in zip(response.json['data'], records['data']):
+        assert stock['columns']['total'] == [point['total'] for point in expected['monthly_data']]
+    sources = [trace['source'] for trace in response.json['graph']['data']]
+    assert sources[0] == {'symbol': 'AAPL', 'x': 'date', 'y': 'total'}
+    assert 'x' not in response.json['graph']['data'][0]
+    assert len(response.data) < len(buffered.data) / 2
+
+    downsampled = client.post('/calculate?format=columnar', json={**REQUEST, 'maxPoints': 20}).json
+    expected = client.post('/calculate', json={**REQUEST, 'maxPoints': 20}).json['graph']
+    expected = json.loads(expected) if isinstance(expected, str) else expected
+    columns = {stock['symbol']: stock['columns'] for stock in downsampled['data']}
+    for trace, plotted in zip(downsampled['graph']['data'], expected['data']):
+        source = trace['source']
+        assert len(source['rows']) == 20
+        assert [columns[source['symbol']][source['x']][j] for j in source['rows']] == plotted['x']
+        assert [columns[source['symbol']][source['y']][j] for j in source['rows']] == plotted['y']
+
+
+def test_calculate_streams_ndjson(client):
+    buffered = client.post('/calculate', json=REQUEST).json
+    response = client.post('/calculate?stream=ndjson', json=REQUEST)
+
+    assert response.mimetype == 'application/x-ndjson'
+    events = [json.loads(line) for line in response.data.decode().splitlines()]
+    assert [event['type'] for event in events] == ['meta', 'symbol', 'symbol', 'graph', 'done']
+    assert [event['data'] for event in events if event['type'] == 'symbol'] == buffered['data']
+
+
+def test_calculate_streams_sse_from_accept_header(client):
+    response = client.post('/calculate', json=REQUEST, headers={'Accept': 'text/event-stream'})
+    assert response.mimetype == 'text/event-stream'
+    assert response.data.decode().startswith('event: meta\ndata: ')
+
+
+def test_calculate_batch(client):
+    response = client.post('/calculate/batch', json={
+        **REQUEST,
+        'scenarios': [{'id': 'base'}, {'id': 'annual', 'additionFrequency': 'annually', 'stocks': ['AAPL']}]
+    })
+    assert response.status_code == 200
+    assert len(response.json['results']['base']['data']) == 2
+    assert len(response.json['results']['annual']['data']) == 1
+
+    duplicate = client.post('/calculate/batch', json={**REQUEST, 'scenarios': [{'id': 'a'}, {'id': 'a', 'startYear': 2016}]})
+    assert duplicate.status_code == 400
+
+
+def test_calculate_sweep(client):
+    response = client.post('/calculate/sweep', json={
+        **REQUEST,
+        'grid': {'startYear': {'start': 2015, 'stop': 2017}, 'endYear': [2018, 2020]}
+    })
+    assert response.status_code == 200
+    assert response.json['count'] == 6
+    assert len(response.json['rows']) == 12
+
+
+def test_oversized_sweep_is_rejected_before_expanding(client):
+    for amounts in ({'start': 0, 'stop': 1e12, 'step': 1}, {'start': 0, 'stop': 1, 'step': 1e-300}):
+        started = time.perf_counter()
+        response = client.post('/calculate/sweep', json={
+            **REQUEST,
+            'grid': {'startYear': [2015], 'endYear': [2020], 'additionAmount': amounts}
+        })
+        assert response.status_code == 400
+        assert time.perf_counter() - started < 1
+
+
+def test_calculate_max_points(client):
+    response = client.post('/calculate', json={**REQUEST, 'maxPoints': 20})
+    graph = json.loads(response.json['graph'])
+    assert all(len(trace['x']) <= 20 for trace in graph['data'])
+    assert len(response.json['data'][0]['monthly_data']) == 60
+
+    assert client.post('/calculate', json={**REQUEST, 'maxPoints': 2}).status_code == 400
+
+
+def test_calculate_daily_resolution(client):
+    response = client.post('/calculate', json={**REQUEST, 'resolution': 'daily'})
+    assert response.status_code == 200
+    assert [stock['symbol'] for stock in response.json['data']] == ['AAPL', 'MSFT']
+    assert len(response.json['data'][0]['monthly_data']) == 60
+
+    assert client.post('/calculate', json={**REQUEST, 'resolution': 'hourly'}).status_code == 400
+
+
+def test_calculate_portfolio(client):
+    response = client.post('/calculate', json={
+        **REQUEST,
+        'portfolio': {'weights': {'AAPL': 3, 'MSFT': 1}, 'rebalance': 'quarterly'}
+    })
+    assert response.status_code == 200
+    [portfolio] = response.json['data']
+    assert portfolio['symbol'] == 'Portfolio'
+    assert portfolio['weights'] == {'AAPL': 0.75, 'MSFT': 0.25}
+    assert portfolio['rebalances'] == 19
+
+    for weights in ({'TSLA': 1}, ['AAPL'], 'AAPL', {'AAPL': [1]}):
+        invalid = client.post('/calculate', json={**REQUEST, 'portfolio': {'weights': weights}})
+        assert invalid.status_code == 400
+
+
+def test_calculate_projection(client):
+    response = client.post('/calculate/projection', json={
+        **REQUEST, 'years': 10, 'paths': 500, 'seed': 1, 'adjustForInflation': True
+    })
+    assert response.status_code == 200
+    assert sorted(response.json['percentiles']) == ['25', '5', '50', '75', '95']
+    assert len(response.json['percentiles']['50']) == 120
+    assert response.json['historyMonths'] == 59
+    assert response.json['inflationRate'] > 0
+    assert 'graph' in response.json
+
+    assert client.post('/calculate/projection', json={**REQUEST, 'years': 10, 'paths': 10 ** 9}).status_code == 400
+    assert client.post('/calculate/projection', json={**REQUEST, 'years': 10, 'weights': ['AAPL']}).status_code == 400
+
+
+def test_calculate_rolling(client):
+    response = client.post('/calculate/rolling', json={**REQUEST, 'endYear': 2017, 'holdingYears': 2})
+    assert response.status_code == 200
+    assert response.json['holdingMonths'] == 24
+    results = {entry['symbol']: entry for entry in response.json['results']}
+    assert sorted(results) == ['AAPL', 'MSFT']
+    assert results['AAPL']['summary']['count'] == 24
+    assert results['AAPL']['windows']['end'][-1] == '2018-11'
+
+    assert client.post('/calculate/rolling', json={**REQUEST, 'holdingYears': 0}).status_code == 400
+
+
+def test_malformed_calculation_is_rejected(client):
+    for body in ({k: v for k, v in REQUEST.items() if k != 'stocks'}, {**REQUEST, 'stocks': 5}):
+        response = client.post('/calculate', json=body)
+        assert response.status_code == 400
+        assert 'error' in response.json
+
+
+def test_concurrent_identical_calculations_share_one_run(client, download_calls, monkeypatch):
+    from services import stock_service
+    download = stock_service._download
+
+    def slow_download(*args, **kwargs):
+        time.sleep(0.2)
+        return download(*args, **kwargs)
+
+    monkeypatch.setattr(stock_service, '_download', slow_download)
+    responses = [None] * 4
+
+    def post(i):
+        responses[i] = client.post('/calculate', json=REQUEST)
+
+    threads = [threading.Thread(target=post, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [response.status_code for response in responses] == [200] * 4
+    assert len({response.get_data() for response in responses}) == 1
+    assert download_calls == [['AAPL', 'MSFT']]
+
+
+def test_server_timing_and_metrics(client):
+    first = client.post('/calculate', json=REQUEST)
+    stages = [entry.split(';')[0] for entry in first.headers['Server-Timing'].split(', ')]
+    assert stages[:4] == ['fetch', 'simulate', 'graph', 'serialize']
+    assert 'response-cache' in stages and stages[-1] == 'total'
+
+    cached = client.post('/calculate', json=REQUEST)
+    assert 'response-cache;desc="hits=1 misses=0"' in cached.headers['Server-Timing']
+
+    metrics = client.get('/metrics')
+    assert metrics.mimetype == 'text/plain'
+    body = metrics.get_data(as_text=True)
+    assert 'investment_calculator_stage_seconds_count{stage="simulate"}' in body
+    assert 'investment_calculator_cache_lookups_total{cache="response",result="hit"}' in body
+    assert 'investment_calculator_request_seconds_bucket{endpoint="calculate",status="200",le="+Inf"}' in body
@@ -0,0 +1,84 @@
+# tests/test_daily_service.py
+import pandas as pd
+import pytest
+from services.daily_service import generate_daily_data_points
+from services.inflation_service import InflationTable
+from services.price_providers import synthetic_prices
+
+
+@pytest.fixture
+def stocks():
+    dates = pd.bdate_range('2015-01-01', '2020-12-31')
+    late = pd.bdate_range('2017-03-15', '2020-12-31')
+    return {
+        'AAA': pd.Series(synthetic_prices('AAA', dates), index=dates),
+        'BBB': pd.Series(synthetic_prices('BBB', dates), index=dates).drop(pd.bdate_range('2016-06-01', '2016-06-03')),
+        'LATE': pd.Series(synthetic_prices('LATE', late), index=late)
+    }
+
+
+def reference_simulation(initial, start_year, end_year, series, amount, frequency, table=None):
+    """
+    Day-by-day share ledger for one symbol; each December the held shares and
+    the invested amount are both deflated into real terms.
+    """
+    series = series.dropna()
+    series = series[(series.index.year >= start_year) & (series.index.year < end_year)]
+    shares = invested = 0.0
+    bought_periods = set()
+    records = []
+    for i, (date, price) in enumerate(series.items()):
+        period = (date.year, date.month) if frequency == 'monthly' else (date.year,)
+        due = period not in bought_periods and (date.year, date.month) != (start_year, 1) and (
+            frequency == 'monthly' or (frequency == 'annually' and date.month == 1))
+        if i == 0:
+            shares, invested = initial / price, initial
+        if due:
+            shares += amount / price
+            invested += amount
+            bought_periods.add(period)
+        last_of_month = i + 1 == len(series) or series.index[i + 1].month != date.month
+        if last_of_month:
+            if table is not None and date.month == 12:
+                rate = table.rate([date.year])[0]
+                shares *= 1 - rate
+                invested *= 1 - rate
+            total = shares * price
+            records.append({
+                'year': date.year,
+                'month': date.month,
+                'date': date.strftime('%Y-%m'),
+                'invested': round(invested, 2),
+                'total': round(total, 2),
+                'gains': round(total - invested, 2),
+                'return_percentage': round((total - invested) / invested * 100, 2)
+            })
+    return records
+
+
+@pytest.mark.parametrize('frequency', ['monthly', 'annually', 'none'])
+@pytest.mark.parametrize('adjust_for_inflation', [False, True])
+def test_matches_share_ledger(monkeypatch, stocks, frequency, adjust_for_inflation):
+    table = InflationTable({str(year): 0.01 * (year - 2010) for year in range(2010, 2021)})
+    monkeypatch.setattr('services.daily_service.get_inflation_table', lambda country: table)
+
+    results = generate_daily_data_points(1000, 2015, 2020, stocks, 100, frequency, adjust_for_inflation)
+
+    assert [stock['symbol'] for stock in results] == ['AAA', 'BBB', 'LATE']
+    for stock in results:
+        expected = reference_simulation(
+            1000, 2015, 2020, stocks[stock['symbol']], 100, frequency, table if adjust_for_inflation else None
+        )
+        assert len(stock['monthly_data']) == len(expected)
+        for point, reference in zip(stock['monthly_data'], expected):
+            assert point == pytest.approx(reference, abs=0.011)
+
+
+def test_monthly_contributions_buy_on_first_trading_day(stocks):
+    # 2016-06-01..03 are missing for BBB, so June's purchase happens on the 6th
+    june = stocks['BBB'][stocks['BBB'].index >= '2016-06-01'].iloc[0]
+    results = generate_daily_data_points(0, 2016, 2017, {'BBB': stocks['BBB']}, 100, 'monthly', False)
+    months = {point['date']: point for point in results[0]['monthly_data']}
+    end_of_june = stocks['BBB']['2016-06'].iloc[-1]
+    may_shares = months['2016-05']['total'] / stocks['BBB']['2016-05'].iloc[-1]
+    assert months['2016-06']['total'] == pytest.approx((may_shares + 100 / june) * end_of_june, abs=0.05)
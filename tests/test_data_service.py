@@ -0,0 +1,121 @@
+# tests/test_data_service.py
+
+import pytest
+import pandas as pd
+import numpy as np
+from services import data_service
+from services.data_service import generate_data_points
+from services.inflation_service import InflationTable
+from services.resample_service import month_end_frame
+
+INFLATION = {'2020': 0.012, '2021': 0.047, '2022': 0.08}
+
+
+def legacy_generate_data_points(initial, start_year, end_year, stocks, addition_amount, addition_frequency, inflation_data):
+    """Row-by-row reference implementation the vectorized engine must reproduce"""
+    data = []
+    for symbol, stock_data in stocks.items():
+        monthly_data = []
+        current_investment = float(initial)
+        stock_data = stock_data.dropna()
+        if len(stock_data) == 0:
+            continue
+        monthly_stock_data = stock_data.resample('ME').last().dropna()
+        for date in monthly_stock_data.index:
+            year, month = int(date.year), int(date.month)
+            if year < start_year or year >= end_year:
+                continue
+            start_price = float(stock_data.iloc[0])
+            current_price = float(monthly_stock_data.loc[date])
+            current_value = initial * (current_price / start_price)
+            if addition_frequency == 'monthly' and (year > start_year or month > 1):
+                current_investment += addition_amount
+                prev_date = date - pd.DateOffset(months=1)
+                if prev_date in stock_data.index and not pd.isna(stock_data.loc[prev_date]):
+                    current_value += addition_amount * (current_price / float(stock_data.loc[prev_date]))
+                else:
+                    current_value += addition_amount
+            elif addition_frequency == 'annually' and month == 1 and year > start_year:
+                current_investment += addition_amount
+                current_value += addition_amount
+            if inflation_data and str(year) in inflation_data and month == 12:
+                current_value *= (1 - float(inflation_data[str(year)]))
+                current_investment *= (1 - float(inflation_data[str(year)]))
+            gains = current_value - current_investment
+            return_percentage = (gains / current_investment) * 100 if current_investment != 0 else 0
+            monthly_data.append({
+                "year": year,
+                "month": month,
+                "date": date.strftime("%Y-%m"),
+                "invested": round(current_investment, 2),
+                "total": round(current_value, 2),
+                "gains": round(gains, 2),
+                "return_percentage": round(return_percentage, 2)
+            })
+        if monthly_data:
+            data.append({"symbol": symbol, "monthly_data": monthly_data})
+    return data
+
+
+@pytest.fixture
+def stocks():
+    """Two business-day series with different start dates"""
+    rng = np.random.default_rng(7)
+    first = pd.bdate_range('2020-01-01', '2022-12-31')
+    second = pd.bdate_range('2020-06-15', '2022-12-31')
+    return {
+        'AAA': pd.Series(100 * np.cumprod(1 + rng.normal(0.0004, 0.01, len(first))), index=first),
+        'BBB': pd.Series(50 * np.cumprod(1 + rng.normal(0.0002, 0.02, len(second))), index=second)
+    }
+
+
+def assert_matches(actual, expected):
+    assert [s['symbol'] for s in actual] == [s['symbol'] for s in expected]
+    for got, want in zip(actual, expected):
+        assert len(got['monthly_data']) == len(want['monthly_data'])
+        for a, b in zip(got['monthly_data'], want['monthly_data']):
+            assert (a['year'], a['month'], a['date']) == (b['year'], b['month'], b['date'])
+            for field in ('invested', 'total', 'gains', 'return_percentage'):
+                assert a[field] == pytest.approx(b[field], abs=0.011)
+
+
+@pytest.mark.parametrize("addition_frequency", ['monthly', 'annually', 'none'])
+@pytest.mark.parametrize("adjust_for_inflation", [False, True])
+def test_matches_row_by_row_engine(monkeypatch, stocks, addition_frequency, adjust_for_inflation):
+    monkeypatch.setattr(data_service, 'get_inflation_table', lambda country: InflationTable(INFLATION))
+
+    actual = generate_data_points(1000, 2020, 2023, stocks, 100, addition_frequency, adjust_for_inflation)
+    expected = legacy_generate_data_points(
+        1000, 2020, 2023, stocks, 100, addition_frequency,
+        INFLATION if adjust_for_inflation else None
+    )
+    assert_matches(actual, expected)
+
+
+def test_years_outside_range_are_excluded(stocks):
+    result = generate_data_points(1000, 2021, 2022, stocks, 0, 'none', False)
+    for stock in result:
+        assert {point['year'] for point in stock['monthly_data']} == {2021}
+
+
+def test_symbols_without_data_are_skipped(stocks):
+    stocks['EMPTY'] = pd.Series(dtype=float)
+    result = generate_data_points(1000, 2020, 2023, stocks, 0, 'none', False)
+    assert 'EMPTY' not in [stock['symbol'] for stock in result]
+
+
+def test_precomputed_month_end_frames_match_daily_series(stocks):
+    frames = {symbol: month_end_frame(series) for symbol, series in stocks.items()}
+    from_daily = generate_data_points(1000, 2020, 2023, stocks, 100, 'monthly', False)
+    from_frames = generate_data_points(1000, 2020, 2023, frames, 100, 'monthly', False)
+    assert from_frames == from_daily
+
+
+def test_columnar_results_match_monthly_records(stocks):
+    records = generate_data_points(1000, 2020, 2023, stocks, 100, 'monthly', False)
+    columnar = generate_data_points(1000, 2020, 2023, stocks, 100, 'monthly', False, columnar=True)
+    assert [stock['symbol'] for stock in columnar] == [stock['symbol'] for stock in records]
+    for stock, expected in zip(columnar, records):
+        columns = stock['columns']
+        rows = [dict(zip(columns, values)) for values in zip(*columns.values())]
+        assert rows == expected['monthly_data']
@@ -0,0 +1,39 @@
+# tests/test_downsample_service.py
+import numpy as np
+import pytest
+from services.downsample_service import lttb_indices
+
+
+def reference_lttb(x, y, threshold):
+    """Textbook one-series LTTB loop"""
+    n = len(x)
+    buckets = threshold - 2
+    edge = lambda b: 1 + b * (n - 2) // buckets
+    selected = [0]
+    for b in range(buckets):
+        start, stop = edge(b), edge(b + 1)
+        if b == buckets - 1:
+            c_x, c_y = x[-1], y[-1]
+        else:
+            c_x, c_y = np.mean(x[stop:edge(b + 2)]), np.mean(y[stop:edge(b + 2)])
+        a = selected[-1]
+        areas = [abs((x[a] - c_x) * (y[j] - y[a]) - (x[a] - x[j]) * (c_y - y[a])) for j in range(start, stop)]
+        selected.append(start + int(np.argmax(areas)))
+    return selected + [n - 1]
+
+
+@pytest.mark.parametrize('points, threshold', [(600, 50), (601, 37), (10, 5), (1000, 999), (5, 3)])
+def test_matches_reference_for_every_series(points, threshold):
+    rng = np.random.default_rng(points)
+    x = np.sort(rng.uniform(0, 100, points))
+    y = rng.normal(size=(3, points)).cumsum(axis=1)
+
+    selected = lttb_indices(x, y, threshold)
+
+    assert selected.shape == (3, threshold)
+    for row in range(3):
+        assert selected[row].tolist() == reference_lttb(x, y[row], threshold)
+
+
+def test_short_series_are_kept_whole():
+    assert lttb_indices(np.arange(4), np.ones(4), 10).tolist() == [[0, 1, 2, 3]]
@@ -0,0 +1,46 @@
+# tests/test_inflation_service.py
+
+import json
+import os
+import pytest
+import numpy as np
+from services import inflation_service
+from services.inflation_service import InflationTable, get_inflation_data, get_inflation_table
+
+RATES = {'2019': 0.02, '2020': 0.01, '2022': 0.08}
+
+
+def test_rates_are_indexed_by_year():
+    table = InflationTable(RATES)
+    assert table.rate([2019, 2020, 2021, 2022, 2030]).tolist() == [0.02, 0.01, 0.0, 0.08, 0.0]
+    assert table.has_rate([2018, 2019, 2021]).tolist() == [False, True, False]
+    assert table.to_dict() == RATES
+
+
+def test_deflator_is_product_of_year_end_steps():
+    table = InflationTable(RATES)
+    assert table.deflator(2018, 2022) == pytest.approx(0.98 * 0.99 * 0.92)
+    assert table.deflator(2020, 2022) == pytest.approx(0.92)
+    np.testing.assert_allclose(
+        table.to_real([100.0, 100.0, 100.0], [2019, 2020, 2022], base_year=2018),
+        [98.0, 98.0 * 0.99, 98.0 * 0.99 * 0.92]
+    )
+
+
+def test_table_reloads_when_file_changes(tmp_path, monkeypatch):
+    path = tmp_path / 'inflation_data.json'
+    path.write_text(json.dumps({'US': {'2020': 0.01}}))
+    monkeypatch.setattr(inflation_service, '_data_path', lambda: str(path))
+
+    assert get_inflation_data() == {'2020': 0.01}
+    first = get_inflation_table()
+    assert get_inflation_table() is first
+    before = inflation_service._load_tables()
+
+    path.write_text(json.dumps({'US': {'2020': 0.05}, 'CA': {'2020': 0.03}}))
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000))
+    assert get_inflation_data() == {'2020': 0.05}
+    assert get_inflation_data('CA') == {'2020': 0.03}
+    assert get_inflation_data('XX') is None
+    # Readers holding the old mapping are never handed a cleared or half-built one
+    assert list(before) == ['US'] and before['US'] is first
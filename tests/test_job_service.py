@@ -0,0 +1,133 @@
+# tests/test_job_service.py
+import json
+import time
+import pytest
+from app import create_app
+from services.cache_service import cache
+from services.job_service import FINISHED_STATES, PENDING_JOBS_KEY
+
+REQUEST = {
+    'initialInvestment': 1000,
+    'startYear': 2015,
+    'endYear': 2020,
+    'stocks': ['AAPL', 'MSFT'],
+    'additionAmount': 100,
+    'additionFrequency': 'monthly',
+    'adjustForInflation': False
+}
+
+
+@pytest.fixture
+def app(download_calls):
+    app = create_app('development')
+    app.config.update(PRICE_STORE_ENABLED=False, JOB_POLL_INTERVAL=0.01)
+    with app.app_context():
+        cache.clear()
+    yield app
+    app.extensions['job_backend'].shutdown()
+
+
+def wait_for(client, job_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f'/jobs/{job_id}').json
+        if job['state'] in FINISHED_STATES:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f'job {job_id} did not finish')
+
+
+def test_job_runs_the_endpoint(app):
+    client = app.test_client()
+    submitted = client.post('/jobs', json={'kind': 'calculate', 'params': REQUEST})
+    assert submitted.status_code == 202
+    assert submitted.headers['Location'] == submitted.json['statusUrl'] == f"/jobs/{submitted.json['id']}"
+    assert submitted.json['state'] in ('queued', 'running', 'succeeded')
+
+    job = wait_for(client, submitted.json['id'])
+    assert job['state'] == 'succeeded' and job['status'] == 200
+    assert job['result'] == client.post('/calculate', json=REQUEST).json
+
+
+def test_failed_job_keeps_the_error(app):
+    client = app.test_client()
+    submitted = client.post('/jobs', json={'kind': 'rolling', 'params': {**REQUEST, 'holdingYears': 0}})
+    job = wait_for(client, submitted.json['id'])
+    assert job['state'] == 'failed' and job['status'] == 400
+    assert 'error' in job['error'] and 'result' not in job
+
+
+def test_invalid_and_unknown_jobs(app):
+    client = app.test_client()
+    assert client.post('/jobs', json={'kind': 'download', 'params': REQUEST}).status_code == 400
+    assert client.post('/jobs', json={'kind': 'calculate', 'params': [1]}).status_code == 400
+    assert client.get('/jobs/missing').status_code == 404
+
+
+def test_job_status_stream(app, monkeypatch):
+    slow_downloads(monkeypatch, 0.2)
+    client = app.test_client()
+    job_id = client.post('/jobs', json={'kind': 'calculate', 'params': REQUEST}).json['id']
+
+    response = client.get(f'/jobs/{job_id}?stream=ndjson')
+    assert response.mimetype == 'application/x-ndjson'
+    events = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert events[-1]['type'] == 'done'
+    assert events[-1]['data']['state'] == 'succeeded'
+    assert all(event['type'] == 'status' for event in events[:-1])
+
+
+def slow_downloads(monkeypatch, seconds):
+    from services import stock_service
+    download = stock_service._download
+
+    def slow_download(*args, **kwargs):
+        time.sleep(seconds)
+        return download(*args, **kwargs)
+
+    monkeypatch.setattr(stock_service, '_download', slow_download)
+
+
+def test_pending_jobs_are_capped(app, monkeypatch):
+    slow_downloads(monkeypatch, 0.3)
+    app.config['JOB_MAX_PENDING'] = 1
+    client = app.test_client()
+    first = client.post('/jobs', json={'kind': 'calculate', 'params': REQUEST})
+    refused = client.post('/jobs', json={'kind': 'calculate', 'params': {**REQUEST, 'startYear': 2016}})
+    assert first.status_code == 202
+    assert refused.status_code == 503 and refused.headers['Retry-After']
+
+    wait_for(client, first.json['id'])
+    time.sleep(0.05)
+    assert client.post('/jobs', json={'kind': 'calculate', 'params': REQUEST}).status_code == 202
+
+
+def test_job_status_stream_times_out(app, monkeypatch):
+    slow_downloads(monkeypatch, 0.5)
+    app.config['JOB_STREAM_TIMEOUT'] = 0.05
+    client = app.test_client()
+    job_id = client.post('/jobs', json={'kind': 'calculate', 'params': REQUEST}).json['id']
+
+    events = [json.loads(line) for line in client.get(f'/jobs/{job_id}?stream=ndjson').get_data(as_text=True).splitlines()]
+    assert events[-1]['type'] == 'timeout'
+    assert events[-1]['data']['state'] in ('queued', 'running')
+
+
+def test_celery_backend_runs_jobs(download_calls):
+    pytest.importorskip('celery')
+    app = create_app('development')
+    app.config.update(PRICE_STORE_ENABLED=False, JOB_BACKEND='celery',
+                      CELERY_BROKER_URL='memory://', CELERY_RESULT_BACKEND='cache+memory://')
+    from services.job_service import init_job_queue
+    backend = init_job_queue(app)
+    backend.celery.conf.task_always_eager = True
+    with app.app_context():
+        cache.clear()
+
+    client = app.test_client()
+    job_id = client.post('/jobs', json={'kind': 'calculate', 'params': REQUEST}).json['id']
+    assert client.get(f'/jobs/{job_id}').json['state'] == 'succeeded'
+    with app.app_context():
+        assert backend.pending() == 0
+        cache.cache.inc(PENDING_JOBS_KEY, app.config['JOB_MAX_PENDING'])
+    assert client.post('/jobs', json={'kind': 'calculate', 'params': REQUEST}).status_code == 503
@@ -0,0 +1,107 @@
+# tests/test_logging_service.py
+import logging
+import os
+import threading
+import pytest
+from services import logging_service
+from services.logging_service import configure_logging, log_event
+
+
+class RecordingHandler(logging.Handler):
+    """Keeps formatted messages and the thread that formatted them"""
+
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+        self.threads = []
+
+    def emit(self, record):
+        self.messages.append(self.format(record))
+        self.threads.append(threading.current_thread())
+
+
+class Rendered:
+    def __init__(self):
+        self.calls = 0
+
+    def __str__(self):
+        self.calls += 1
+        return 'rendered'
+
+
+@pytest.fixture
+def handler():
+    handler = RecordingHandler()
+    handler.setFormatter(logging.Formatter('%(levelname)s %(message)s'))
+    yield handler
+    configure_logging(logging.WARNING, use_queue=False, handlers=[logging.NullHandler()])
+
+
+def test_queued_records_are_formatted_on_the_listener_thread(handler):
+    configure_logging(logging.INFO, use_queue=True, handlers=[handler])
+    log_event(logging.getLogger('hot'), 'calculate.done', symbols=3, columnar=False)
+    logging_service._listener.stop()
+    logging_service._listener = None
+
+    assert handler.messages == ['INFO calculate.done symbols=3 columnar=False']
+    assert handler.threads[0] is not threading.current_thread()
+
+
+def test_disabled_and_sampled_out_events_are_never_rendered(handler):
+    disabled, sampled_out, kept = Rendered(), Rendered(), Rendered()
+    configure_logging(logging.WARNING, use_queue=False, handlers=[handler])
+    log_event(logging.getLogger('hot'), 'calculate.request', body=disabled)
+
+    configure_logging(logging.INFO, use_queue=False, sample_rate=0.0, handlers=[handler])
+    log_event(logging.getLogger('hot'), 'calculate.request', body=sampled_out)
+    log_event(logging.getLogger('hot'), 'calculate.error', sample_rate=1.0, body=kept)
+    assert disabled.calls == sampled_out.calls == 0 and kept.calls > 0
+    assert handler.messages == ['INFO calculate.error body=rendered']
+
+
+def test_plain_records_are_formatted_before_queueing(handler):
+    configure_logging(logging.INFO, use_queue=True, handlers=[handler])
+    symbols = ['AAPL']
+    logging.getLogger('plain').info('Fetching %s', symbols)
+    symbols.append('MSFT')
+    logging_service._listener.stop()
+    logging_service._listener = None
+
+    assert handler.messages == ["INFO Fetching ['AAPL']"]
+
+
+def test_default_handler_is_skipped_when_root_is_configured(handler, monkeypatch):
+    root = logging.getLogger()
+    monkeypatch.setattr(root, 'handlers', [handler])
+    configure_logging(logging.INFO)
+    assert root.handlers == [handler]
+    assert logging_service._listener is None
+
+
+def test_reconfiguring_replaces_installed_handlers(handler):
+    root = logging.getLogger()
+    before = list(root.handlers)
+    configure_logging(logging.INFO, use_queue=True, handlers=[handler])
+    configure_logging(logging.INFO, use_queue=True, handlers=[handler])
+    assert len([h for h in root.handlers if h not in before]) == 1
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork')
+def test_forked_child_writes_its_records(tmp_path):
+    path = tmp_path / 'child.log'
+    handler = logging.FileHandler(path)
+    configure_logging(logging.INFO, use_queue=True, handlers=[handler])
+    try:
+        pid = os.fork()
+        if pid == 0:
+            try:
+                logging.getLogger('child').warning('written by the child')
+                with logging_service._lock:
+                    logging_service._stop()
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+    finally:
+        configure_logging(logging.WARNING, use_queue=False, handlers=[logging.NullHandler()])
+        handler.close()
+    assert 'written by the child' in path.read_text()
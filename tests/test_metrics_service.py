@@ -0,0 +1,41 @@
+# tests/test_metrics_service.py
+from flask import Flask, g
+from services.metrics_service import Registry, count_cache, server_timing_header, timed
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    latency = registry.histogram('latency_seconds', 'Latency', ('stage',), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        latency.observe(value, stage='fetch')
+
+    lines = registry.render().splitlines()
+    assert lines[:2] == ['# HELP latency_seconds Latency', '# TYPE latency_seconds histogram']
+    assert 'latency_seconds_bucket{stage="fetch",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{stage="fetch",le="1.0"} 3' in lines
+    assert 'latency_seconds_bucket{stage="fetch",le="+Inf"} 4' in lines
+    assert 'latency_seconds_sum{stage="fetch"} 4.25' in lines
+    assert 'latency_seconds_count{stage="fetch"} 4' in lines
+
+
+def test_counter_escapes_labels():
+    registry = Registry()
+    lookups = registry.counter('lookups_total', 'Lookups', ('cache',))
+    lookups.inc(2, cache='a"b')
+    assert 'lookups_total{cache="a\\"b"} 2' in registry.render()
+
+
+def test_request_timings_feed_the_server_timing_header():
+    app = Flask(__name__)
+    with app.test_request_context():
+        with timed('fetch'):
+            pass
+        count_cache('prices', hits=2, misses=1)
+        count_cache('prices', misses=1)
+        header = server_timing_header(0.0123)
+        assert [entry[0] for entry in g.stage_timings] == ['fetch']
+
+    entries = header.split(', ')
+    assert entries[0].startswith('fetch;dur=')
+    assert entries[1] == 'prices-cache;desc="hits=2 misses=2"'
+    assert entries[2] == 'total;dur=12.3'
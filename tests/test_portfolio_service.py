@@ -0,0 +1,108 @@
+# tests/test_portfolio_service.py
+import numpy as np
+import pandas as pd
+import pytest
+from services.inflation_service import InflationTable
+from services.portfolio_service import simulate_portfolio
+from services.price_providers import synthetic_prices
+
+WEIGHTS = {'AAA': 0.5, 'BBB': 0.3, 'CCC': 0.2}
+
+
+@pytest.fixture
+def stocks():
+    dates = pd.bdate_range('2014-01-01', '2020-12-31')
+    return {
+        symbol: pd.Series(synthetic_prices(symbol, dates, volatility=0.03), index=dates)
+        for symbol in WEIGHTS
+    }
+
+
+def reference_portfolio(initial, start_year, end_year, stocks, weights, rebalance, amount, frequency,
+                        threshold=0.05, table=None):
+    """Day-by-day holdings ledger"""
+    frame = pd.DataFrame(stocks)
+    frame = frame[(frame.index.year >= start_year) & (frame.index.year < end_year)]
+    target = np.array([weights[symbol] for symbol in frame.columns])
+    target = target / target.sum()
+    every = {'monthly': 1, 'quarterly': 3, 'annually': 12}.get(rebalance)
+
+    shares = target * initial / frame.iloc[0].to_numpy()
+    invested = initial
+    records = []
+    rebalances = 0
+    for i, (date, row) in enumerate(frame.iterrows()):
+        price = row.to_numpy()
+        new_month = i > 0 and frame.index[i - 1].month != date.month
+        if new_month and every and (date.month - 1) % every == 0:
+            shares = target * (shares @ price) / price
+            rebalances += 1
+        if new_month and (frequency == 'monthly' or (frequency == 'annually' and date.month == 1)):
+            shares = shares + target * amount / price
+            invested += amount
+        if rebalance == 'threshold' and i > 0:
+            holdings = shares * price
+            if np.abs(holdings / holdings.sum() - target).max() > threshold:
+                shares = target * holdings.sum() / price
+                rebalances += 1
+        last_of_month = i + 1 == len(frame) or frame.index[i + 1].month != date.month
+        if last_of_month:
+            if table is not None and date.month == 12:
+                rate = table.rate([date.year])[0]
+                shares = shares * (1 - rate)
+                invested *= 1 - rate
+            total = shares @ price
+            records.append({
+                'year': date.year,
+                'month': date.month,
+                'date': date.strftime('%Y-%m'),
+                'invested': round(invested, 2),
+                'total': round(total, 2),
+                'gains': round(total - invested, 2),
+                'return_percentage': round((total - invested) / invested * 100, 2)
+            })
+    return records, rebalances
+
+
+@pytest.mark.parametrize('rebalance', ['none', 'monthly', 'quarterly', 'annually', 'threshold'])
+@pytest.mark.parametrize('frequency', ['monthly', 'annually'])
+def test_matches_holdings_ledger(monkeypatch, stocks, rebalance, frequency):
+    table = InflationTable({str(year): 0.02 for year in range(2010, 2021)})
+    monkeypatch.setattr('services.portfolio_service.get_inflation_table', lambda country: table)
+
+    result = simulate_portfolio(1000, 2015, 2020, stocks, WEIGHTS, rebalance, 100, frequency,
+                                adjust_for_inflation=True)
+    expected, rebalances = reference_portfolio(1000, 2015, 2020, stocks, WEIGHTS, rebalance, 100, frequency,
+                                               table=table)
+
+    assert [entry['symbol'] for entry in result] == ['Portfolio']
+    assert result[0]['rebalances'] == rebalances
+    assert len(result[0]['monthly_data']) == len(expected)
+    for point, reference in zip(result[0]['monthly_data'], expected):
+        assert point == pytest.approx(reference, abs=0.011)
+
+
+def test_threshold_without_contributions_matches_ledger(stocks):
+    # One stretch covers the whole history, crossed by many breaches
+    result = simulate_portfolio(1000, 2015, 2020, stocks, WEIGHTS, 'threshold', threshold=0.002)
+    expected, rebalances = reference_portfolio(1000, 2015, 2020, stocks, WEIGHTS, 'threshold', 0, 'none',
+                                               threshold=0.002)
+
+    assert result[0]['rebalances'] == rebalances > 100
+    for point, reference in zip(result[0]['monthly_data'], expected):
+        assert point == pytest.approx(reference, abs=0.011)
+
+
+def test_weights_default_to_equal_and_skip_symbols_without_data(stocks):
+    stocks['EMPTY'] = pd.Series(dtype=float)
+    result = simulate_portfolio(1000, 2015, 2020, stocks)
+    assert result[0]['weights'] == {'AAA': pytest.approx(1 / 3), 'BBB': pytest.approx(1 / 3), 'CCC': pytest.approx(1 / 3)}
+
+
+def test_scales_to_hundreds_of_holdings():
+    dates = pd.bdate_range('2000-01-01', '2019-12-31')
+    stocks = {f'S{i}': pd.Series(synthetic_prices(f'S{i}', dates), index=dates) for i in range(300)}
+    result = simulate_portfolio(10000, 2000, 2020, stocks, rebalance='threshold', addition_amount=500,
+                                addition_frequency='monthly', threshold=0.01)
+    assert len(result[0]['monthly_data']) == 240
+    assert result[0]['rebalances'] > 0
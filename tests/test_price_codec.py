@@ -0,0 +1,96 @@
+# tests/test_price_codec.py
+import pickle
+import numpy as np
+import pandas as pd
+import pytest
+from cachelib import RedisCache
+from services.price_codec import codec_stats, decode_price_entry, encode_price_entry
+from services.price_providers import synthetic_prices
+from services.resample_service import month_end_frame, year_end_series
+
+
+class FakeRedis:
+    """Dict-backed stand-in for the redis-py calls RedisCache makes"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, name):
+        return self.data.get(name)
+
+    def mget(self, names):
+        return [self.data.get(name) for name in names]
+
+    def set(self, name, value):
+        self.data[name] = value
+        return True
+
+    def setex(self, name, value, time):
+        return self.set(name, value)
+
+    def pipeline(self, transaction=True):
+        redis, results = self, []
+
+        class Pipeline:
+            def setex(self, name, value, time):
+                results.append(redis.setex(name, value, time))
+
+            def set(self, name, value):
+                results.append(redis.set(name, value))
+
+            def execute(self):
+                return results
+
+        return Pipeline()
+
+
+@pytest.fixture
+def daily():
+    dates = pd.bdate_range('2000-01-01', '2020-12-31')
+    return pd.Series(synthetic_prices('AAPL', dates), index=dates, name='AAPL')
+
+
+@pytest.mark.parametrize('compression', ['none', 'zlib'])
+def test_round_trip(daily, compression):
+    issue = {'status': 'partial_data', 'null_points': 3}
+    for prices in (daily, daily.astype(np.float32), month_end_frame(daily), year_end_series(daily)):
+        decoded, decoded_issue = decode_price_entry(encode_price_entry((prices, issue), compression))
+        if isinstance(prices, pd.DataFrame):
+            pd.testing.assert_frame_equal(decoded, prices, check_freq=False)
+        else:
+            pd.testing.assert_series_equal(decoded, prices, check_freq=False)
+        assert decoded_issue == issue
+
+    assert decode_price_entry(encode_price_entry((None, {'status': 'no_data'}))) == (None, {'status': 'no_data'})
+
+
+def test_uncompressed_values_are_views_of_the_buffer(daily):
+    blob = encode_price_entry((month_end_frame(daily), None))
+    frame, _ = decode_price_entry(blob)
+    buffer = np.frombuffer(blob, dtype=np.uint8)
+    assert np.shares_memory(frame['close'].to_numpy(), buffer)
+    assert np.shares_memory(frame['anchor_close'].to_numpy(), buffer)
+
+
+def test_missing_compressor_falls_back(daily):
+    blob = encode_price_entry((daily, None), 'zstd')
+    pd.testing.assert_series_equal(decode_price_entry(blob)[0], daily, check_freq=False)
+    with pytest.raises(ValueError):
+        encode_price_entry((daily, None), 'brotli')
+
+
+def test_redis_backend_stores_the_encoded_entry(daily):
+    redis = FakeRedis()
+    backend = RedisCache(host=redis)
+    entry = (daily, None)
+    backend.set_many({'prices:AAPL:2000:2021': encode_price_entry(entry)}, timeout=60)
+
+    stored = redis.data['prices:AAPL:2000:2021']
+    assert len(stored) < len(pickle.dumps(entry)) * 0.8
+    pd.testing.assert_series_equal(decode_price_entry(backend.get('prices:AAPL:2000:2021'))[0], daily, check_freq=False)
+
+
+def test_codec_stats(daily):
+    stats = codec_stats((daily, None), repeat=3)
+    assert stats['codec_bytes'] < stats['pickle_bytes']
+    assert stats['codec_load_seconds'] > 0
@@ -0,0 +1,78 @@
+# tests/test_price_store.py
+
+import json
+import pytest
+import pandas as pd
+import numpy as np
+from datetime import date
+from services.price_store import PriceStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PriceStore(str(tmp_path))
+
+
+def make_series(start, end):
+    dates = pd.bdate_range(start, end, inclusive='left')
+    return pd.Series(np.arange(len(dates), dtype=float) + 100, index=dates)
+
+
+def test_empty_store_misses_whole_range(store):
+    assert store.missing_ranges('AAPL', '2020-01-01', '2021-01-01') == [
+        (date(2020, 1, 1), date(2021, 1, 1))
+    ]
+    assert store.read('AAPL', '2020-01-01', '2021-01-01').empty
+
+
+def test_only_uncovered_ranges_are_missing(store):
+    store.write('AAPL', make_series('2010-01-01', '2015-01-01'), '2010-01-01', '2015-01-01')
+
+    assert store.missing_ranges('AAPL', '2011-01-01', '2014-01-01') == []
+    assert store.missing_ranges('AAPL', '2008-01-01', '2016-01-01') == [
+        (date(2008, 1, 1), date(2010, 1, 1)),
+        (date(2015, 1, 1), date(2016, 1, 1))
+    ]
+
+
+def test_appended_ranges_are_merged_and_sliced(store):
+    store.write('BRK-B', make_series('2010-01-01', '2012-01-01'), '2010-01-01', '2012-01-01')
+    store.write('BRK-B', make_series('2012-01-01', '2013-01-01'), '2012-01-01', '2013-01-01')
+
+    assert store.coverage('BRK-B') == (date(2010, 1, 1), date(2013, 1, 1))
+    window = store.read('BRK-B', '2011-06-01', '2012-06-01')
+    assert window.index[0] >= pd.Timestamp('2011-06-01')
+    assert window.index[-1] < pd.Timestamp('2012-06-01')
+    assert window.index.is_monotonic_increasing
+
+
+def test_overlapping_write_prefers_fresh_values(store):
+    store.write('MSFT', make_series('2020-01-01', '2020-02-01'), '2020-01-01', '2020-02-01')
+    fresh = make_series('2020-01-15', '2020-02-01') * 2
+    store.write('MSFT', fresh, '2020-01-15', '2020-02-01')
+
+    window = store.read('MSFT', '2020-01-01', '2020-02-01')
+    assert not window.index.duplicated().any()
+    assert window.loc[fresh.index].tolist() == fresh.tolist()
+
+
+def test_readjusted_prices_replace_the_stored_history(store):
+    store.write('AAPL', make_series('2020-01-01', '2020-02-01'), '2020-01-01', '2020-02-01')
+    assert store.missing_ranges('AAPL', '2020-01-01', '2020-03-01', overlap=True) == [
+        (date(2020, 1, 31), date(2020, 3, 1))
+    ]
+    readjusted = make_series('2020-01-31', '2020-03-01') / 2
+
+    assert not store.write('AAPL', readjusted, '2020-01-31', '2020-03-01')
+    assert store.coverage('AAPL') == (date(2020, 1, 31), date(2020, 3, 1))
+    assert store.read('AAPL', '2020-01-01', '2020-03-01').tolist() == readjusted.tolist()
+
+
+def test_writes_switch_to_a_new_data_file(store, tmp_path):
+    for month in (1, 2):
+        series = make_series(f'2020-{month:02d}-01', f'2020-{month + 1:02d}-01')
+        store.write('AAPL', series, f'2020-{month:02d}-01', f'2020-{month + 1:02d}-01')
+
+    data_files = sorted(path.name for path in tmp_path.glob('AAPL@*.npy'))
+    assert len(data_files) == 1
+    assert json.loads((tmp_path / 'AAPL.json').read_text())['data'] == data_files[0]
@@ -0,0 +1,69 @@
+# tests/test_projection_service.py
+import numpy as np
+import pandas as pd
+import pytest
+from services import projection_service
+from services.projection_service import historical_monthly_returns, project_growth
+from services.resample_service import month_end_frame
+
+
+def compound(initial, months, rate, amount, inflation=0.0):
+    """Month-by-month reference for a constant monthly return"""
+    value = initial
+    for month in range(1, months + 1):
+        if month > 1:
+            value += amount
+        value *= 1 + rate
+        if month % 12 == 0:
+            value *= 1 - inflation
+    return value
+
+
+@pytest.mark.parametrize('method', ['bootstrap', 'parametric'])
+def test_constant_history_projects_deterministically(method):
+    projection = project_growth(np.full(120, 0.01), 1000, 5, 100, 'monthly', inflation_rate=0.02,
+                                paths=200, method=method, seed=7)
+    expected = compound(1000, 60, 0.01, 100, inflation=0.02)
+    for band in projection['percentiles'].values():
+        assert band[-1] == pytest.approx(expected, abs=0.01)
+    assert projection['invested'][-1] == pytest.approx(compound(1000, 60, 0.0, 100, inflation=0.02), abs=0.01)
+
+
+def test_bands_are_ordered_and_seeded():
+    returns = np.random.default_rng(0).normal(0.007, 0.045, 240)
+    first = project_growth(returns, 1000, 10, paths=3000, seed=1)
+    again = project_growth(returns, 1000, 10, paths=3000, seed=1)
+    assert first == again
+    bands = np.array([first['percentiles'][p] for p in ('5', '25', '50', '75', '95')])
+    assert (np.diff(bands, axis=0) >= 0).all()
+
+
+def test_process_pool_matches_in_process(monkeypatch):
+    monkeypatch.setattr(projection_service, 'PATH_CHUNK_SIZE', 500)
+    monkeypatch.setattr(projection_service, 'PARALLEL_THRESHOLD', 1000)
+    monkeypatch.setattr(projection_service, 'usable_cpus', lambda: 2)
+    returns = np.random.default_rng(0).normal(0.007, 0.045, 240)
+    pooled = project_growth(returns, 1000, 5, 50, 'annually', paths=2000, seed=3, max_workers=2)
+    pool = projection_service._pool['executor']
+    assert project_growth(returns, 1000, 5, 50, 'annually', paths=2000, seed=3, max_workers=2) == pooled
+    assert projection_service._pool['executor'] is pool
+
+    in_process = project_growth(returns, 1000, 5, 50, 'annually', paths=2000, seed=3, max_workers=1)
+    assert pooled == in_process
+
+
+def test_single_cpu_hosts_stay_in_process(monkeypatch):
+    monkeypatch.setattr(projection_service, 'PARALLEL_THRESHOLD', 1000)
+    monkeypatch.setattr(projection_service, 'usable_cpus', lambda: 1)
+    monkeypatch.setattr(projection_service, '_project_on_pool', None)
+    returns = np.random.default_rng(0).normal(0.007, 0.045, 240)
+    assert project_growth(returns, 1000, 5, paths=2000, seed=3, max_workers=4)['paths'] == 2000
+
+
+def test_weighted_basket_returns():
+    dates = pd.bdate_range('2019-01-01', '2020-12-31')
+    a = pd.Series(100 * 1.01 ** np.arange(len(dates)), index=dates)
+    b = pd.Series(100.0, index=dates)
+    returns = historical_monthly_returns({'A': month_end_frame(a), 'B': month_end_frame(b)}, {'A': 3, 'B': 1})
+    single = historical_monthly_returns({'A': month_end_frame(a)})
+    assert returns == pytest.approx(0.75 * single)
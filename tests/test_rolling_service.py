@@ -0,0 +1,91 @@
+# tests/test_rolling_service.py
+import numpy as np
+import pandas as pd
+import pytest
+from services.data_service import month_end_frame
+from services.inflation_service import InflationTable
+from services.price_providers import synthetic_prices
+from services.rolling_service import _strided_cumsum, rolling_windows
+
+
+@pytest.fixture
+def stocks():
+    dates = pd.bdate_range('2010-01-01', '2020-12-31')
+    late = pd.bdate_range('2013-05-01', '2020-12-31')
+    return {
+        'AAA': month_end_frame(pd.Series(synthetic_prices('AAA', dates), index=dates)),
+        'LATE': month_end_frame(pd.Series(synthetic_prices('LATE', late), index=late))
+    }
+
+
+def reference_window(frame, start, holding_months, initial, amount, frequency, table=None):
+    """Month-by-month simulation of one window, deflating both sides each December"""
+    months = pd.period_range(start, periods=holding_months, freq='M')
+    rows = frame.set_axis(frame.index.to_period('M')).reindex(months)
+    units = invested = 0.0
+    flows = []
+    for k, (month, row) in enumerate(rows.iterrows()):
+        due = k == 0 or (frequency == 'monthly' or (frequency == 'annually' and k % 12 == 0))
+        if due:
+            paid = initial if k == 0 else amount
+            units += paid / row['first_close']
+            invested += paid
+            flows.append((k, paid))
+        if table is not None and month.month == 12 and table.has_rate(np.array([month.year]))[0]:
+            step = 1 - table.rate(np.array([month.year]))[0]
+            units *= step
+            invested *= step
+    return units * rows['close'].iloc[-1], invested, flows
+
+
+def test_strided_cumsum():
+    values = np.arange(1, 11, dtype=np.float64)
+    assert _strided_cumsum(values, 1).tolist() == np.cumsum(values).tolist()
+    assert _strided_cumsum(values, 3).tolist() == [1, 2, 3, 5, 7, 9, 12, 15, 18, 22]
+
+
+@pytest.mark.parametrize('amount,frequency', [(0, 'none'), (100, 'monthly'), (500, 'annually')])
+def test_windows_match_reference(stocks, amount, frequency):
+    table = InflationTable({str(year): 0.01 * (year - 2008) for year in range(2008, 2021)})
+    results = rolling_windows(stocks, 2010, 2018, 36, 1000, amount, frequency, inflation_table=table)
+    assert [entry['symbol'] for entry in results] == ['AAA', 'LATE']
+
+    for entry in results:
+        windows = entry['windows']
+        first_start = '2010-01' if entry['symbol'] == 'AAA' else '2013-05'
+        assert windows['start'][0] == first_start
+        assert windows['end'][-1] == '2020-11'
+        for start, final, invested in zip(windows['start'], windows['final'], windows['invested']):
+            expected_final, expected_invested, _ = reference_window(
+                stocks[entry['symbol']], start, 36, 1000, amount, frequency, table
+            )
+            assert final == pytest.approx(expected_final, abs=0.011)
+            assert invested == pytest.approx(expected_invested, abs=0.011)
+
+
+def test_annualized_return_is_cagr_or_irr(stocks):
+    frame = stocks['AAA']
+    lump = rolling_windows({'AAA': frame}, 2010, 2012, 24, 1000)[0]
+    final, _, _ = reference_window(frame, lump['windows']['start'][5], 24, 1000, 0, 'none')
+    assert lump['windows']['annualized_return'][5] == pytest.approx(((final / 1000) ** 0.5 - 1) * 100, abs=0.011)
+
+    dca = rolling_windows({'AAA': frame}, 2010, 2012, 24, 1000, 100, 'monthly')[0]
+    final, _, flows = reference_window(frame, dca['windows']['start'][5], 24, 1000, 100, 'monthly')
+    monthly = (1 + dca['windows']['annualized_return'][5] / 100) ** (1 / 12) - 1
+    npv = final / (1 + monthly) ** 24 - sum(paid / (1 + monthly) ** k for k, paid in flows)
+    assert abs(npv) < final * 1e-3
+
+
+def test_summary(stocks):
+    entry = rolling_windows(stocks, 2010, 2015, 12, 1000, 50, 'monthly')[0]
+    windows, summary = entry['windows'], entry['summary']
+    ratios = np.array(windows['final']) / np.array(windows['invested'])
+    assert summary['count'] == len(windows['start']) == 60
+    assert summary['worst']['start'] == windows['start'][int(np.argmin(ratios))]
+    assert summary['best']['start'] == windows['start'][int(np.argmax(ratios))]
+    assert summary['loss_probability'] == pytest.approx(np.mean(ratios < 1), abs=1e-4)
+    assert list(summary['annualized_return_percentiles']) == ['5', '25', '50', '75', '95']
+
+
+def test_windows_past_the_data_are_dropped(stocks):
+    assert rolling_windows(stocks, 2019, 2021, 36, 1000) == []
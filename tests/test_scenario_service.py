@@ -0,0 +1,81 @@
+# tests/test_scenario_service.py
+
+import pytest
+import pandas as pd
+import numpy as np
+from services import data_service, scenario_service
+from services.data_service import generate_data_points
+from services.inflation_service import InflationTable
+from services.resample_service import month_end_frame
+from services.scenario_service import evaluate_scenarios
+
+INFLATION = {'2018': 0.019, '2019': 0.023, '2020': 0.012, '2021': 0.047}
+
+
+@pytest.fixture
+def daily():
+    rng = np.random.default_rng(11)
+    first = pd.bdate_range('2015-01-01', '2021-12-31')
+    second = pd.bdate_range('2017-03-01', '2021-12-31')
+    return {
+        'AAA': pd.Series(100 * np.cumprod(1 + rng.normal(0.0004, 0.01, len(first))), index=first),
+        'BBB': pd.Series(20 * np.cumprod(1 + rng.normal(0.0003, 0.015, len(second))), index=second)
+    }
+
+
+def scenario(id, start_year, end_year, frequency, stocks=('AAA', 'BBB'), adjust=False, initial=1000, amount=100):
+    return {
+        'id': id,
+        'initial': initial,
+        'start_year': start_year,
+        'end_year': end_year,
+        'addition_amount': amount,
+        'addition_frequency': frequency,
+        'adjust_for_inflation': adjust,
+        'stocks': list(stocks)
+    }
+
+
+def test_batch_matches_individual_calculations(monkeypatch, daily):
+    monkeypatch.setattr(data_service, 'get_inflation_table', lambda country: InflationTable(INFLATION))
+    scenarios = [
+        scenario('a', 2015, 2020, 'monthly'),
+        scenario('b', 2018, 2021, 'annually', adjust=True),
+        scenario('c', 2016, 2019, 'none', stocks=['BBB'], initial=5000),
+        scenario('d', 2019, 2022, 'monthly', adjust=True, amount=250)
+    ]
+    frames = {symbol: month_end_frame(series) for symbol, series in daily.items()}
+
+    results = evaluate_scenarios(frames, scenarios, {'US': InflationTable(INFLATION)})
+
+    for s in scenarios:
+        # What a standalone /calculate would have fetched for this range
+        fetched = {
+            symbol: series[f"{s['start_year']}-01-01":f"{s['end_year']}-12-30"]
+            for symbol, series in daily.items() if symbol in s['stocks']
+        }
+        expected = generate_data_points(
+            s['initial'], s['start_year'], s['end_year'], fetched,
+            s['addition_amount'], s['addition_frequency'], s['adjust_for_inflation']
+        )
+        assert results[s['id']] == expected
+
+
+def test_unknown_symbols_produce_no_results(daily):
+    results = evaluate_scenarios(daily, [scenario('x', 2016, 2018, 'none', stocks=['ZZZ'])])
+    assert results == {'x': []}
+
+
+def test_scenarios_are_evaluated_in_bounded_chunks(monkeypatch, daily):
+    frames = {symbol: month_end_frame(series) for symbol, series in daily.items()}
+    scenarios = [scenario(str(i), 2015 + i % 4, 2020 + i % 2, ('monthly', 'annually', 'none')[i % 3]) for i in range(7)]
+    whole = evaluate_scenarios(frames, scenarios)
+
+    calls = []
+    growth_arrays = scenario_service.scenario_growth_arrays
+    monkeypatch.setattr(scenario_service, 'MAX_CHUNK_CELLS', 3 * 2 * 84)
+    monkeypatch.setattr(scenario_service, 'scenario_growth_arrays',
+                        lambda aligned, chunk, *args: calls.append(len(chunk)) or growth_arrays(aligned, chunk, *args))
+
+    assert evaluate_scenarios(frames, scenarios) == whole
+    assert calls == [3, 3, 1]
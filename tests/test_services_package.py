@@ -0,0 +1,41 @@
+# tests/test_services_package.py
+import gc
+import os
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+import services
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+def test_create_app_does_not_import_heavy_modules():
+    script = (
+        "import sys, app\n"
+        "app.create_app()\n"
+        "print(','.join(m for m in ('numpy', 'pandas', 'plotly', 'yfinance') if m in sys.modules))\n"
+    )
+    env = {**os.environ, 'SECRET_KEY': 'test-secret-key', 'PRELOAD_SERVICES': 'false'}
+    result = subprocess.run([sys.executable, '-c', script], cwd=PROJECT_ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ''
+
+
+def test_exports_resolve_lazily():
+    from services import stock_service
+    assert services.fetch_month_end_batch is stock_service.fetch_month_end_batch
+    assert set(services.__all__) <= set(dir(services))
+    with pytest.raises(AttributeError):
+        services.not_a_service
+
+
+def test_preload_imports_services_and_freezes():
+    try:
+        timings = services.preload()
+        assert gc.get_freeze_count() > 0
+    finally:
+        gc.unfreeze()
+    for module_name in services.PRELOAD_MODULES:
+        assert f"services.{module_name}" in sys.modules
+    assert all(seconds >= 0 for seconds in timings.values())
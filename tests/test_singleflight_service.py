@@ -0,0 +1,106 @@
+# tests/test_singleflight_service.py
+import threading
+import time
+import pytest
+from app import create_app
+from services import singleflight_service
+from services.cache_service import cache
+from services.singleflight_service import SingleFlight
+
+
+@pytest.fixture
+def app():
+    app = create_app('development')
+    with app.app_context():
+        cache.clear()
+        yield app
+
+
+def run_concurrently(app, target, count):
+    results = [None] * count
+
+    def run(i):
+        with app.app_context():
+            results[i] = target()
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_callers_share_one_computation(app):
+    flights = SingleFlight('test')
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return 'value'
+
+    results = run_concurrently(app, lambda: flights.do('key', compute), 5)
+    assert results == ['value'] * 5
+    assert len(calls) == 1
+    # Nothing lingers once the flight lands
+    assert flights.do('key', compute) == 'value'
+    assert len(calls) == 2
+
+
+def test_overlapping_key_sets_compute_each_key_once(app):
+    flights = SingleFlight('test')
+    computed = []
+    started = threading.Event()
+
+    def compute(keys):
+        computed.extend(keys)
+        started.set()
+        time.sleep(0.2)
+        return {key: key.upper() for key in keys}
+
+    first = threading.Thread(target=lambda: run_concurrently(app, lambda: flights.do_many(['a', 'b'], compute), 1))
+    first.start()
+    started.wait()
+    assert flights.do_many(['b', 'c'], compute) == {'b': 'B', 'c': 'C'}
+    first.join()
+    assert sorted(computed) == ['a', 'b', 'c']
+
+
+def test_errors_reach_every_waiter(app):
+    flights = SingleFlight('test')
+
+    def compute():
+        time.sleep(0.1)
+        raise ValueError('upstream failed')
+
+    def call():
+        try:
+            flights.do('key', compute)
+        except ValueError as e:
+            return str(e)
+
+    assert run_concurrently(app, call, 3) == ['upstream failed'] * 3
+
+
+def test_waits_for_a_flight_held_by_another_worker(app, monkeypatch):
+    monkeypatch.setattr(singleflight_service, 'POLL_INTERVAL', 0.01)
+    flights = SingleFlight('test')
+    # Another worker owns the flight and publishes its result a little later
+    cache.add(flights._lock_key('key'), 1)
+
+    def other_worker():
+        time.sleep(0.1)
+        with app.app_context():
+            cache.set(flights._result_key('key'), 'remote')
+            cache.delete(flights._lock_key('key'))
+
+    threading.Thread(target=other_worker).start()
+    assert flights.do('key', lambda: 'local') == 'remote'
+
+
+def test_computes_when_the_other_worker_gives_up(app, monkeypatch):
+    monkeypatch.setattr(singleflight_service, 'POLL_INTERVAL', 0.01)
+    flights = SingleFlight('test')
+    cache.add(flights._lock_key('key'), 1, timeout=1)
+    assert flights.do('key', lambda: 'local') == 'local'
@@ -0,0 +1,55 @@
+# tests/test_stock_list_service.py
+
+import json
+import os
+from services import stock_list_service
+from services.stock_list_service import StockIndex, search_stocks
+
+STOCKS = [
+    {'symbol': 'AMAT', 'name': 'Applied Materials Inc.'},
+    {'symbol': 'APPN', 'name': 'Appian Corporation'},
+    {'symbol': 'AAPL', 'name': 'Apple Inc.'},
+    {'symbol': 'APP', 'name': 'AppLovin Corporation'},
+    {'symbol': 'MSFT', 'name': 'Microsoft Corporation'},
+    {'symbol': 'PNAP', 'name': 'Pineapple Holdings'}
+]
+
+
+def symbols(results):
+    return [stock['symbol'] for stock in results]
+
+
+def test_ranks_exact_then_prefix_then_name():
+    index = StockIndex(STOCKS)
+    assert symbols(index.search('app')) == ['APP', 'APPN', 'AMAT', 'AAPL', 'PNAP']
+
+
+def test_substring_matches_names_and_symbols():
+    index = StockIndex(STOCKS)
+    assert symbols(index.search('soft')) == ['MSFT']
+    assert symbols(index.search('apl')) == ['AAPL']
+    assert symbols(index.search('corporation')) == ['APPN', 'APP', 'MSFT']
+
+
+def test_short_queries_match_substrings():
+    index = StockIndex(STOCKS)
+    assert symbols(index.search('m')) == ['MSFT', 'AMAT']
+    assert symbols(index.search('sf')) == ['MSFT']
+    assert symbols(index.search('pn')) == ['PNAP', 'APPN']
+
+
+def test_limit():
+    index = StockIndex(STOCKS)
+    assert symbols(index.search('a', limit=2)) == ['AMAT', 'APPN']
+    assert index.search('  ') == []
+
+
+def test_index_rebuilds_when_file_changes(tmp_path, monkeypatch):
+    path = tmp_path / 'stock_list.json'
+    path.write_text(json.dumps({'stocks': STOCKS[:1]}))
+    monkeypatch.setattr(stock_list_service, '_data_path', lambda: str(path))
+    assert symbols(search_stocks('a')) == ['AMAT']
+
+    path.write_text(json.dumps({'stocks': STOCKS}))
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000))
+    assert 'AAPL' in symbols(search_stocks('a'))
@@ -0,0 +1,188 @@
+# tests/test_stock_service.py
+
+import time
+import pytest
+import numpy as np
+import pandas as pd
+from app import create_app
+from services.cache_service import cache
+from services.price_providers import FakePriceProvider, set_price_provider
+from services.stock_service import fetch_stock_data_batch, fetch_month_end_batch, fetch_year_end_batch
+
+
+@pytest.fixture
+def app():
+    app = create_app('development')
+    app.config['PRICE_STORE_ENABLED'] = False
+    with app.app_context():
+        cache.clear()
+        yield app
+
+
+def test_overlapping_batches_reuse_per_symbol_entries(app, download_calls):
+    fetch_stock_data_batch(['AAPL', 'MSFT'], 2020, 2021)
+    fetch_stock_data_batch(['MSFT', 'AAPL'], 2020, 2021)
+    result, invalid_symbols, _ = fetch_stock_data_batch(['AAPL', 'GOOG'], 2020, 2021)
+
+    assert download_calls == [['AAPL', 'MSFT'], ['GOOG']]
+    assert list(result) == ['AAPL', 'GOOG']
+    assert invalid_symbols == []
+
+
+def test_invalid_symbols_are_cached(app, download_calls):
+    _, invalid_symbols, data_issues = fetch_stock_data_batch(['AAPL', 'BOGUS'], 2020, 2021)
+    _, invalid_again, _ = fetch_stock_data_batch(['BOGUS'], 2020, 2021)
+
+    assert invalid_symbols == ['BOGUS'] == invalid_again
+    assert data_issues['BOGUS']['status'] == 'no_valid_data'
+    assert download_calls == [['AAPL', 'BOGUS']]
+
+
+def test_different_ranges_are_separate_entries(app, download_calls):
+    fetch_stock_data_batch(['AAPL'], 2020, 2021)
+    fetch_stock_data_batch(['AAPL'], 2019, 2021)
+    assert download_calls == [['AAPL'], ['AAPL']]
+
+
+def test_month_end_frames_are_materialized_once(app, download_calls):
+    frames, invalid_symbols, _ = fetch_month_end_batch(['AAPL', 'BOGUS'], 2020, 2021)
+    year_ends, _, _ = fetch_year_end_batch(['AAPL'], 2020, 2021)
+    fetch_month_end_batch(['AAPL'], 2020, 2021)
+
+    assert invalid_symbols == ['BOGUS']
+    assert list(frames['AAPL'].columns) == ['close', 'first_close', 'anchor_close']
+    assert (frames['AAPL'].index.is_month_end).all()
+    assert len(year_ends['AAPL']) == 2
+    assert download_calls == [['AAPL', 'BOGUS']]
+
+
+def test_float32_price_dtype(app, download_calls):
+    app.config['PRICE_DTYPE'] = 'float32'
+    daily, _, _ = fetch_stock_data_batch(['AAPL'], 2020, 2021)
+    frames, _, _ = fetch_month_end_batch(['AAPL'], 2020, 2021)
+    assert daily['AAPL'].dtype == np.float32
+    assert (frames['AAPL'].dtypes == np.float32).all()
+
+
+@pytest.fixture
+def fake_provider(app):
+    provider = FakePriceProvider(latency=0.05, invalid_symbols={'BOGUS'})
+    set_price_provider(provider)
+    yield provider
+    set_price_provider(None)
+
+
+def test_large_lists_download_in_concurrent_chunks(app, fake_provider):
+    app.config.update(FETCH_CHUNK_SIZE=2, FETCH_MAX_WORKERS=4)
+    symbols = ['S0', 'S1', 'S2', 'BOGUS', 'S4', 'S5', 'S6', 'S7']
+
+    started = time.perf_counter()
+    result, invalid_symbols, data_issues = fetch_stock_data_batch(symbols, 2020, 2021)
+    elapsed = time.perf_counter() - started
+
+    assert sorted(map(sorted, fake_provider.calls)) == [['BOGUS', 'S2'], ['S0', 'S1'], ['S4', 'S5'], ['S6', 'S7']]
+    assert list(result) == ['S0', 'S1', 'S2', 'S4', 'S5', 'S6', 'S7']
+    assert invalid_symbols == ['BOGUS']
+    assert data_issues['BOGUS']['status'] == 'no_valid_data'
+    assert elapsed < 4 * fake_provider.latency
+
+
+def test_failing_chunk_only_invalidates_its_symbols(app, fake_provider, monkeypatch):
+    app.config.update(FETCH_CHUNK_SIZE=1)
+    download = fake_provider.download
+
+    def flaky(symbols, start_date, end_date):
+        if symbols == ['MSFT']:
+            raise ConnectionError('upstream reset')
+        return download(symbols, start_date, end_date)
+    monkeypatch.setattr(fake_provider, 'download', flaky)
+
+    result, invalid_symbols, data_issues = fetch_stock_data_batch(['AAPL', 'MSFT', 'GOOG'], 2020, 2021)
+
+    assert list(result) == ['AAPL', 'GOOG']
+    assert invalid_symbols == ['MSFT']
+    assert data_issues['MSFT'] == {'status': 'error', 'error': 'upstream reset'}
+
+
+def test_empty_store_top_ups_are_recorded_without_warnings(tmp_path, download_calls):
+    from services.price_store import PriceStore
+    from services.stock_service import _fetch_through_store
+    store = PriceStore(str(tmp_path))
+    _fetch_through_store(store, ['AAPL'], '2020-01-01', '2020-01-04')
+
+    # 2020-01-04 - 2020-01-05 is a weekend: the top-up only gets Friday's overlap bar back
+    for _ in range(2):
+        result, invalid_symbols, data_issues = _fetch_through_store(store, ['AAPL'], '2020-01-01', '2020-01-05')
+    assert download_calls == [['AAPL'], ['AAPL']]
+    assert list(result) == ['AAPL'] and invalid_symbols == [] and data_issues == {}
+    assert store.coverage('AAPL')[1].isoformat() == '2020-01-05'
+
+
+def test_store_refetches_symbols_adjusted_upstream(tmp_path, download_calls):
+    from services.price_store import PriceStore
+    from services.stock_service import _fetch_through_store
+    store = PriceStore(str(tmp_path))
+    _fetch_through_store(store, ['AAPL'], '2020-01-01', '2020-02-01')
+    # A dividend upstream rescales every earlier adjusted close
+    stored = store.read('AAPL', '2020-01-01', '2020-02-01')
+    store.write('AAPL', stored * 0.98, '2020-01-01', '2020-02-01')
+
+    result, _, _ = _fetch_through_store(store, ['AAPL'], '2020-01-01', '2020-03-01')
+    expected, _, _ = _fetch_through_store(PriceStore(str(tmp_path / 'fresh')), ['AAPL'], '2020-01-01', '2020-03-01')
+    assert result['AAPL'].tolist() == expected['AAPL'].tolist()
+    assert store.coverage('AAPL')[0].isoformat() == '2020-01-01'
+
+
+def test_yfinance_calls_run_concurrently_without_mixing_tickers(monkeypatch):
+    yf = pytest.importorskip('yfinance')
+    from concurrent.futures import ThreadPoolExecutor
+    from services.price_providers import FIELDS, YFinanceProvider
+    active, peak = [0], [0]
+
+    class Ticker:
+        def __init__(self, symbol):
+            self.symbol = symbol
+
+        def history(self, **kwargs):
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            active[0] -= 1
+            if self.symbol == 'BOGUS':
+                return pd.DataFrame()
+            dates = pd.bdate_range(kwargs['start'], kwargs['end'], inclusive='left', tz='America/New_York')
+            return pd.DataFrame({field: float(ord(self.symbol[0])) for field in FIELDS}, index=dates)
+
+    monkeypatch.setattr(yf, 'Ticker', Ticker)
+    provider = YFinanceProvider()
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        frames = list(executor.map(lambda chunk: provider.download(chunk, '2020-01-01', '2020-02-01'),
+                                   [['A', 'B'], ['C', 'BOGUS'], ['D']]))
+    assert peak[0] > 2
+    assert [sorted(frame.columns.levels[0]) for frame in frames] == [['A', 'B'], ['C'], ['D']]
+    assert frames[0]['B']['Close'].eq(ord('B')).all() and frames[0].index.tz is None
+
+
+def test_queued_chunks_get_their_own_timeout(app, fake_provider):
+    fake_provider.latency = 0.15
+    app.config.update(FETCH_CHUNK_SIZE=1, FETCH_MAX_WORKERS=1, FETCH_TIMEOUT=0.25)
+
+    result, invalid_symbols, _ = fetch_stock_data_batch(['AAPL', 'MSFT', 'GOOG'], 2020, 2021)
+    assert list(result) == ['AAPL', 'MSFT', 'GOOG'] and invalid_symbols == []
+
+
+def test_hung_chunk_times_out_alone(app, fake_provider, monkeypatch):
+    app.config.update(FETCH_CHUNK_SIZE=1, FETCH_MAX_WORKERS=2, FETCH_TIMEOUT=0.1)
+    download = fake_provider.download
+
+    def hanging(symbols, start_date, end_date):
+        if symbols == ['MSFT']:
+            time.sleep(0.5)
+        return download(symbols, start_date, end_date)
+    monkeypatch.setattr(fake_provider, 'download', hanging)
+
+    started = time.perf_counter()
+    result, invalid_symbols, data_issues = fetch_stock_data_batch(['AAPL', 'MSFT', 'GOOG'], 2020, 2021)
+    assert time.perf_counter() - started < 0.4
+    assert list(result) == ['AAPL', 'GOOG'] and invalid_symbols == ['MSFT']
+    assert data_issues['MSFT'] == {'status': 'error', 'error': 'Download timed out after 0.1s'}
@@ -0,0 +1,49 @@
+# tests/test_sweep_service.py
+
+import pandas as pd
+import numpy as np
+from services import sweep_service
+from services.scenario_service import evaluate_scenarios
+from services.sweep_service import build_grid, run_sweep
+
+
+def make_stocks():
+    rng = np.random.default_rng(3)
+    dates = pd.bdate_range('2010-01-01', '2019-12-31')
+    return {
+        symbol: pd.Series(100 * np.cumprod(1 + rng.normal(0.0003, 0.01, len(dates))), index=dates)
+        for symbol in ('AAA', 'BBB')
+    }
+
+
+def test_grid_skips_empty_ranges():
+    grid = build_grid([2010, 2012], [2011, 2012], [0], ['none'], 1000, False, ['AAA'])
+    assert [(s['start_year'], s['end_year']) for s in grid] == [(2010, 2011), (2010, 2012)]
+
+
+def test_rows_are_final_months_of_each_scenario():
+    stocks = make_stocks()
+    scenarios = build_grid([2010, 2013], [2015, 2018], [50, 100], ['monthly', 'annually'], 1000, False, ['AAA', 'BBB'])
+
+    table = run_sweep(stocks, scenarios, max_workers=1)
+    expected = evaluate_scenarios(stocks, scenarios)
+
+    assert table['columns'][:5] == ['start_year', 'end_year', 'addition_amount', 'addition_frequency', 'symbol']
+    assert len(table['rows']) == 2 * len(scenarios)
+    by_key = {(row[0], row[1], row[2], row[3], row[4]): row for row in table['rows']}
+    for s in scenarios:
+        for stock in expected[s['id']]:
+            final = stock['monthly_data'][-1]
+            row = by_key[(s['start_year'], s['end_year'], s['addition_amount'], s['addition_frequency'], stock['symbol'])]
+            assert row[5:] == [final['invested'], final['total'], final['gains'], final['return_percentage']]
+
+
+def test_process_pool_matches_in_process(monkeypatch):
+    stocks = make_stocks()
+    scenarios = build_grid(range(2010, 2016), range(2012, 2020), [0, 100], ['monthly'], 1000, False, ['AAA', 'BBB'])
+
+    inline = run_sweep(stocks, scenarios, max_workers=1)
+    monkeypatch.setattr(sweep_service, 'PARALLEL_THRESHOLD', 0)
+    pooled = run_sweep(stocks, scenarios, max_workers=2, chunk_size=10)
+
+    assert pooled == inline
@@ -0,0 +1,113 @@
+# tests/test_visualization_service.py
+import json
+import numpy as np
+import plotly
+import plotly.graph_objs as go
+from services.visualization_service import VisualizationService
+
+RESULTS = [
+    {
+        'symbol': symbol,
+        'monthly_data': [
+            {'date': f'2020-{month:02d}', 'invested': 1000.0 * i + 100 * month, 'total': 1000.0 + 137.25 * month}
+            for month in range(1, 13)
+        ]
+    }
+    for i, symbol in enumerate(['AAPL', 'MSFT', 'GOOG', 'AMZN', 'META', 'NVDA'])
+]
+
+
+def monthly_results(symbols, years, invested=lambda i, m: 100.0 * m):
+    months = [(year, month) for year in years for month in range(1, 13)]
+    return [
+        {
+            'symbol': symbol,
+            'monthly_data': [
+                {'date': f'{year}-{month:02d}', 'invested': invested(i, m), 'total': 100.0 * m * (1 + np.sin(m / 7 + i))}
+                for m, (year, month) in enumerate(months)
+            ]
+        }
+        for i, symbol in enumerate(symbols)
+    ]
+
+
+def plotly_figure(results):
+    """The figure as the Plotly object API builds it"""
+    colors = ['blue', 'red', 'green', 'purple', 'orange']
+    traces = []
+    for i, stock_data in enumerate(results):
+        x_values = [point['date'] for point in stock_data['monthly_data']]
+        traces.append(go.Scatter(
+            x=x_values,
+            y=[point['total'] for point in stock_data['monthly_data']],
+            mode='lines+markers',
+            name=f"{stock_data['symbol']} Total",
+            line=dict(color=colors[i % len(colors)]),
+            hovertemplate='%{x}<br>Value: $%{y:,.2f}<extra></extra>'
+        ))
+        traces.append(go.Scatter(
+            x=x_values,
+            y=[point['invested'] for point in stock_data['monthly_data']],
+            mode='lines+markers',
+            name='Invested Amount',
+            line=dict(color='gray', dash='dash'),
+            hovertemplate='%{x}<br>Invested: $%{y:,.2f}<extra></extra>'
+        ))
+    layout = go.Layout(
+        title='Investment Growth Comparison',
+        xaxis={'title': 'Date', 'tickformat': '%Y-%m', 'tickangle': -45, 'nticks': 12},
+        yaxis={'title': 'Value ($)', 'tickformat': '$,.0f', 'rangemode': 'tozero'},
+        hovermode='x unified',
+        showlegend=True,
+        legend={'orientation': 'h', 'yanchor': 'bottom', 'y': 1.02, 'xanchor': 'right', 'x': 1},
+        margin=dict(t=100, b=80),
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+    )
+    fig = go.Figure(data=traces, layout=layout)
+    fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor='#f0f0f0')
+    fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='#f0f0f0')
+    return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+
+
+def test_graph_matches_plotly_figure():
+    assert json.loads(VisualizationService.generate_graph(RESULTS)) == json.loads(plotly_figure(RESULTS))
+
+
+def test_graph_spec_references_columns():
+    columnar = [
+        {
+            'symbol': stock['symbol'],
+            'columns': {field: [point[field] for point in stock['monthly_data']] for field in ('date', 'invested', 'total')}
+        }
+        for stock in RESULTS
+    ]
+    spec = VisualizationService.generate_graph_spec(columnar)
+    expected = json.loads(plotly_figure(RESULTS))
+    assert spec['layout'] == expected['layout']
+    assert [trace.pop('source') for trace in spec['data'][:2]] == [
+        {'symbol': 'AAPL', 'x': 'date', 'y': 'total'},
+        {'symbol': 'AAPL', 'x': 'date', 'y': 'invested'}
+    ]
+    for trace, reference in zip(spec['data'][:2], expected['data']):
+        assert trace == {key: value for key, value in reference.items() if key not in ('x', 'y')}
+
+
+def test_identical_invested_traces_are_collapsed():
+    results = monthly_results(['AAPL', 'MSFT', 'GOOG'], range(2020, 2022))
+    names = [trace['name'] for trace in json.loads(VisualizationService.generate_graph(results))['data']]
+    assert names == ['AAPL Total', 'Invested Amount', 'MSFT Total', 'GOOG Total']
+
+
+def test_max_points_downsamples_every_trace():
+    results = monthly_results(['AAPL', 'MSFT'], range(1974, 2024), invested=lambda i, m: 100.0 * m * (i + 1))
+    figure = json.loads(VisualizationService.generate_graph(results, max_points=100))
+
+    assert len(figure['data']) == 4
+    for trace in figure['data']:
+        assert len(trace['x']) == len(trace['y']) == 100
+        assert trace['x'][0] == '1974-01' and trace['x'][-1] == '2023-12'
+    # Kept points are real samples of the full-resolution series
+    totals = {point['date']: point['total'] for point in results[0]['monthly_data']}
+    assert all(totals[x] == y for x, y in zip(figure['data'][0]['x'], figure['data'][0]['y']))
+    assert max(figure['data'][0]['y']) == max(totals.values())
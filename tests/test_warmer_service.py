@@ -0,0 +1,92 @@
+# tests/test_warmer_service.py
+import datetime
+import time
+import pytest
+from app import create_app
+from services import stock_list_service
+from services.cache_service import cache
+from services.stock_service import fetch_month_end_batch
+from services.warmer_service import REFRESH, WARM, CacheWarmer, reserve_warm_cache_capacity, start_cache_warmer
+
+UNIVERSE = [{'symbol': 'AAPL'}, {'symbol': 'MSFT'}, {'symbol': 'BOGUS'}]
+
+
+@pytest.fixture
+def app(download_calls, monkeypatch):
+    monkeypatch.setattr(stock_list_service, 'load_stock_data', lambda: UNIVERSE)
+    app = create_app('development')
+    app.config.update(PRICE_STORE_ENABLED=False, FETCH_CHUNK_SIZE=2)
+    with app.app_context():
+        cache.clear()
+    return app
+
+
+def test_ranges_follow_the_current_year(app):
+    warmer = CacheWarmer(app, lookback_years=(5, 10))
+    assert warmer.ranges(datetime.date(2024, 3, 1)) == [(2019, 2024), (2014, 2024)]
+
+
+def test_warm_fills_the_cache_in_chunks(app, download_calls):
+    warmer = CacheWarmer(app, lookback_years=(5,))
+    assert warmer.run(WARM) == ['BOGUS']
+    assert sorted(map(sorted, download_calls)) == [['AAPL', 'MSFT'], ['BOGUS']]
+
+    status = warmer.status()
+    assert status['state'] == 'idle' and status['runs'] == 1
+    assert status['symbolsDone'] == status['symbolsTotal'] == 3
+    assert status['failedSymbols'] == ['BOGUS']
+
+    # Served from the cache now, at every resolution a request can ask for
+    start_year, end_year = warmer.ranges()[0]
+    with app.app_context():
+        frames, _, _ = fetch_month_end_batch(['AAPL', 'MSFT'], start_year, end_year)
+    assert sorted(frames) == ['AAPL', 'MSFT']
+    assert len(download_calls) == 2
+
+    # A second warm-up finds everything cached
+    warmer.run(WARM)
+    assert len(download_calls) == 2
+
+
+def test_refresh_downloads_again(app, download_calls):
+    warmer = CacheWarmer(app, lookback_years=(5,))
+    warmer.run(WARM)
+    warmer.run(REFRESH)
+    assert len(download_calls) == 4
+    assert warmer.status()['phase'] == REFRESH
+
+
+def test_background_schedule_and_status_endpoint(app):
+    assert app.test_client().get('/api/cache/warmer').json == {'state': 'disabled'}
+
+    warmer = CacheWarmer(app, lookback_years=(5,), interval=60)
+    app.extensions['cache_warmer'] = warmer
+    warmer.start()
+    deadline = time.monotonic() + 10
+    while warmer.status()['nextRunAt'] is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    warmer.stop(timeout=5)
+
+    status = app.test_client().get('/api/cache/warmer').json
+    assert status['runs'] == 1 and status['phase'] == WARM
+    assert status['nextRunAt'] is not None
+    assert status['running'] is False
+
+
+def test_preloaded_app_leaves_starting_to_the_workers(app):
+    app.config.update(PRELOAD_SERVICES=True, CACHE_WARM_LOOKBACK_YEARS=(5,), CACHE_WARM_INTERVAL=60,
+                      CACHE_WARM_MAX_WORKERS=1)
+    warmer = start_cache_warmer(app)
+    assert app.extensions['cache_warmer'] is warmer
+    assert warmer.status()['running'] is False
+
+
+def test_simple_cache_threshold_fits_the_warmed_entries(app):
+    app.config.update(CACHE_TYPE='simple', CACHE_THRESHOLD=500, CACHE_WARM_LOOKBACK_YEARS=(5, 10))
+    assert reserve_warm_cache_capacity(app) == 500 + 3 * 2 * 3
+
+    app.config.update(CACHE_THRESHOLD=2000)
+    assert reserve_warm_cache_capacity(app) == 2000 + 3 * 2 * 3
+
+    app.config.update(CACHE_TYPE='redis', CACHE_THRESHOLD=500)
+    assert reserve_warm_cache_capacity(app) == 500
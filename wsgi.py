@@ -0,0 +1,9 @@
+"""
+WSGI entry point. Serve with preloading so workers fork from a parent that
+has already imported the services and loaded their data:
+
+    PRELOAD_SERVICES=true gunicorn --preload -w 4 wsgi:app
+"""
+from app import create_app
+
+app = create_app()